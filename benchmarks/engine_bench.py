@@ -0,0 +1,369 @@
+"""
+Benchmark riproducibile di FileOperationEngine su alberi sintetici
+
+Genera workload deterministici (seed fisso) e misura copy/move per ogni backend
+(tmpfs, disco locale) e ogni combinazione di impostazioni. Ogni caso gira in un
+sottoprocesso dedicato, così RSS di picco e tempo CPU sono del solo caso.
+
+Uso (headless, Linux):
+    python benchmarks/engine_bench.py --output results.json
+    python benchmarks/engine_bench.py --workloads tiny,huge --scale 0.1 --repeat 3
+    python benchmarks/engine_bench.py --compare baseline.json --output new.json
+    python benchmarks/engine_bench.py --workloads tiny --preserve none,default,all
+
+Nota: la page cache non viene svuotata tra i casi (serve root); i numeri su disco
+locale includono quindi l'effetto cache, in modo uguale per tutte le versioni.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+KB = 1024
+MB = 1024 * 1024
+SEED = 20240601
+WRITE_BLOCK = 1 * MB
+
+
+# --- Workload -----------------------------------------------------------------
+
+def _tiny(rng, scale):
+    """Molti file piccolissimi (overhead per file)"""
+    count = max(1, int(20000 * scale))
+    return [(f"d{i // 500:03d}/f{i:06d}.txt", rng.randint(64, 4 * KB)) for i in range(count)]
+
+
+def _huge(rng, scale):
+    """Pochi file enormi (throughput sequenziale)"""
+    size = max(MB, int(1024 * MB * scale))
+    return [(f"big{i}.bin", size) for i in range(2)]
+
+
+def _mixed(rng, scale):
+    """Distribuzione log-normale (mediana ~32 KB, coda fino a centinaia di MB)"""
+    count = max(1, int(3000 * scale))
+    files = []
+    for i in range(count):
+        size = int(min(rng.lognormvariate(10.4, 2.2), 512 * MB))
+        files.append((f"m{i % 37:02d}/s{i % 7}/file{i:05d}.dat", size))
+    return files
+
+
+def _deep(rng, scale):
+    """Albero profondo e stretto (costo di creazione cartelle / path lunghi)"""
+    count = max(1, int(2000 * scale))
+    files = []
+    for i in range(count):
+        depth = 4 + (i % 12)
+        parts = [f"l{level}_{(i >> level) % 3}" for level in range(depth)]
+        files.append(("/".join(parts + [f"leaf{i:05d}.bin"]), rng.randint(1 * KB, 64 * KB)))
+    return files
+
+
+def _sparse(rng, scale):
+    """File sparsi: dimensione logica grande, pochi blocchi allocati"""
+    count = max(1, int(4 * scale))
+    return [(f"sparse{i:02d}.img", max(MB, int(256 * MB * scale)), 'sparse') for i in range(count)]
+
+
+WORKLOADS = {
+    'tiny': _tiny,
+    'huge': _huge,
+    'mixed': _mixed,
+    'deep': _deep,
+    'sparse': _sparse,
+}
+
+
+def generate_tree(root: Path, workload: str, scale: float) -> dict:
+    """Crea l'albero del workload in root (stessi file e contenuti a parità di seed/scale)"""
+    rng = random.Random(f"{SEED}-{workload}-{scale}")
+    # Blocco pseudo-casuale deterministico (non comprimibile, non deduplicabile banalmente)
+    block = random.Random(SEED).randbytes(WRITE_BLOCK)
+    total_bytes = 0
+    entries = WORKLOADS[workload](rng, scale)
+    for entry in entries:
+        rel_path, size = entry[0], entry[1]
+        sparse = len(entry) > 2 and entry[2] == 'sparse'
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            if sparse:
+                # Un blocco ogni 64 MB, il resto buchi
+                for offset in range(0, size, 64 * MB):
+                    f.seek(offset)
+                    f.write(block[:64 * KB])
+                f.truncate(size)
+            else:
+                offset = rng.randrange(WRITE_BLOCK)
+                remaining = size
+                while remaining > 0:
+                    n = min(remaining, WRITE_BLOCK - offset)
+                    f.write(block[offset:offset + n])
+                    remaining -= n
+                    offset = 0
+        total_bytes += size
+    return {'files': len(entries), 'bytes': total_bytes}
+
+
+# --- Backend ------------------------------------------------------------------
+
+def backend_dirs(names, scratch):
+    dirs = {}
+    for name in names:
+        if name == 'tmpfs':
+            if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+                dirs[name] = Path(tempfile.mkdtemp(prefix='afm-bench-', dir='/dev/shm'))
+        elif name == 'disk':
+            dirs[name] = Path(tempfile.mkdtemp(prefix='afm-bench-', dir=scratch))
+        else:
+            dirs[name] = Path(tempfile.mkdtemp(prefix='afm-bench-', dir=name))
+    return dirs
+
+
+# --- Caso singolo (sottoprocesso) ---------------------------------------------
+
+def run_case(case: dict) -> dict:
+    """Esegue un'operazione e misura tempo, CPU e RSS di picco del processo"""
+    import resource
+    from src.file_operations import FileOperationEngine
+
+    engine = FileOperationEngine(
+        buffer_size=int(case['buffer_mb'] * MB),
+        use_ramdrive=False,
+        num_threads=int(case.get('threads', 4)),
+        auto_tune=bool(case.get('auto_tune', False)),
+        preserve=case.get('preserve', 'default').replace('+', ','),
+    )
+    errors = []
+    engine.set_error_callback(errors.append)
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    if case['operation'] == 'move':
+        ok = engine.move(case['source'], case['destination'])
+    else:
+        ok = engine.copy(case['source'], case['destination'])
+    elapsed = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    peak_rss_kb = usage_after.ru_maxrss
+    if sys.platform == 'darwin':
+        peak_rss_kb //= 1024  # macOS riporta bytes
+
+    result = {
+        'ok': bool(ok),
+        'seconds': elapsed,
+        'cpu_seconds': cpu,
+        'peak_rss_mb': round(peak_rss_kb / 1024, 1),
+        'errors': errors[:5],
+    }
+    if engine.tuner is not None:
+        result['tuner'] = engine.tuner.operating_point()
+    return result
+
+
+def _spawn_case(case: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+        capture_output=True, text=True, cwd=str(REPO_ROOT),
+    )
+    if proc.returncode != 0:
+        return {'ok': False, 'errors': [proc.stderr.strip()[-2000:]]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# --- Suite ----------------------------------------------------------------------
+
+def _settings_matrix(args):
+    settings = []
+    for buffer_mb in args.buffers:
+        for auto_tune in args.auto_tune:
+            for preserve in args.preserve:
+                settings.append({'buffer_mb': buffer_mb, 'auto_tune': auto_tune, 'threads': args.threads,
+                                 'preserve': preserve})
+    return settings
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=str(REPO_ROOT)).stdout.strip()
+    except Exception:
+        return ''
+
+
+def run_suite(args) -> dict:
+    scratch = args.scratch or tempfile.gettempdir()
+    backends = backend_dirs(args.backends, scratch)
+    results = []
+    try:
+        for backend, base in backends.items():
+            for workload in args.workloads:
+                pristine = base / f"{workload}-src"
+                info = generate_tree(pristine, workload, args.scale)
+                print(f"[{backend}] {workload}: {info['files']} file, {info['bytes'] / MB:.1f} MB", file=sys.stderr)
+
+                for operation in args.operations:
+                    for setting in _settings_matrix(args):
+                        runs = []
+                        for rep in range(args.repeat):
+                            destination = base / f"{workload}-dst"
+                            shutil.rmtree(destination, ignore_errors=True)
+                            source = pristine
+                            if operation == 'move':
+                                # Move consuma la sorgente: lavora su una copia fresca
+                                source = base / f"{workload}-mv"
+                                shutil.rmtree(source, ignore_errors=True)
+                                shutil.copytree(pristine, source)
+                            case = dict(setting, operation=operation, source=str(source),
+                                        destination=str(destination))
+                            runs.append(_spawn_case(case))
+                            shutil.rmtree(destination, ignore_errors=True)
+                            if operation == 'move':
+                                shutil.rmtree(source, ignore_errors=True)
+
+                        ok_runs = [r for r in runs if r.get('ok')]
+                        entry = {
+                            'backend': backend,
+                            'workload': workload,
+                            'operation': operation,
+                            'settings': setting,
+                            'files': info['files'],
+                            'bytes': info['bytes'],
+                            'ok': len(ok_runs) == len(runs),
+                            'runs': runs,
+                        }
+                        if ok_runs:
+                            seconds = statistics.median(r['seconds'] for r in ok_runs)
+                            entry.update({
+                                'seconds': seconds,
+                                'mb_per_s': info['bytes'] / MB / seconds if seconds > 0 else 0.0,
+                                'files_per_s': info['files'] / seconds if seconds > 0 else 0.0,
+                                'cpu_seconds': statistics.median(r['cpu_seconds'] for r in ok_runs),
+                                'peak_rss_mb': max(r['peak_rss_mb'] for r in ok_runs),
+                            })
+                        results.append(entry)
+                        print(_format_entry(entry), file=sys.stderr)
+                shutil.rmtree(pristine, ignore_errors=True)
+    finally:
+        for base in backends.values():
+            shutil.rmtree(base, ignore_errors=True)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+def _case_key(entry: dict) -> tuple:
+    s = entry['settings']
+    # Run precedenti all'opzione: confrontati con il default (così si vede il costo dei metadati)
+    return (entry['backend'], entry['workload'], entry['operation'], s['buffer_mb'], s['auto_tune'],
+            s.get('preserve', 'default'))
+
+
+def _format_entry(entry: dict) -> str:
+    s = entry['settings']
+    label = f"{entry['backend']:<6} {entry['workload']:<7} {entry['operation']:<5} " \
+            f"buf={s['buffer_mb']:g}MB tune={'on' if s['auto_tune'] else 'off'} " \
+            f"meta={s.get('preserve', 'default')}"
+    if not entry.get('seconds'):
+        return f"{label}  FAILED"
+    return (f"{label}  {entry['mb_per_s']:9.1f} MB/s {entry['files_per_s']:9.1f} file/s "
+            f"cpu {entry['cpu_seconds']:6.2f}s rss {entry['peak_rss_mb']:7.1f} MB")
+
+
+def compare(baseline: dict, current: dict) -> str:
+    """Confronto testuale (delta % di MB/s e file/s per caso)"""
+    old = {_case_key(e): e for e in baseline.get('results', []) if e.get('seconds')}
+    lines = [f"baseline {baseline.get('meta', {}).get('commit', '?')} -> current {current.get('meta', {}).get('commit', '?')}"]
+    for entry in current.get('results', []):
+        before = old.get(_case_key(entry))
+        if not before or not entry.get('seconds'):
+            continue
+        delta = (before['seconds'] / entry['seconds'] - 1) * 100
+        lines.append(f"{_format_entry(entry)}  {delta:+6.1f}%")
+    return "\n".join(lines)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FileOperationEngine su alberi sintetici")
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help="tiny,huge,mixed,deep,sparse")
+    parser.add_argument('--backends', default='tmpfs,disk', help="tmpfs, disk o percorsi di cartelle")
+    parser.add_argument('--operations', default='copy,move')
+    parser.add_argument('--buffers', default='1,10,64', help="Buffer in MB (lista)")
+    parser.add_argument('--auto-tune', default='off,on', help="off,on")
+    parser.add_argument('--preserve', default='default',
+                        help="Metadati conservati (lista): none, default, all o nomi uniti da + (times+mode)")
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--scale', type=float, default=1.0, help="Fattore dimensione workload")
+    parser.add_argument('--repeat', type=int, default=1, help="Ripetizioni per caso (mediana)")
+    parser.add_argument('--scratch', default=None, help="Cartella per il backend 'disk'")
+    parser.add_argument('--output', default=None, help="File JSON risultati (default stdout)")
+    parser.add_argument('--compare', default=None, help="JSON di un run precedente da confrontare")
+    parser.add_argument('--run-case', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    args.workloads = [w for w in args.workloads.split(',') if w]
+    unknown = [w for w in args.workloads if w not in WORKLOADS]
+    if unknown:
+        parser.error(f"workload sconosciuti: {', '.join(unknown)}")
+    args.backends = [b for b in args.backends.split(',') if b]
+    args.operations = [o for o in args.operations.split(',') if o in ('copy', 'move')]
+    args.buffers = [float(b) for b in args.buffers.split(',') if b]
+    args.auto_tune = [v.strip().lower() in ('on', '1', 'true') for v in args.auto_tune.split(',') if v]
+    args.preserve = [v.strip().lower() for v in args.preserve.split(',') if v.strip()]
+    try:
+        from src.metadata import parse_preserve
+        for value in args.preserve:
+            parse_preserve(value.replace('+', ','))
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    report = run_suite(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+
+    return 0 if all(e['ok'] for e in report['results']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
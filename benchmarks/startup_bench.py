@@ -0,0 +1,184 @@
+"""
+Benchmark dei tempi di avvio (CLI e GUI) con budget
+
+Ogni misura gira in un processo Python nuovo (come un avvio dal menu contestuale):
+- cli:        python -m src --help (tempo totale del processo)
+- gui_import: python -X importtime -c "import ui.gui_customtkinter" (moduli più costosi)
+- gui_paint:  ui/gui_customtkinter.py --startup-benchmark (ms fino al primo disegno)
+
+Uso:
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --targets cli --repeat 10
+    python benchmarks/startup_bench.py --budget gui_paint=1200 --output startup.json
+
+Exit code 1 se un target fallisce o supera il budget (mediana delle ripetizioni).
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Budget di default in millisecondi (mediana)
+BUDGETS_MS = {
+    'cli': 100.0,
+    'gui_import': 600.0,
+    'gui_paint': 1500.0,
+}
+TARGETS = tuple(BUDGETS_MS)
+TOP_MODULES = 12
+
+
+def _run(args, timeout=60.0):
+    """Esegue un processo Python dalla root del repo; ritorna (ms, returncode, stdout, stderr)"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable] + list(args),
+        cwd=str(REPO_ROOT),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    return (time.perf_counter() - started) * 1000.0, proc.returncode, proc.stdout, proc.stderr
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Righe di -X importtime -> totale (moduli di primo livello) e moduli più costosi"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip(' '))) // 2
+            modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    top_level = [m for m in modules if m[3] == 0]
+    return {
+        'total_ms': sum(m[2] for m in top_level) / 1000.0,
+        'top_cumulative': [
+            {'module': name, 'cumulative_ms': cum / 1000.0, 'self_ms': own / 1000.0}
+            for name, own, cum, _ in sorted(top_level, key=lambda m: m[2], reverse=True)[:TOP_MODULES]
+        ],
+        'top_self': [
+            {'module': name, 'self_ms': own / 1000.0}
+            for name, own, _, _ in sorted(modules, key=lambda m: m[1], reverse=True)[:TOP_MODULES]
+        ],
+    }
+
+
+def measure(target: str) -> dict:
+    """Una misura di un target: {'ms': ..., ...} oppure {'error': ...}"""
+    if target == 'cli':
+        ms, rc, _, err = _run(['-m', 'src', '--help'])
+        return {'ms': ms} if rc == 0 else {'error': err.strip().splitlines()[-1:] or [f"exit {rc}"]}
+
+    if target == 'gui_import':
+        ms, rc, _, err = _run(['-X', 'importtime', '-c', 'import ui.gui_customtkinter'])
+        if rc != 0:
+            return {'error': [line for line in err.strip().splitlines() if not line.startswith('import time:')][-1:]}
+        detail = parse_importtime(err)
+        return {'ms': detail['total_ms'], 'process_ms': ms, 'imports': detail}
+
+    if target == 'gui_paint':
+        ms, rc, out, err = _run([str(Path('ui') / 'gui_customtkinter.py'), '--startup-benchmark'])
+        if rc != 0:
+            return {'error': err.strip().splitlines()[-1:] or [f"exit {rc}"]}
+        for line in reversed(out.strip().splitlines()):
+            try:
+                return {'ms': float(json.loads(line)['first_paint_ms']), 'process_ms': ms}
+            except (ValueError, KeyError, TypeError):
+                continue
+        return {'error': ['first_paint_ms non trovato nell\'output']}
+
+    raise ValueError(target)
+
+
+def run_target(target: str, repeat: int, budget_ms: float) -> dict:
+    runs = []
+    for _ in range(max(1, repeat)):
+        result = measure(target)
+        if 'error' in result:
+            return {'target': target, 'ok': False, 'error': ' '.join(result['error']), 'budget_ms': budget_ms}
+        runs.append(result)
+
+    median = statistics.median(r['ms'] for r in runs)
+    entry = {
+        'target': target,
+        'median_ms': median,
+        'min_ms': min(r['ms'] for r in runs),
+        'max_ms': max(r['ms'] for r in runs),
+        'repeat': len(runs),
+        'budget_ms': budget_ms,
+        'ok': median <= budget_ms,
+    }
+    if 'process_ms' in runs[0]:
+        entry['process_median_ms'] = statistics.median(r['process_ms'] for r in runs)
+    if 'imports' in runs[-1]:
+        entry['imports'] = runs[-1]['imports']
+    return entry
+
+
+def format_summary(report: dict) -> str:
+    lines = []
+    for entry in report['results']:
+        if 'error' in entry:
+            lines.append(f"❌ {entry['target']:<10} errore: {entry['error']}")
+            continue
+        mark = '✅' if entry['ok'] else '❌'
+        lines.append(f"{mark} {entry['target']:<10} {entry['median_ms']:8.1f} ms (budget {entry['budget_ms']:.0f} ms,"
+                     f" min {entry['min_ms']:.1f}, max {entry['max_ms']:.1f})")
+        for module in (entry.get('imports') or {}).get('top_cumulative', [])[:5]:
+            lines.append(f"     {module['cumulative_ms']:7.1f} ms  {module['module']}")
+    return "\n".join(lines)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dei tempi di avvio (CLI/GUI) con budget")
+    parser.add_argument('--targets', default=','.join(TARGETS), help="cli,gui_import,gui_paint")
+    parser.add_argument('--repeat', type=int, default=5, help="Ripetizioni per target (mediana)")
+    parser.add_argument('--budget', action='append', default=[], metavar='TARGET=MS',
+                        help="Sovrascrive un budget (ripetibile)")
+    parser.add_argument('--output', default=None, help="File JSON risultati")
+    args = parser.parse_args(argv)
+
+    args.targets = [t for t in args.targets.split(',') if t]
+    unknown = [t for t in args.targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"target sconosciuti: {', '.join(unknown)}")
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        name, _, value = item.partition('=')
+        if name not in budgets:
+            parser.error(f"budget per target sconosciuto: {name}")
+        try:
+            budgets[name] = float(value)
+        except ValueError:
+            parser.error(f"budget non valido: {item}")
+    args.budgets = budgets
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'results': [run_target(t, args.repeat, args.budgets[t]) for t in args.targets],
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(format_summary(report))
+    return 0 if all(e['ok'] for e in report['results']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
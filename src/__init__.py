@@ -1,19 +1,56 @@
 """
 __init__.py per modulo src
+
+Export pigri (PEP 562): "import src" e "python -m src" non caricano asyncio,
+subprocess ecc. finché il nome non viene usato.
 """
-from .utils import (
-    is_admin, get_drive_info, format_bytes, format_time,
-    is_path_accessible, is_path_writable, get_file_size,
-    create_directory_if_not_exists, get_command_output,
-    enable_long_paths
-)
-from .ramdrive_handler import RamDriveManager
-from .file_operations import FileOperationEngine, OperationType
+import importlib
+
+_EXPORTS = {
+    'is_admin': '.utils', 'get_drive_info': '.utils', 'format_bytes': '.utils',
+    'format_time': '.utils', 'is_path_accessible': '.utils', 'is_path_writable': '.utils',
+    'get_file_size': '.utils', 'create_directory_if_not_exists': '.utils',
+    'get_command_output': '.utils', 'enable_long_paths': '.utils',
+    'get_device_key': '.utils', 'get_volume_id': '.utils', 'is_pid_alive': '.utils',
+    'get_host_id': '.utils',
+    'StorageProbe': '.storage_probe', 'get_storage_probe': '.storage_probe',
+    'RamDriveManager': '.ramdrive_handler',
+    'FileOperationEngine': '.file_operations', 'OperationType': '.file_operations',
+    'ProgressSnapshot': '.file_operations',
+    'AsyncFileMover': '.async_api', 'AsyncTransferJob': '.async_api',
+    'JobScheduler': '.job_scheduler', 'TransferJob': '.job_scheduler', 'JobState': '.job_scheduler',
+    'TransferStats': '.transfer_stats',
+    'MetricsExporter': '.metrics_export',
+    'TraceRecorder': '.trace_recorder',
+    'TransferDaemon': '.daemon', 'DaemonClient': '.daemon',
+    'EtaEstimator': '.eta_estimator', 'EtaHistory': '.eta_estimator', 'get_eta_history': '.eta_estimator',
+    'MetadataCopier': '.metadata', 'parse_preserve': '.metadata',
+    'ArchiveBuilder': '.archive_writer', 'ARCHIVE_FORMATS': '.archive_writer',
+    'open_archive': '.archive_reader',
+}
 
 __all__ = [
     'is_admin', 'get_drive_info', 'format_bytes', 'format_time',
     'is_path_accessible', 'is_path_writable', 'get_file_size',
     'create_directory_if_not_exists', 'get_command_output',
-    'enable_long_paths', 'RamDriveManager', 'FileOperationEngine',
-    'OperationType'
+    'enable_long_paths', 'get_device_key', 'get_volume_id', 'is_pid_alive', 'get_host_id',
+    'StorageProbe', 'get_storage_probe', 'RamDriveManager', 'FileOperationEngine',
+    'OperationType', 'ProgressSnapshot', 'AsyncFileMover', 'AsyncTransferJob',
+    'JobScheduler', 'TransferJob', 'JobState', 'TransferStats', 'MetricsExporter',
+    'TraceRecorder', 'TransferDaemon', 'DaemonClient', 'EtaEstimator', 'EtaHistory',
+    'get_eta_history', 'MetadataCopier', 'parse_preserve', 'ArchiveBuilder', 'ARCHIVE_FORMATS',
+    'open_archive'
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
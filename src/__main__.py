@@ -0,0 +1,8 @@
+"""
+python -m src: riga di comando headless (vedi src/cli.py)
+"""
+from .cli import main
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
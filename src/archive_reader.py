@@ -0,0 +1,431 @@
+"""
+Archivio come sorgente: i membri vengono scritti direttamente nei file destinazione
+
+Nessuna estrazione intermedia (né su disco né sul RamDrive): ogni membro passa
+dallo stream decompresso al temp del file finale, poi rename come una copia.
+
+- zip: l'indice centrale dà subito elenco e totali esatti; i membri sono
+  indipendenti e vengono decompressi in parallelo, un handle ZipFile per
+  thread (zlib rilascia il GIL)
+- tar / tar.gz / tar.bz2 / tar.xz / tar.zst: uno stream unico, letto in ordine.
+  La decompressione gira su un thread di lettura anticipata, in parallelo
+  alle scritture. Si usano gzip/bz2/lzma.open e non la modalità "r|gz" di
+  tarfile: questi accettano anche membri/stream concatenati (pigz, xz -T, il
+  nostro archive_writer). Il totale è esatto per il tar non compresso,
+  stimato dal rapporto di compressione osservato per gli altri
+- Nomi assoluti, con ".." o con lettera di unità vengono scartati, così come
+  i link simbolici che escono dalla destinazione (come il filtro "data" di
+  tarfile); setuid/setgid/sticky non vengono ripristinati
+
+Solo libreria standard, moduli di codec importati al primo uso.
+"""
+import os
+import queue
+import stat
+import threading
+import time
+from collections import namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+MB = 1024 * 1024
+
+# Chunk massimo per membro (con più thread zip, ognuno ne tiene uno in memoria)
+EXTRACT_CHUNK_MAX = 8 * MB
+# Blocchi decompressi dal thread di lettura anticipata (piccoli: la stima del totale
+# dei tar compressi segue la posizione nel file compresso a questa granularità)
+DECODE_CHUNK = 1 * MB
+
+# Firme dei formati (il nome del file può mentire: conta il contenuto)
+_MAGIC = (
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip'),  # zip vuoto
+    (b'\x1f\x8b', 'tar.gz'),
+    (b'BZh', 'tar.bz2'),
+    (b'\xfd7zXZ\x00', 'tar.xz'),
+    (b'\x28\xb5\x2f\xfd', 'tar.zst'),
+)
+
+# Tipi di membro
+FILE, DIR, SYMLINK, HARDLINK, FIFO, CHRDEV, BLKDEV = 'file', 'dir', 'symlink', 'hardlink', 'fifo', 'chr', 'blk'
+
+# Metadati di un membro nella forma attesa da MetadataCopier (come os.stat_result)
+MemberStat = namedtuple('MemberStat', 'st_mode st_atime_ns st_mtime_ns')
+
+
+class ArchiveEntry:
+    """Membro dell'archivio con percorso relativo già verificato"""
+
+    __slots__ = ('path', 'kind', 'size', 'mode', 'mtime', 'linkname', 'devmajor', 'devminor', 'member')
+
+    def __init__(self, path: str, kind: str, size: int = 0, mode: int = 0o644, mtime: float = 0.0,
+                 linkname: str = '', devmajor: int = 0, devminor: int = 0, member=None):
+        self.path = path
+        self.kind = kind
+        self.size = size
+        self.mode = mode
+        self.mtime = mtime
+        self.linkname = linkname
+        self.devmajor = devmajor
+        self.devminor = devminor
+        self.member = member  # ZipInfo / TarInfo originale
+
+    @property
+    def stat(self) -> MemberStat:
+        mtime_ns = int(self.mtime * 1_000_000_000)
+        type_bits = stat.S_IFDIR if self.kind == DIR else stat.S_IFREG
+        return MemberStat(type_bits | (self.mode & 0o777), mtime_ns, mtime_ns)
+
+
+def detect_archive_format(path: str) -> Optional[str]:
+    """Formato dell'archivio dai primi byte (None se non è un archivio riconosciuto)"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(512)
+    except OSError:
+        return None
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if len(head) >= 262 and head[257:262] == b'ustar':
+        return 'tar'
+    return None
+
+
+def safe_member_path(name: str) -> Optional[str]:
+    """Percorso relativo sicuro per il sistema corrente; None se esce dalla destinazione"""
+    name = name.replace('\\', '/')
+    if name.startswith('/'):
+        return None
+    parts = [part for part in name.split('/') if part not in ('', '.')]
+    if not parts or '..' in parts or ':' in parts[0]:
+        return None
+    return os.path.join(*parts)
+
+
+def link_target_inside(root: str, parent: str, target: str) -> bool:
+    """
+    Link simbolico con bersaglio dentro root.
+
+    Args:
+        root: Cartella destinazione (percorso reale)
+        parent: Cartella reale (os.path.realpath) in cui nasce il link
+        target: Bersaglio scritto nell'archivio
+    """
+    if not target or os.path.isabs(target) or os.path.splitdrive(target)[0]:
+        return False
+    # ".." solo in testa: dopo un nome il kernel risolverebbe ".." dal bersaglio di un
+    # eventuale link, non dal percorso scritto
+    seen_name = False
+    for part in target.replace('\\', '/').split('/'):
+        if part == '..':
+            if seen_name:
+                return False
+        elif part not in ('', '.'):
+            seen_name = True
+    resolved = os.path.normpath(os.path.join(parent, target))
+    return resolved == root or resolved.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def open_archive(path: str):
+    """Sorgente d'archivio per path; ValueError se il formato non è riconosciuto o non leggibile"""
+    fmt = detect_archive_format(path)
+    if fmt is None:
+        raise ValueError(f"formato archivio non riconosciuto: {path}")
+    if fmt == 'zip':
+        return ZipArchiveSource(path)
+    if fmt == 'tar.zst':
+        try:
+            from compression import zstd  # noqa: F401  (Python 3.14+)
+        except ImportError:
+            raise ValueError("tar.zst richiede Python 3.14+ (modulo compression.zstd)")
+    return TarArchiveSource(path, fmt)
+
+
+# --- zip ---------------------------------------------------------------------
+
+class ZipArchiveSource:
+    """Zip: elenco completo dall'indice centrale, membri apribili da più thread"""
+
+    parallel = True
+    exact_totals = True
+
+    def __init__(self, path: str):
+        import zipfile
+
+        self.path = path
+        self.format = 'zip'
+        self.archive_size = os.path.getsize(path)
+        self.skipped: List[str] = []  # nomi scartati (percorso non sicuro)
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path)
+        self.entries: List[ArchiveEntry] = []
+        for info in self._zip.infolist():
+            entry = self._entry(info)
+            if entry is not None:
+                self.entries.append(entry)
+        self.total_size = sum(e.size for e in self.entries if e.kind == FILE)
+        self.file_count = sum(1 for e in self.entries if e.kind == FILE)
+
+    def _entry(self, info) -> Optional[ArchiveEntry]:
+        path = safe_member_path(info.filename)
+        if path is None:
+            self.skipped.append(info.filename)
+            return None
+        unix_mode = info.external_attr >> 16 if info.create_system == 3 else 0
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        if info.is_dir():
+            return ArchiveEntry(path, DIR, mode=stat.S_IMODE(unix_mode) or 0o755, mtime=mtime, member=info)
+        if stat.S_ISLNK(unix_mode):
+            # Convenzione Info-ZIP: il bersaglio è il contenuto del membro
+            target = self._zip.read(info).decode('utf-8', 'surrogateescape')
+            return ArchiveEntry(path, SYMLINK, mtime=mtime, linkname=target, member=info)
+        return ArchiveEntry(path, FILE, size=info.file_size, mode=stat.S_IMODE(unix_mode) or 0o644,
+                            mtime=mtime, member=info)
+
+    def open(self, entry: ArchiveEntry):
+        """Stream del membro; un ZipFile per thread (seek e lettura non vengono serializzati)"""
+        import zipfile
+
+        handle = getattr(self._local, 'zip', None)
+        if handle is None:
+            handle = self._local.zip = zipfile.ZipFile(self.path)
+            with self._handles_lock:
+                self._handles.append(handle)
+        return handle.open(entry.member)
+
+    def iter_entries(self) -> Iterator[Tuple[ArchiveEntry, None]]:
+        for entry in self.entries:
+            yield entry, None
+
+    def estimated_total(self) -> Optional[int]:
+        return self.total_size
+
+    def close(self):
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for handle in handles + [self._zip]:
+            try:
+                handle.close()
+            except Exception:
+                pass
+
+
+# --- tar ---------------------------------------------------------------------
+
+class _CountingReader:
+    """File archivio con conteggio dei byte letti (per stimare il totale dei tar compressi)"""
+
+    def __init__(self, fh):
+        self._fh = fh
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fh.read(size)
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        count = self._fh.readinto(buffer)
+        self.position += count or 0
+        return count
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self):
+        self._fh.close()
+
+
+class _ReadAhead:
+    """Decompressione su un thread dedicato: read() serve i blocchi già pronti"""
+
+    _EOF = object()
+
+    def __init__(self, decoder, raw: _CountingReader, chunk_size: int, depth: int = 4):
+        self._decoder = decoder
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=depth)
+        self._stop = False
+        self._buffer = b''
+        self._offset = 0
+        self._done = False
+        self._raw_before = 0  # posizione nel file compresso a inizio/fine del blocco corrente
+        self._raw_after = 0
+        self.decoded_consumed = 0  # byte decompressi già consegnati
+        self._thread = threading.Thread(target=self._run, name='afm-extract-readahead', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop:
+                data = self._decoder.read(self._chunk_size)
+                if not data:
+                    break
+                self._put((data, self._raw.position))
+        except BaseException as e:
+            self._put(e)
+            return
+        self._put(self._EOF)
+
+    def _put(self, item):
+        while not self._stop:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        wanted = size if size is not None and size >= 0 else None
+        while wanted is None or wanted > 0:
+            if self._offset >= len(self._buffer):
+                if self._done:
+                    break
+                item = self._queue.get()
+                if item is self._EOF:
+                    self._done = True
+                    break
+                if isinstance(item, BaseException):
+                    self._done = True
+                    raise item
+                self._raw_before = self._raw_after
+                self._buffer, self._raw_after = item
+                self._offset = 0
+            available = len(self._buffer) - self._offset
+            take = available if wanted is None else min(available, wanted)
+            parts.append(self._buffer[self._offset:self._offset + take])
+            self._offset += take
+            self.decoded_consumed += take
+            if wanted is not None:
+                wanted -= take
+        return b''.join(parts)
+
+    @property
+    def raw_consumed(self) -> int:
+        """Byte compressi corrispondenti ai dati consegnati (interpolati dentro il blocco)"""
+        if not self._buffer:
+            return self._raw_after
+        span = self._raw_after - self._raw_before
+        return self._raw_before + span * self._offset // len(self._buffer)
+
+    def close(self):
+        self._stop = True
+        # Sblocca il thread se è fermo su una coda piena
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join(timeout=5)
+
+
+class TarArchiveSource:
+    """Tar (anche compresso): membri in ordine di stream, contenuto letto durante l'iterazione"""
+
+    parallel = False
+
+    def __init__(self, path: str, fmt: str):
+        import tarfile
+
+        self.path = path
+        self.format = fmt
+        self.skipped: List[str] = []
+        self.archive_size = os.path.getsize(path)
+        self.entries: List[ArchiveEntry] = []  # noti solo durante lo stream (iter_entries)
+        self._raw: Optional[_CountingReader] = None
+        self._stream: Optional[_ReadAhead] = None
+        self._tar = None
+        self.exact_totals = fmt == 'tar'
+        if self.exact_totals:
+            # Tar non compresso: le intestazioni si leggono saltando i contenuti (seek)
+            with tarfile.open(path, 'r:') as tar:
+                members = [m for m in tar.getmembers() if m.isfile()]
+            self.total_size = sum(m.size for m in members)
+            self.file_count = len(members)
+        else:
+            # Stima iniziale (aggiornata con il rapporto di compressione osservato)
+            self.total_size = self.archive_size
+            self.file_count = 0
+
+    def _open_stream(self):
+        import tarfile
+
+        raw = _CountingReader(open(self.path, 'rb'))
+        if self.format == 'tar.gz':
+            import gzip
+            decoder = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif self.format == 'tar.bz2':
+            import bz2
+            decoder = bz2.BZ2File(raw, 'rb')
+        elif self.format == 'tar.xz':
+            import lzma
+            decoder = lzma.LZMAFile(raw, 'rb')
+        elif self.format == 'tar.zst':
+            from compression import zstd
+            decoder = zstd.ZstdFile(raw, 'rb')
+        else:
+            decoder = raw
+        self._raw = raw
+        self._stream = _ReadAhead(decoder, raw, DECODE_CHUNK)
+        # bufsize di default (10 KB): lo stream di tarfile ritaglia il buffer a ogni intestazione,
+        # con un buffer grande ogni membro piccolo costerebbe una copia di megabyte
+        self._tar = tarfile.open(fileobj=self._stream, mode='r|')
+
+    def _entry(self, member) -> Optional[ArchiveEntry]:
+        path = safe_member_path(member.name)
+        if path is None:
+            self.skipped.append(member.name)
+            return None
+        common = dict(mode=member.mode, mtime=float(member.mtime), member=member)
+        if member.isreg():
+            return ArchiveEntry(path, FILE, size=member.size, **common)
+        if member.isdir():
+            return ArchiveEntry(path, DIR, **common)
+        if member.issym():
+            return ArchiveEntry(path, SYMLINK, linkname=member.linkname, **common)
+        if member.islnk():
+            target = safe_member_path(member.linkname)
+            if target is None:
+                self.skipped.append(member.name)
+                return None
+            return ArchiveEntry(path, HARDLINK, linkname=target, **common)
+        kind = {b'6': FIFO, b'3': CHRDEV, b'4': BLKDEV}.get(member.type)
+        if kind is None:
+            self.skipped.append(member.name)  # tipi GNU sparse/volume ecc.
+            return None
+        return ArchiveEntry(path, kind, devmajor=member.devmajor, devminor=member.devminor, **common)
+
+    def iter_entries(self) -> Iterator[Tuple[ArchiveEntry, Optional[object]]]:
+        """(membro, stream del contenuto per i file); lo stream vale solo fino al membro successivo"""
+        if self._tar is None:
+            self._open_stream()
+        for member in self._tar:
+            entry = self._entry(member)
+            if entry is None:
+                continue
+            yield entry, self._tar.extractfile(member) if entry.kind == FILE else None
+
+    def estimated_total(self) -> Optional[int]:
+        """Byte dei file stimati dal rapporto di compressione osservato (None prima dei dati)"""
+        stream = self._stream
+        if stream is None:
+            return None
+        raw = stream.raw_consumed
+        if raw <= 0:
+            return None
+        # Mai sotto la dimensione dell'archivio: un tar compresso non è più grande del contenuto
+        return max(self.archive_size, stream.decoded_consumed * self.archive_size // raw)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+        if self._raw is not None:
+            try:
+                self._raw.close()
+            except Exception:
+                pass
+        self._tar = self._stream = self._raw = None
@@ -0,0 +1,348 @@
+"""
+Archivio come destinazione: un solo file (tar, tar compresso o zip) invece di migliaia
+
+Su destinazioni lente con i file piccoli (chiavette USB 2.0, SMB via VPN) domina
+il costo fisso di creazione di ogni file: scrivere un unico stream sequenziale
+è molto più veloce.
+
+- tar.gz / tar.bz2 / tar.xz / tar.zst: lo stream tar viene tagliato in blocchi
+  compressi in parallelo da un pool di processi (il GIL non limita) e scritti
+  in ordine. Ogni blocco è un membro gzip / stream bzip2 / stream xz / frame
+  zstd completo: la concatenazione è un file valido per tar, gzip, xz, bzip2,
+  zstd e per i moduli della libreria standard (come pigz, pbzip2, xz -T)
+- zip: Deflate per voce con zipfile, nel thread dell'engine (zipfile non accetta
+  dati già compressi, quindi niente pool); scritto come stream, senza seek
+- tar.zst solo se c'è il modulo compression.zstd (Python 3.14+)
+
+Solo libreria standard: i processi del pool importano questo modulo e nient'altro.
+Codec, tarfile, zipfile e pool vengono importati al primo uso (la CLI importa il
+modulo per --format e deve restare veloce all'avvio).
+"""
+import os
+import stat
+import time
+from collections import deque
+from typing import Callable, Optional
+
+MB = 1024 * 1024
+
+ARCHIVE_FORMATS = ('tar', 'tar.gz', 'tar.bz2', 'tar.xz', 'tar.zst', 'zip')
+DEFAULT_ARCHIVE_FORMAT = 'tar.gz'
+
+# Livello di default e dimensione dei blocchi per codec (blocchi più grandi = rapporto
+# migliore, ma più memoria: ~2 blocchi per processo in volo)
+DEFAULT_LEVELS = {'gz': 6, 'bz2': 9, 'xz': 6, 'zst': 3, 'zip': 6}
+BLOCK_SIZES = {'gz': 4 * MB, 'bz2': 4 * MB, 'xz': 16 * MB, 'zst': 8 * MB}
+
+# Sotto questa dimensione sorgente il pool costa più di quanto fa risparmiare
+PARALLEL_MIN_BYTES = 16 * MB
+
+
+# Attese sul pool: ogni quanto ricontrollare l'annullamento
+ABORT_POLL_SECONDS = 0.1
+
+
+class ArchiveCancelled(Exception):
+    """Scrittura dell'archivio interrotta (annullamento durante lettura o compressione)"""
+
+
+def zstd_available() -> bool:
+    try:
+        from compression import zstd  # noqa: F401  (Python 3.14+)
+        return True
+    except ImportError:
+        return False
+
+
+def parse_archive_format(value) -> str:
+    """Formato archivio (None = default); ValueError se sconosciuto o non disponibile"""
+    fmt = DEFAULT_ARCHIVE_FORMAT if value is None else str(value).strip().lower().lstrip('.')
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"formato archivio sconosciuto: {value} (ammessi: {', '.join(ARCHIVE_FORMATS)})")
+    if fmt == 'tar.zst' and not zstd_available():
+        raise ValueError("tar.zst richiede Python 3.14+ (modulo compression.zstd)")
+    return fmt
+
+
+def archive_suffix(fmt: str) -> str:
+    return '.' + fmt
+
+
+def _codec(fmt: str) -> Optional[str]:
+    if fmt == 'zip':
+        return 'zip'
+    return fmt.split('.', 1)[1] if '.' in fmt else None
+
+
+def _compress_block(codec: str, level: int, data: bytes) -> bytes:
+    """Comprime un blocco come membro/stream/frame autonomo (eseguito nei processi del pool)"""
+    if codec == 'gz':
+        import gzip
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if codec == 'bz2':
+        import bz2
+        return bz2.compress(data, level)
+    if codec == 'xz':
+        import lzma
+        return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+    if codec == 'zst':
+        from compression import zstd
+        return zstd.compress(data, level=level)
+    raise ValueError(f"codec sconosciuto: {codec}")
+
+
+class _RawSink:
+    """Stream senza compressione (tar): scrive direttamente sulla destinazione"""
+
+    def __init__(self, write: Callable[[bytes], None]):
+        self.write_out = write
+        self.bytes_in = 0  # posizione nello stream non compresso (tell)
+        self.bytes_out = 0
+
+    def write(self, data) -> int:
+        self.write_out(bytes(data))
+        self.bytes_in += len(data)
+        self.bytes_out += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.bytes_in
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class BlockCompressor(_RawSink):
+    """Sink per tarfile in modalità stream: blocchi pieni compressi dal pool, scritti in ordine"""
+
+    def __init__(self, codec: str, write: Callable[[bytes], None], workers: int = 1,
+                 level: Optional[int] = None, should_abort: Optional[Callable[[], bool]] = None):
+        super().__init__(write)
+        self.should_abort = should_abort
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else int(level)
+        self.block_size = BLOCK_SIZES[codec]
+        self.workers = max(1, int(workers))
+        self._buffer = bytearray()
+        self._pending = deque()
+        # Due blocchi per processo: uno in compressione, uno pronto a partire
+        self._max_inflight = self.workers * 2
+        self._pool = None
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.compress_seconds = 0.0  # attese del thread engine sulla compressione
+        self.blocks = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.bytes_in += len(data)
+        size = self.block_size
+        while len(self._buffer) >= size:
+            block = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._submit(block)
+        return len(data)
+
+    def _emit(self, compressed: bytes):
+        self.write_out(compressed)
+        self.bytes_out += len(compressed)
+        self.blocks += 1
+
+    def _submit(self, block: bytes):
+        if self._pool is None:
+            started = time.perf_counter()
+            compressed = _compress_block(self.codec, self.level, block)
+            self.compress_seconds += time.perf_counter() - started
+            self._emit(compressed)
+            return
+        self._pending.append(self._pool.submit(_compress_block, self.codec, self.level, block))
+        # Blocchi già pronti in testa: scritti subito (l'ordine resta quello dello stream)
+        while self._pending and (self._pending[0].done() or len(self._pending) > self._max_inflight):
+            self._emit_next()
+
+    def _emit_next(self):
+        """Attende il blocco in testa (ricontrollando l'annullamento) e lo scrive"""
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        future = self._pending[0]
+        started = time.perf_counter()
+        while True:
+            try:
+                compressed = future.result(timeout=ABORT_POLL_SECONDS)
+                break
+            except FutureTimeout:
+                if self.should_abort is not None and self.should_abort():
+                    raise ArchiveCancelled()
+        self.compress_seconds += time.perf_counter() - started
+        self._pending.popleft()
+        self._emit(compressed)
+
+    def close(self):
+        try:
+            if self._buffer:
+                block, self._buffer = bytes(self._buffer), bytearray()
+                self._submit(block)
+            while self._pending:
+                self._emit_next()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=not self._pending, cancel_futures=True)
+                self._pool = None
+
+    def abort(self):
+        """Annulla: blocchi in coda scartati, processi chiusi senza attendere"""
+        self._buffer = bytearray()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class ArchiveBuilder:
+    """Voci di un archivio scritto come stream (write = scrittura sul file destinazione)"""
+
+    def __init__(self, fmt: str, write: Callable[[bytes], None], workers: int = 1,
+                 level: Optional[int] = None, chunk_size: int = 1 * MB,
+                 should_abort: Optional[Callable[[], bool]] = None):
+        import tarfile
+        import zipfile
+
+        self.format = fmt
+        self.chunk_size = max(64 * 1024, int(chunk_size))
+        codec = _codec(fmt)
+        self._zip = None
+        self._tar = None
+        if codec == 'zip':
+            self._sink = _RawSink(write)
+            self._zip = zipfile.ZipFile(self._sink, 'w', compression=zipfile.ZIP_DEFLATED,
+                                        compresslevel=DEFAULT_LEVELS['zip'] if level is None else int(level))
+        else:
+            self._sink = (BlockCompressor(codec, write, workers, level, should_abort) if codec
+                          else _RawSink(write))
+            # Modalità 'w' (non 'w|'): il buffer dello stream di tarfile ricopia il resto a ogni
+            # blocco e a ogni intestazione; il sink scrive solo in avanti e serve solo tell()
+            self._tar = tarfile.TarFile(fileobj=self._sink, mode='w', format=tarfile.PAX_FORMAT,
+                                        copybufsize=self.chunk_size)
+
+    @property
+    def bytes_out(self) -> int:
+        return self._sink.bytes_out
+
+    @property
+    def compress_seconds(self) -> float:
+        return getattr(self._sink, 'compress_seconds', 0.0)
+
+    @property
+    def compress_blocks(self) -> int:
+        return getattr(self._sink, 'blocks', 0)
+
+    @staticmethod
+    def _tarinfo(arcname: str, st, kind: bytes) -> 'tarfile.TarInfo':
+        import tarfile
+
+        # Dallo stat già fatto (gettarinfo rileggerebbe utente/gruppo a ogni file)
+        info = tarfile.TarInfo(arcname)
+        info.type = kind
+        info.mode = stat.S_IMODE(st.st_mode)
+        info.mtime = int(st.st_mtime)
+        info.uid = getattr(st, 'st_uid', 0)
+        info.gid = getattr(st, 'st_gid', 0)
+        return info
+
+    @staticmethod
+    def _zipinfo(arcname: str, st) -> 'zipfile.ZipInfo':
+        import zipfile
+
+        # Lo zip non rappresenta date prima del 1980
+        date_time = time.localtime(max(st.st_mtime, 315532800))[:6]
+        info = zipfile.ZipInfo(arcname, date_time=date_time)
+        info.external_attr = (st.st_mode & 0xFFFF) << 16
+        info.file_size = st.st_size
+        return info
+
+    def add_file(self, arcname: str, st, reader):
+        """File regolare; reader.read(n) fornisce il contenuto (progresso/annulla a carico del chiamante)"""
+        import tarfile
+        import zipfile
+
+        if self._tar is not None:
+            info = self._tarinfo(arcname, st, tarfile.REGTYPE)
+            info.size = st.st_size
+            self._tar.addfile(info, reader)
+            return
+        info = self._zipinfo(arcname, st)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with self._zip.open(info, 'w', force_zip64=st.st_size >= zipfile.ZIP64_LIMIT) as out:
+            while True:
+                data = reader.read(self.chunk_size)
+                if not data:
+                    break
+                out.write(data)
+
+    def add_dir(self, arcname: str, st):
+        """Cartella (anche vuota): permessi e mtime vengono ripristinati all'estrazione"""
+        import tarfile
+        import zipfile
+
+        if self._tar is not None:
+            self._tar.addfile(self._tarinfo(arcname, st, tarfile.DIRTYPE))
+            return
+        # Zip: voce "nome/" vuota, tipo cartella nei permessi Unix e nell'attributo MS-DOS
+        info = self._zipinfo(arcname.rstrip('/') + '/', st)
+        info.file_size = 0
+        info.external_attr = ((stat.S_IFDIR | stat.S_IMODE(st.st_mode)) << 16) | 0x10
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, b'')
+
+    def add_symlink(self, arcname: str, st, target: str):
+        import tarfile
+        import zipfile
+
+        if self._tar is not None:
+            info = self._tarinfo(arcname, st, tarfile.SYMTYPE)
+            info.linkname = target
+            self._tar.addfile(info)
+            return
+        # Convenzione Info-ZIP: tipo link nei permessi Unix, bersaglio come contenuto
+        info = self._zipinfo(arcname, st)
+        info.external_attr = (stat.S_IFLNK | 0o777) << 16
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, target)
+
+    def add_special(self, arcname: str, st) -> bool:
+        """FIFO / device; False se il formato non li rappresenta (zip)"""
+        import tarfile
+
+        if self._tar is None:
+            return False
+        if stat.S_ISFIFO(st.st_mode):
+            kind = tarfile.FIFOTYPE
+        elif stat.S_ISCHR(st.st_mode):
+            kind = tarfile.CHRTYPE
+        elif stat.S_ISBLK(st.st_mode):
+            kind = tarfile.BLKTYPE
+        else:
+            return False
+        info = self._tarinfo(arcname, st, kind)
+        if kind != tarfile.FIFOTYPE:
+            info.devmajor, info.devminor = os.major(st.st_rdev), os.minor(st.st_rdev)
+        self._tar.addfile(info)
+        return True
+
+    def close(self):
+        """Chiude l'archivio (blocchi finali, directory centrale zip) e attende la compressione"""
+        if self._tar is not None:
+            self._tar.close()
+        else:
+            self._zip.close()
+        self._sink.close()
+
+    def abort(self):
+        self._sink.abort()
@@ -0,0 +1,175 @@
+"""
+Facciata asyncio per FileOperationEngine
+
+Permette di incorporare copia/spostamento in servizi asyncio senza thread ad-hoc:
+l'I/O resta nei thread dell'executor, il loop riceve eventi di progresso.
+
+Esempio:
+    mover = AsyncFileMover(buffer_size=64 * 1024 * 1024)
+    job = mover.submit('copy', 'D:/ingest/batch', 'E:/archive/batch')
+    async for event in job.events():
+        print(event['type'], event.get('percentage'))
+    ok = await job
+"""
+import asyncio
+import itertools
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Optional, Union
+
+from .file_operations import FileOperationEngine, OperationType
+
+
+class AsyncTransferJob:
+    """Handle di un job asincrono.
+
+    - `await job` ritorna True/False come FileOperationEngine.copy/move
+    - `job.events()` è un async iterator di eventi ('progress', 'error', 'info', 'complete')
+    - pause/resume/cancel agiscono sull'engine del job (thread-safe)
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, engine: FileOperationEngine, operation: OperationType,
+                 source: str, destination: str, loop: asyncio.AbstractEventLoop):
+        self.id = next(self._ids)
+        self.engine = engine
+        self.operation = operation
+        self.source = source
+        self.destination = destination
+        self._loop = loop
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._future: Optional[asyncio.Future] = None
+
+        # Coalescenza progress: il motore notifica a ogni chunk, il loop riceve
+        # al massimo un evento 'progress' in coda alla volta (l'ultimo valore vince)
+        self._progress_lock = threading.Lock()
+        self._latest_progress: Optional[dict] = None
+        self._progress_scheduled = False
+
+        engine.set_progress_callback(self._on_progress)
+        engine.set_error_callback(lambda message: self._post({'type': 'error', 'message': message}))
+        engine.set_info_callback(lambda message: self._post({'type': 'info', 'message': message}))
+
+    def _start(self, executor: Optional[Executor]):
+        if self.operation == OperationType.MOVE:
+            run = self.engine.move
+        elif self.operation == OperationType.ARCHIVE:
+            run = self.engine.archive
+        elif self.operation == OperationType.EXTRACT:
+            run = self.engine.extract
+        else:
+            run = self.engine.copy
+        self._future = self._loop.run_in_executor(executor, run, self.source, self.destination)
+        self._future.add_done_callback(self._on_done)
+
+    # --- Lato thread engine -------------------------------------------------
+
+    def _on_progress(self, progress_data: dict):
+        with self._progress_lock:
+            self._latest_progress = progress_data
+            if self._progress_scheduled:
+                return
+            self._progress_scheduled = True
+        self._loop.call_soon_threadsafe(self._flush_progress)
+
+    def _post(self, event: dict):
+        try:
+            self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+        except RuntimeError:
+            # Loop già chiuso: nessuno ascolta più gli eventi
+            pass
+
+    # --- Lato loop ----------------------------------------------------------
+
+    def _flush_progress(self):
+        with self._progress_lock:
+            data = self._latest_progress
+            self._latest_progress = None
+            self._progress_scheduled = False
+        if data is not None:
+            event = dict(data)
+            event['type'] = 'progress'
+            event['paused'] = self.engine.is_paused
+            self._events.put_nowait(event)
+
+    def _on_done(self, future: asyncio.Future):
+        self._flush_progress()
+        if future.cancelled():
+            success = False
+        elif future.exception() is not None:
+            success = False
+            self._events.put_nowait({'type': 'error', 'message': str(future.exception())})
+        else:
+            success = bool(future.result())
+        self._events.put_nowait({
+            'type': 'complete',
+            'success': success,
+            'cancelled': bool(self.engine.is_cancelled),
+        })
+
+    # --- API pubblica -------------------------------------------------------
+
+    def __await__(self):
+        return self._future.__await__()
+
+    @property
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def pause(self):
+        self.engine.pause()
+
+    def resume(self):
+        self.engine.resume()
+
+    def cancel(self):
+        self.engine.cancel()
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Eventi del job fino a 'complete' incluso (un solo consumatore per job)"""
+        while True:
+            event = await self._events.get()
+            yield event
+            if event.get('type') == 'complete':
+                return
+
+
+class AsyncFileMover:
+    """Sottomette job copy/move su un executor e restituisce handle awaitable"""
+
+    def __init__(self, executor: Optional[Executor] = None,
+                 engine_factory: Optional[Callable[[], FileOperationEngine]] = None,
+                 **engine_kwargs):
+        """
+        Args:
+            executor: Executor per l'I/O (None = executor di default del loop)
+            engine_factory: Crea l'engine di ogni job (default: FileOperationEngine(**engine_kwargs))
+            engine_kwargs: Parametri per FileOperationEngine (buffer_size, num_threads, ...)
+        """
+        self.executor = executor
+        if engine_factory is None:
+            engine_factory = lambda: FileOperationEngine(**engine_kwargs)
+        self.engine_factory = engine_factory
+
+    def submit(self, operation: Union[str, OperationType], source: str,
+               destination: str) -> AsyncTransferJob:
+        """Avvia un job nel loop corrente e ne ritorna l'handle (da chiamare dentro il loop)"""
+        if not isinstance(operation, OperationType):
+            operation = OperationType(str(operation).lower())
+        loop = asyncio.get_running_loop()
+        job = AsyncTransferJob(self.engine_factory(), operation, source, destination, loop)
+        job._start(self.executor)
+        return job
+
+    def copy(self, source: str, destination: str) -> AsyncTransferJob:
+        return self.submit(OperationType.COPY, source, destination)
+
+    def move(self, source: str, destination: str) -> AsyncTransferJob:
+        return self.submit(OperationType.MOVE, source, destination)
+
+    def archive(self, source: str, destination: str) -> AsyncTransferJob:
+        return self.submit(OperationType.ARCHIVE, source, destination)
+
+    def extract(self, source: str, destination: str) -> AsyncTransferJob:
+        return self.submit(OperationType.EXTRACT, source, destination)
@@ -0,0 +1,164 @@
+"""
+Auto-tuning runtime di chunk size e profondità in-flight
+
+Il controller misura il throughput a intervalli fissi e fa hill-climbing su una
+manopola alla volta (chunk: x2 / /2, in-flight: x2 / /2) restando nei limiti.
+Converge in pochi secondi e poi resta sul punto di lavoro scelto; se il throughput
+crolla in modo persistente (es. cambio di device o cache esaurita) riparte.
+
+La tabella StorageDetector.STORAGE_TYPES resta solo il punto di partenza.
+"""
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+class AdaptiveTuner:
+    """Hill-climbing su (chunk_size, inflight) guidato dal throughput misurato"""
+
+    MIN_CHUNK = 256 * 1024
+    MAX_CHUNK = 256 * 1024 * 1024
+    MAX_INFLIGHT_BYTES = 512 * 1024 * 1024  # chunk * inflight (memoria in volo)
+    INTERVAL = 0.5          # Secondi per misura
+    WARMUP_INTERVALS = 1    # Misure scartate all'avvio (cache, apertura file)
+    IMPROVEMENT = 0.05      # Miglioramento minimo per accettare un passo (rumore)
+    RESTART_DROP = 0.5      # Throughput < best * RESTART_DROP ...
+    RESTART_INTERVALS = 4   # ... per N misure consecutive: ricomincia il tuning
+
+    KNOBS = ('chunk', 'inflight')
+
+    def __init__(self, initial_chunk: int, max_inflight: int = 4,
+                 on_converged: Optional[Callable[[dict], None]] = None):
+        """
+        Args:
+            initial_chunk: Chunk iniziale in bytes (da profilo storage / buffer_size)
+            max_inflight: Limite superiore di chunk in volo (letture anticipate)
+            on_converged: Callback con il punto di lavoro scelto
+        """
+        self.max_inflight = max(1, int(max_inflight))
+        self.chunk_size = self._clamp_chunk(int(initial_chunk or self.MIN_CHUNK))
+        self.inflight = 1
+        self.on_converged = on_converged
+
+        self.converged = False
+        self.history: List[Tuple[int, int, float]] = []  # (chunk, inflight, bytes/s)
+        self._reset_search()
+
+    def _reset_search(self):
+        self._best: Optional[Tuple[float, int, int]] = None  # (throughput, chunk, inflight)
+        self._knob_index = 0
+        self._direction = 1
+        self._moved_in_knob = False
+        self._knobs_without_gain = 0
+        self._warmup = self.WARMUP_INTERVALS
+        self._drops = 0
+        self._bytes = 0
+        self._interval_start: Optional[float] = None
+
+    def _clamp_chunk(self, chunk: int) -> int:
+        return max(self.MIN_CHUNK, min(self.MAX_CHUNK, chunk))
+
+    # --- Misura -------------------------------------------------------------
+
+    def record(self, nbytes: int):
+        """Registra bytes scritti (chiamato dal loop di copia a ogni chunk)"""
+        now = time.monotonic()
+        if self._interval_start is None:
+            self._interval_start = now
+        self._bytes += nbytes
+        elapsed = now - self._interval_start
+        if elapsed >= self.INTERVAL:
+            throughput = self._bytes / elapsed
+            self._bytes = 0
+            self._interval_start = now
+            self._on_interval(throughput)
+
+    def operating_point(self) -> dict:
+        best = self._best
+        return {
+            'chunk_size': self.chunk_size,
+            'inflight': self.inflight,
+            'throughput': best[0] if best else 0.0,
+            'converged': self.converged,
+        }
+
+    # --- Controller ---------------------------------------------------------
+
+    def _on_interval(self, throughput: float):
+        if self._warmup > 0:
+            self._warmup -= 1
+            return
+
+        self.history.append((self.chunk_size, self.inflight, throughput))
+
+        if self.converged:
+            # Sorveglianza: riparte solo se il crollo è persistente
+            if self._best and throughput < self._best[0] * self.RESTART_DROP:
+                self._drops += 1
+                if self._drops >= self.RESTART_INTERVALS:
+                    self.converged = False
+                    self._reset_search()
+            else:
+                self._drops = 0
+            return
+
+        if self._best is None:
+            self._best = (throughput, self.chunk_size, self.inflight)
+            self._advance(improved=True)
+            return
+
+        if throughput > self._best[0] * (1 + self.IMPROVEMENT):
+            self._best = (throughput, self.chunk_size, self.inflight)
+            self._moved_in_knob = True
+            self._knobs_without_gain = 0
+            self._advance(improved=True)
+        else:
+            # Torna al punto migliore e prova altra direzione / altra manopola
+            _, self.chunk_size, self.inflight = self._best
+            self._advance(improved=False)
+
+    def _advance(self, improved: bool):
+        """Sceglie il prossimo punto da misurare (o dichiara convergenza)"""
+        while True:
+            if not improved:
+                if self._direction > 0 and not self._moved_in_knob:
+                    self._direction = -1
+                else:
+                    self._knobs_without_gain += 1
+                    if self._knobs_without_gain >= len(self.KNOBS):
+                        self._converge()
+                        return
+                    self._knob_index = (self._knob_index + 1) % len(self.KNOBS)
+                    self._direction = 1
+                    self._moved_in_knob = False
+
+            candidate = self._step(self._direction)
+            if candidate is not None:
+                self.chunk_size, self.inflight = candidate
+                return
+            improved = False
+
+    def _step(self, direction: int) -> Optional[Tuple[int, int]]:
+        _, chunk, inflight = self._best
+        if self.KNOBS[self._knob_index] == 'chunk':
+            new_chunk = self._clamp_chunk(chunk * 2 if direction > 0 else chunk // 2)
+            candidate = (new_chunk, inflight)
+        else:
+            new_inflight = inflight * 2 if direction > 0 else inflight // 2
+            new_inflight = max(1, min(self.max_inflight, new_inflight))
+            candidate = (chunk, new_inflight)
+
+        if candidate == (chunk, inflight):
+            return None
+        if candidate[0] * candidate[1] > self.MAX_INFLIGHT_BYTES:
+            return None
+        return candidate
+
+    def _converge(self):
+        _, self.chunk_size, self.inflight = self._best
+        self.converged = True
+        self._drops = 0
+        if self.on_converged:
+            try:
+                self.on_converged(self.operating_point())
+            except Exception:
+                pass
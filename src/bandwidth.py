@@ -0,0 +1,270 @@
+"""
+Limitazione banda (token bucket) per job e per device
+
+- TokenBucket: bucket a debito (consuma subito, poi dorme il tempo necessario),
+  preciso sul lungo periodo perché misura con time.monotonic()
+- BandwidthSchedule: fasce orarie che impostano i limiti automaticamente
+- BandwidthManager: limite per job (regolabile live) + limiti per device condivisi
+- TransferThrottle: oggetto usato dal loop di copia dell'engine
+
+Con i limiti disattivati l'engine non riceve nessun throttle (costo zero).
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .utils import get_device_key
+
+
+MB = 1024 * 1024
+
+
+class TokenBucket:
+    """Token bucket in bytes/s. rate <= 0 = illimitato."""
+
+    BURST_SECONDS = 0.1  # Credito massimo accumulabile dopo una pausa
+    MAX_SLEEP = 0.1      # Sonno massimo per giro (cambi di rate live / annullamento)
+
+    def __init__(self, rate: float = 0):
+        self._lock = threading.Lock()
+        self.rate = float(rate or 0)
+        self._tokens = 0.0
+        self._last: Optional[float] = None  # Nessun credito prima del primo consume
+
+    def set_rate(self, rate: float):
+        """Aggiorna il limite (live, anche con consumatori in attesa)"""
+        with self._lock:
+            self._refill()
+            self.rate = float(rate or 0)
+            if self.rate <= 0:
+                self._tokens = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = 0.0 if self._last is None else now - self._last
+        self._last = now
+        if self.rate > 0:
+            self._tokens = min(self._tokens + elapsed * self.rate, self.rate * self.BURST_SECONDS)
+
+    def consume(self, amount: int, should_abort: Optional[Callable[[], bool]] = None):
+        """Preleva amount bytes; blocca finché il debito non è ripagato"""
+        with self._lock:
+            if self.rate <= 0:
+                return
+            self._refill()
+            self._tokens -= amount
+
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    self._tokens = 0.0
+                    return
+                self._refill()
+                if self._tokens >= 0:
+                    return
+                wait = -self._tokens / self.rate
+            if should_abort is not None and should_abort():
+                return
+            time.sleep(min(wait, self.MAX_SLEEP))
+
+
+class BandwidthSchedule:
+    """Fasce orarie -> limite in bytes/s.
+
+    Regola: {'start': 'HH:MM', 'end': 'HH:MM', 'limit_mb': 20, 'days': [0..6], 'device': 'E:'}
+    - 'days' opzionale (0 = lunedì); 'device' opzionale (senza = limite per job)
+    - fasce che attraversano la mezzanotte (22:00-06:00) sono supportate
+    - limit_mb 0 = illimitato in quella fascia
+    """
+
+    def __init__(self, rules: Optional[List[dict]] = None):
+        self.rules = []
+        for rule in rules or []:
+            try:
+                self.rules.append({
+                    'start': self._parse_hhmm(rule.get('start', '00:00')),
+                    'end': self._parse_hhmm(rule.get('end', '24:00')),
+                    'limit': float(rule.get('limit_mb', 0) or 0) * MB,
+                    'days': set(int(d) for d in rule['days']) if rule.get('days') is not None else None,
+                    'device': str(rule['device']).upper() if rule.get('device') else None,
+                })
+            except Exception:
+                continue
+
+    @staticmethod
+    def _parse_hhmm(value: str) -> int:
+        hours, minutes = str(value).strip().split(':', 1)
+        return int(hours) * 60 + int(minutes)
+
+    def limits_at(self, when: Optional[datetime] = None) -> Dict[Optional[str], float]:
+        """Limiti attivi: {None: limite job, 'E:': limite device, ...} (prima regola vince)"""
+        when = when or datetime.now()
+        minute = when.hour * 60 + when.minute
+        weekday = when.weekday()
+        active: Dict[Optional[str], float] = {}
+        for rule in self.rules:
+            start, end = rule['start'], rule['end']
+            if start <= end:
+                inside = start <= minute < end
+                day = weekday
+            else:
+                inside = minute >= start or minute < end
+                # Dopo mezzanotte la fascia appartiene al giorno in cui è iniziata
+                day = weekday if minute >= start else (weekday - 1) % 7
+            if not inside or (rule['days'] is not None and day not in rule['days']):
+                continue
+            active.setdefault(rule['device'], rule['limit'])
+        return active
+
+
+class BandwidthManager:
+    """Limiti di banda condivisi tra i job di un processo"""
+
+    SCHEDULE_CHECK_INTERVAL = 30.0  # Secondi tra due valutazioni della schedule
+
+    def __init__(self, job_limit: float = 0, device_limits: Optional[Dict[str, float]] = None,
+                 schedule: Optional[BandwidthSchedule] = None):
+        """
+        Args:
+            job_limit: Limite per singolo job in bytes/s (0 = illimitato)
+            device_limits: {'E:': bytes/s} limiti condivisi da tutti i job sul device
+            schedule: Fasce orarie (si applicano se non c'è un limite manuale)
+        """
+        self._lock = threading.Lock()
+        self.job_limit = float(job_limit or 0)
+        self.device_limits = {str(k).upper(): float(v or 0) for k, v in (device_limits or {}).items()}
+        self.schedule = schedule if (schedule and schedule.rules) else None
+        self._device_buckets: Dict[str, TokenBucket] = {}
+        self._scheduled: Dict[Optional[str], float] = {}
+        self._schedule_checked = 0.0
+        self.generation = 0  # Incrementato a ogni cambio limiti (i throttle si risincronizzano)
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'BandwidthManager':
+        """Crea il manager dalle chiavi di config.json (valori in MB/s)"""
+        device_limits = {}
+        for device, limit_mb in (config.get('device_bandwidth_limits') or {}).items():
+            try:
+                device_limits[device] = float(limit_mb) * MB
+            except Exception:
+                continue
+        return cls(
+            job_limit=float(config.get('bandwidth_limit_mb', 0) or 0) * MB,
+            device_limits=device_limits,
+            schedule=BandwidthSchedule(config.get('bandwidth_schedule') or []),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """True se un limite può essere attivo (manuale, per device o da schedule)"""
+        return bool(self.job_limit > 0 or any(v > 0 for v in self.device_limits.values()) or self.schedule)
+
+    def set_job_limit(self, bytes_per_sec: float):
+        with self._lock:
+            self.job_limit = float(bytes_per_sec or 0)
+            self.generation += 1
+
+    def set_device_limit(self, device: str, bytes_per_sec: float):
+        with self._lock:
+            self.device_limits[str(device).upper()] = float(bytes_per_sec or 0)
+            self.generation += 1
+        self._sync_device_buckets()
+
+    def refresh_schedule(self, force: bool = False):
+        """Rivaluta la schedule (al massimo ogni SCHEDULE_CHECK_INTERVAL secondi)"""
+        if self.schedule is None:
+            return
+        now = time.monotonic()
+        if not force and (now - self._schedule_checked) < self.SCHEDULE_CHECK_INTERVAL:
+            return
+        self._schedule_checked = now
+        scheduled = self.schedule.limits_at()
+        with self._lock:
+            if scheduled != self._scheduled:
+                self._scheduled = scheduled
+                self.generation += 1
+        self._sync_device_buckets()
+
+    def effective_job_limit(self) -> float:
+        """Limite manuale se impostato, altrimenti quello della fascia oraria"""
+        if self.job_limit > 0:
+            return self.job_limit
+        return self._scheduled.get(None, 0.0)
+
+    def effective_device_limit(self, device: str) -> float:
+        limit = self.device_limits.get(device, 0.0)
+        if limit > 0:
+            return limit
+        return self._scheduled.get(device, 0.0)
+
+    def _device_bucket(self, device: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._device_buckets.get(device)
+            if bucket is None:
+                bucket = TokenBucket(0)
+                self._device_buckets[device] = bucket
+        bucket.set_rate(self.effective_device_limit(device))
+        return bucket
+
+    def _sync_device_buckets(self):
+        for device, bucket in list(self._device_buckets.items()):
+            bucket.set_rate(self.effective_device_limit(device))
+
+    def throttle_for(self, source: str, destination: str) -> Optional['TransferThrottle']:
+        """Throttle per un job source -> destination; None se nessun limite è configurato"""
+        if not self.enabled:
+            return None
+        self.refresh_schedule(force=True)
+        devices = []
+        for path in (source, destination):
+            try:
+                key = get_device_key(path)
+            except Exception:
+                continue
+            if key not in devices:
+                devices.append(key)
+        return TransferThrottle(self, [self._device_bucket(d) for d in devices])
+
+
+class TransferThrottle:
+    """Throttle di un job: bucket proprio (limite per job) + bucket condivisi dei device"""
+
+    SYNC_INTERVAL = 0.25  # Secondi tra due risincronizzazioni con il manager
+    CHUNK_SECONDS = 0.125  # Chunk massimo = rate * CHUNK_SECONDS (reattività e precisione)
+    MIN_CHUNK = 64 * 1024
+
+    def __init__(self, manager: BandwidthManager, device_buckets: List[TokenBucket]):
+        self._manager = manager
+        self._job_bucket = TokenBucket(manager.effective_job_limit())
+        self._device_buckets = device_buckets
+        self._generation = manager.generation
+        self._last_sync = time.monotonic()
+
+    def _sync(self):
+        now = time.monotonic()
+        if (now - self._last_sync) < self.SYNC_INTERVAL:
+            return
+        self._last_sync = now
+        manager = self._manager
+        manager.refresh_schedule()
+        if manager.generation != self._generation:
+            self._generation = manager.generation
+            self._job_bucket.set_rate(manager.effective_job_limit())
+
+    def _min_rate(self) -> float:
+        rates = [b.rate for b in [self._job_bucket] + self._device_buckets if b.rate > 0]
+        return min(rates) if rates else 0.0
+
+    def chunk_size(self, use_buffer: int) -> int:
+        """Riduce il chunk quando il limite è basso (un chunk ~ 1/8 di secondo)"""
+        rate = self._min_rate()
+        if rate <= 0:
+            return use_buffer
+        return max(self.MIN_CHUNK, min(use_buffer, int(rate * self.CHUNK_SECONDS)))
+
+    def consume(self, amount: int, should_abort: Optional[Callable[[], bool]] = None):
+        self._sync()
+        self._job_bucket.consume(amount, should_abort)
+        for bucket in self._device_buckets:
+            bucket.consume(amount, should_abort)
@@ -0,0 +1,585 @@
+"""
+Riga di comando headless per FileOperationEngine (niente Tk/customtkinter/PIL/psutil)
+
+    python -m src copy SORGENTE... DESTINAZIONE
+    python -m src move --json SORGENTE DESTINAZIONE
+    python -m src --jobs-file jobs.json
+    python -m src copy --daemon SORGENTE DESTINAZIONE   (job eseguito dal demone, vedi src/daemon.py)
+
+Pensata per attività pianificate e script di build: avvio rapido (engine e
+rilevamento storage importati solo quando servono), progresso JSON Lines su
+stdout con --json, codici di uscita stabili.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from .archive_writer import ARCHIVE_FORMATS, parse_archive_format
+from .metadata import parse_preserve
+from .transfer_plan import SYMLINK_POLICIES, format_entry_counts, parse_symlink_policy
+
+EXIT_OK = 0
+EXIT_FAILED = 1        # almeno un job non riuscito
+EXIT_USAGE = 2         # argomenti o file job non validi
+EXIT_UNAVAILABLE = 3   # --daemon: demone non in esecuzione o non raggiungibile
+EXIT_INTERRUPTED = 130  # Ctrl+C (job corrente annullato, file già completi restano validi)
+
+MB = 1024 * 1024
+DEFAULT_BUFFER_MB = 100
+DEFAULT_THREADS = 4
+OPERATIONS = ('copy', 'move', 'archive', 'extract')
+SPECIAL_FILE_POLICIES = ('skip', 'recreate')
+
+
+def _archive_format_arg(value: str) -> str:
+    try:
+        return parse_archive_format(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _preserve_arg(value: str) -> list:
+    try:
+        return sorted(parse_preserve(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m src',
+        description='Advanced File Mover - copia/spostamento/archiviazione/estrazione senza interfaccia grafica',
+        epilog='Codici di uscita: 0 ok, 1 job non riuscito, 2 uso errato, 3 demone non raggiungibile, '
+               '130 interrotto',
+    )
+    parser.add_argument('operation', nargs='?', choices=OPERATIONS, help='Operazione (omessa con --jobs-file)')
+    parser.add_argument('paths', nargs='*', metavar='PATH', help='Sorgenti seguite dalla destinazione')
+    parser.add_argument('--jobs-file', metavar='FILE',
+                        help='Job in batch: array JSON o JSON Lines ("-" = stdin)')
+    parser.add_argument('--json', action='store_true', help='Eventi e progresso JSON Lines su stdout')
+    parser.add_argument('--progress-interval', type=float, default=0.5, metavar='SEC',
+                        help='Secondi tra due eventi di progresso (default 0.5)')
+    parser.add_argument('--buffer-mb', type=int, metavar='MB', help='Buffer in MB (default: profilo storage)')
+    parser.add_argument('--threads', type=int, metavar='N', help='Thread (default: profilo storage)')
+    parser.add_argument('--profile', choices=('auto', 'probe', 'off'), default='auto',
+                        help='Profilo storage: auto = misura in cache o tabella, probe = misura ora se manca, '
+                             'off = valori di default')
+    parser.add_argument('--no-auto-tune', action='store_true', help='Disattiva l\'auto-tuning a runtime')
+    parser.add_argument('--limit-mb', type=float, default=0, metavar='MB/S', help='Limite di banda per job')
+    parser.add_argument('--preserve', type=_preserve_arg, metavar='LIST',
+                        help='Metadati da conservare: times,mode,xattrs, all o none (default: times,mode)')
+    parser.add_argument('--symlinks', choices=SYMLINK_POLICIES,
+                        help='Link nelle cartelle: preserve = ricrea il link, follow = copia il contenuto '
+                             '(cicli evitati), skip = ignora (default: preserve)')
+    parser.add_argument('--special-files', choices=SPECIAL_FILE_POLICIES,
+                        help='FIFO/socket/device nelle cartelle: skip o recreate (default: skip)')
+    parser.add_argument('--format', dest='archive_format', type=_archive_format_arg, metavar='FMT',
+                        help=f"Formato di archive: {', '.join(ARCHIVE_FORMATS)} (default: tar.gz; "
+                             f"tar.zst con Python 3.14+)")
+    parser.add_argument('--stats', action='store_true', help='Statistiche per fase a fine job')
+    parser.add_argument('--trace', metavar='FILE', help='Timeline Chrome Trace (Perfetto) dei trasferimenti')
+    parser.add_argument('--stop-on-error', action='store_true', help='Interrompe il batch al primo job non riuscito')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Solo errori (senza --json)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Sottomette i job al demone in background (python -m src.daemon serve)')
+    parser.add_argument('--detach', action='store_true', help='Con --daemon: non attende la fine dei job')
+    return parser
+
+
+# --- Job ---------------------------------------------------------------------
+
+def _normalize_job(item, where: str) -> dict:
+    if not isinstance(item, dict):
+        raise ValueError(f"{where}: atteso un oggetto JSON")
+    operation = str(item.get('operation', 'copy')).lower()
+    if operation not in OPERATIONS:
+        raise ValueError(f"{where}: operazione non valida: {operation}")
+    sources = item.get('sources')
+    if sources is None and item.get('source') is not None:
+        sources = [item['source']]
+    if isinstance(sources, str):
+        sources = [sources]
+    if not sources or not all(isinstance(s, str) and s for s in sources):
+        raise ValueError(f"{where}: 'sources' mancante o non valido")
+    destination = item.get('destination')
+    if not isinstance(destination, str) or not destination:
+        raise ValueError(f"{where}: 'destination' mancante")
+
+    job = {'operation': operation, 'sources': list(sources), 'destination': destination}
+    for key in ('buffer_mb', 'threads', 'limit_mb'):
+        if item.get(key) is not None:
+            try:
+                job[key] = float(item[key]) if key == 'limit_mb' else int(item[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"{where}: '{key}' non numerico")
+    if item.get('preserve') is not None:
+        try:
+            job['preserve'] = sorted(parse_preserve(item['preserve']))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{where}: 'preserve' non valido ({e})")
+    if item.get('symlinks') is not None:
+        try:
+            job['symlinks'] = parse_symlink_policy(item['symlinks'])
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}")
+    if item.get('special_files') is not None:
+        special = str(item['special_files']).lower()
+        if special not in SPECIAL_FILE_POLICIES:
+            raise ValueError(f"{where}: 'special_files' non valido: {special} (ammessi: skip, recreate)")
+        job['special_files'] = special
+    if item.get('archive_format') is not None:
+        try:
+            job['archive_format'] = parse_archive_format(item['archive_format'])
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}")
+    return job
+
+
+def load_jobs_file(path: str) -> list:
+    """Job da file: array JSON, {"jobs": [...]}, un singolo oggetto o JSON Lines"""
+    if path == '-':
+        text = sys.stdin.read()
+    else:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+        items = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                items.append((f"{path}:{number}", json.loads(line)))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: JSON non valido ({e.msg})")
+    if data is not None:
+        if isinstance(data, dict):
+            data = data['jobs'] if isinstance(data.get('jobs'), list) else [data]
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: atteso un array di job")
+        items = [(f"{path}[{i}]", item) for i, item in enumerate(data)]
+
+    jobs = [_normalize_job(item, where) for where, item in items]
+    if not jobs:
+        raise ValueError(f"{path}: nessun job")
+    return jobs
+
+
+# --- Output ------------------------------------------------------------------
+
+class _Reporter:
+    """Eventi su stdout (JSON Lines) oppure testo su stderr"""
+
+    def __init__(self, json_mode: bool, quiet: bool):
+        self.json_mode = json_mode
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._live_line = False
+        self._tty = sys.stderr.isatty()
+
+    def event(self, kind: str, **fields):
+        if self.json_mode:
+            record = {'event': kind, 'ts': time.time()}
+            record.update(fields)
+            line = json.dumps(record, ensure_ascii=False)
+            with self._lock:
+                sys.stdout.write(line + "\n")
+                sys.stdout.flush()
+            return
+
+        if kind == 'progress':
+            if self.quiet or not self._tty:
+                return
+            eta = f"  ETA {_fmt_duration(fields['eta'])}" if fields.get('eta') is not None else ""
+            text = (f"\r{fields['percent']:5.1f}%  {_fmt_bytes(fields['bytes'])}/{_fmt_bytes(fields['total_bytes'])}"
+                    f"  {_fmt_bytes(fields['speed'])}/s  {fields['file_index']}/{fields['file_count']}{eta}"
+                    f"  {fields['current_file'][:40]}")
+            with self._lock:
+                sys.stderr.write(text.ljust(100))
+                sys.stderr.flush()
+                self._live_line = True
+            return
+
+        if self.quiet and kind != 'error':
+            return
+        if kind == 'job_start':
+            text = (f"▶ [{fields['job']}] {fields['operation']} {', '.join(fields['sources'])} → {fields['destination']}"
+                    f" (buffer {fields['buffer_mb']} MB, {fields['threads']} thread, {fields['storage']})")
+        elif kind == 'job_end':
+            mark = '✅' if fields['success'] else '❌'
+            text = (f"{mark} [{fields['job']}] {_fmt_bytes(fields['bytes'])}, {fields['files']} file"
+                    f" in {fields['elapsed']:.2f}s")
+        elif kind == 'job_submitted':
+            text = (f"⇢ [{fields['job']}] {fields['operation']} {', '.join(fields['sources'])} → {fields['destination']}"
+                    f" (demone: job {', '.join(str(i) for i in fields['daemon_jobs'])})")
+        elif kind == 'plan':
+            counts = format_entry_counts(fields)
+            text = (f"📋 [{fields['job']}] {fields['files']} file, {_fmt_bytes(fields['bytes'])}"
+                    f" da {fields['sources']} sorgenti{f' ({counts})' if counts else ''}"
+                    f" (scansione {fields['scan_seconds']:.2f}s)")
+        elif kind == 'summary':
+            text = f"{fields['succeeded']}/{fields['jobs']} job completati in {fields['elapsed']:.2f}s"
+        else:
+            text = fields.get('message', '')
+        with self._lock:
+            if self._live_line:
+                sys.stderr.write("\n")
+                self._live_line = False
+            sys.stderr.write(text + "\n")
+            sys.stderr.flush()
+
+
+def _fmt_bytes(value) -> str:
+    value = float(value or 0)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def _fmt_duration(seconds) -> str:
+    minutes, secs = divmod(int(seconds or 0), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+# --- Esecuzione --------------------------------------------------------------
+
+def resolve_parameters(job: dict, args) -> dict:
+    """Buffer/thread: valore del job > opzione CLI > profilo storage della destinazione > default"""
+    profile = None
+    if args.profile != 'off' and (job.get('buffer_mb') is None or job.get('threads') is None) \
+            and (args.buffer_mb is None or args.threads is None):
+        profile = storage_profile(job['destination'], probe=args.profile == 'probe')
+
+    def pick(key, cli_value, default):
+        if job.get(key) is not None:
+            return job[key]
+        if cli_value is not None:
+            return cli_value
+        if profile is not None:
+            return profile[key]
+        return default
+
+    return {
+        'buffer_mb': max(1, int(pick('buffer_mb', args.buffer_mb, DEFAULT_BUFFER_MB))),
+        'threads': max(1, int(pick('threads', args.threads, DEFAULT_THREADS))),
+        'storage': profile['name'] if profile else 'default',
+    }
+
+
+def storage_profile(path: str, probe: bool = False, ramdrive_manager=None) -> dict:
+    """Profilo del volume di path: misura (StorageProbe) se disponibile, altrimenti tabella"""
+    from .storage_detector import StorageDetector
+
+    existing = os.path.abspath(path)
+    while not os.path.isdir(existing) and os.path.dirname(existing) != existing:
+        existing = os.path.dirname(existing)
+
+    if ramdrive_manager is None:
+        from .ramdrive_handler import RamDriveManager
+        ramdrive_manager = RamDriveManager()
+    detector = StorageDetector()
+    if probe:
+        from .storage_probe import get_storage_probe
+        get_storage_probe().probe(existing)
+    # Misura: buffer e thread; la classe (USB/NAS) resta quella del collegamento
+    measured = detector.get_measured_profile(existing, ramdrive_manager.get_cached_storage_type(existing))
+    if measured:
+        return measured
+    return StorageDetector.profile_for(ramdrive_manager.get_storage_type(existing))
+
+
+def _run_in_thread(engine, target, reporter: _Reporter, job_id: int, interval: float, offset: list, eta=None):
+    """Esegue target su un thread; il main thread campiona il progresso e gestisce Ctrl+C"""
+    result = {}
+
+    def _worker():
+        try:
+            result['ok'] = target()
+        except Exception as e:
+            reporter.event('error', job=job_id, message=f"{type(e).__name__}: {e}")
+            result['ok'] = False
+
+    worker = threading.Thread(target=_worker, name='afm-cli-job', daemon=True)
+    worker.start()
+    last_time, last_bytes = time.monotonic(), 0
+    speed = 0.0
+    try:
+        while True:
+            worker.join(interval)
+            now = time.monotonic()
+            processed = int(engine.processed_size or 0)
+            if now - last_time > 0:
+                speed = max(0.0, (processed - last_bytes) / (now - last_time))
+            last_time, last_bytes = now, processed
+            if not worker.is_alive():
+                break
+            # offset = [byte e file delle sorgenti precedenti, byte e file del piano]: valori sull'intero job
+            done, total, done_files, total_files = offset
+            total = max(int(total), done + int(engine.total_size or 0))
+            estimate = None
+            if eta is not None:
+                files = done_files + int(engine.file_index or 0)
+                eta.update(done + processed, files, paused=engine.is_paused)
+                estimate = eta.estimate(total - done - processed, max(0, int(total_files) - files))
+            reporter.event(
+                'progress',
+                job=job_id,
+                current_file=engine.current_file,
+                file_index=int(engine.file_index),
+                file_count=int(engine.file_count),
+                bytes=done + processed,
+                total_bytes=total,
+                percent=((done + processed) / total * 100) if total else 0.0,
+                speed=speed,
+                eta=estimate[0] if estimate else None,
+                eta_range=[estimate[1], estimate[2]] if estimate else None,
+                paused=engine.is_paused,
+            )
+    except KeyboardInterrupt:
+        engine.cancel()
+        worker.join()
+        raise
+    return bool(result.get('ok'))
+
+
+def _item_destination(source: str, destination: str) -> str:
+    """Cartella sorgente copiata DENTRO la destinazione (dest/NomeCartella), come la GUI"""
+    if os.path.isdir(source):
+        return os.path.join(destination, os.path.basename(os.path.normpath(source)))
+    return destination
+
+
+def run_job(engine, job: dict, job_id: int, args, reporter: _Reporter) -> bool:
+    params = resolve_parameters(job, args)
+    engine.buffer_size = params['buffer_mb'] * MB
+    engine.num_threads = params['threads']
+    engine.preserve = parse_preserve(job.get('preserve', args.preserve))
+    engine.symlinks = parse_symlink_policy(job.get('symlinks', args.symlinks))
+    engine.skip_special = (job.get('special_files', args.special_files) or 'skip') == 'skip'
+    engine.archive_format = parse_archive_format(job.get('archive_format', args.archive_format))
+
+    limit_mb = job.get('limit_mb', args.limit_mb) or 0
+    bandwidth = None
+    if limit_mb > 0:
+        from .bandwidth import BandwidthManager
+        bandwidth = BandwidthManager(job_limit=limit_mb * MB)
+
+    sources = job['sources']
+    destination = job['destination']
+    reporter.event('job_start', job=job_id, operation=job['operation'], sources=sources,
+                   destination=destination, **params)
+
+    started = time.monotonic()
+    processed = 0
+    files = 0
+    errors = 0
+    success = True
+    # L'engine crea uno stats per sorgente: quelle del job vengono sommate qui
+    job_stats = None
+    if engine.collect_stats:
+        from .transfer_stats import TransferStats
+        job_stats = TransferStats()
+    try:
+        # Più sorgenti (o "dest/"): la destinazione è una cartella, come cp
+        if len(sources) > 1 or destination.endswith(('/', '\\')):
+            os.makedirs(destination, exist_ok=True)
+
+        # Scansione unica (concorrente per device) e selezioni sovrapposte scartate
+        from .transfer_plan import build_transfer_plan
+        plan = build_transfer_plan(sources, lambda source: _item_destination(source, destination),
+                                   symlinks=engine.symlinks, skip_special=engine.skip_special)
+        for skipped, container in plan.skipped:
+            where = "duplicata" if skipped == container else f"già inclusa in {container}"
+            reporter.event('info', job=job_id, message=f"Selezione {where}, ignorata: {skipped}")
+        for item in plan.items:
+            # Sorgenti inesistenti: l'errore arriva dall'engine al momento della copia
+            if item.complete:
+                for error in item.errors:
+                    reporter.event('error', job=job_id, message=error)
+        reporter.event('plan', job=job_id, **plan.summary())
+
+        # Stima ETA (a·MB + b·file) che parte dai job precedenti sulla stessa coppia di volumi
+        from .eta_estimator import EtaEstimator, get_eta_history
+        history = get_eta_history()
+        eta = EtaEstimator(prior=history.prior(plan.sources[0], destination)) if plan.items else None
+
+        offset = [0, plan.total_size, 0, plan.file_count]
+        for scan in plan.items:
+            source, item_destination = scan.source, scan.destination
+            engine.reset_progress()
+            engine.throttle = bandwidth.throttle_for(source, item_destination) if bandwidth else None
+
+            operation = {'copy': engine.copy, 'move': engine.move, 'archive': engine.archive,
+                         'extract': engine.extract}[job['operation']]
+            ok = _run_in_thread(engine, lambda: operation(source, item_destination, scan=scan), reporter, job_id,
+                                max(0.05, args.progress_interval), offset, eta)
+            processed += int(engine.processed_size or 0)
+            files += int(engine.file_index or 0)
+            errors += int(engine.error_count or 0)
+            offset[0] += int(engine.processed_size or 0)
+            offset[2] += int(engine.file_index or 0)
+            if job_stats is not None and engine.stats is not None:
+                job_stats.merge(engine.stats)
+            if not ok:
+                success = False
+                break
+        if success and eta is not None:
+            history.record(plan.sources[0], destination, eta, time.monotonic() - started)
+    except OSError as e:
+        reporter.event('error', job=job_id, message=f"{destination}: {e.strerror or e}")
+        success = False
+    finally:
+        end = {'job': job_id, 'success': success, 'bytes': processed, 'files': files, 'errors': errors,
+               'elapsed': time.monotonic() - started}
+        if args.json and job_stats is not None:
+            job_stats.finish()
+            end['stats'] = job_stats.snapshot()
+        reporter.event('job_end', **end)
+    return success
+
+
+def run_via_daemon(jobs: list, args, reporter: _Reporter) -> int:
+    """Client leggero: sottomette i job al demone e ne segue il progresso (Ctrl+C li annulla)"""
+    from .daemon import DaemonClient, DaemonError
+
+    client = DaemonClient.discover()
+    if client is None:
+        reporter.event('error', message='Demone non in esecuzione (python -m src.daemon serve)')
+        return EXIT_UNAVAILABLE
+
+    started = time.monotonic()
+    submitted = []  # (id job CLI, id job demone)
+    exit_code = EXIT_OK
+    try:
+        for job_id, job in enumerate(jobs, start=1):
+            remote = client.submit(
+                job['operation'], job['sources'], job['destination'],
+                buffer_mb=job.get('buffer_mb', args.buffer_mb),
+                threads=job.get('threads', args.threads),
+                limit_mb=job.get('limit_mb', args.limit_mb) or None,
+                preserve=job.get('preserve', args.preserve),
+                symlinks=job.get('symlinks', args.symlinks),
+                special_files=job.get('special_files', args.special_files),
+                archive_format=job.get('archive_format', args.archive_format),
+            )
+            submitted.extend((job_id, item['id']) for item in remote)
+            reporter.event('job_submitted', job=job_id, daemon_jobs=[item['id'] for item in remote],
+                           operation=job['operation'], sources=job['sources'], destination=job['destination'])
+        if args.detach:
+            return EXIT_OK
+
+        pending = dict((remote_id, job_id) for job_id, remote_id in submitted)
+        failed_jobs = set()
+        while pending:
+            time.sleep(max(0.05, args.progress_interval))
+            for remote_id, job_id in list(pending.items()):
+                state = client.job(remote_id)
+                progress = state.get('progress') or {}
+                if state['state'] in ('done', 'failed', 'cancelled'):
+                    del pending[remote_id]
+                    success = bool(state['result'])
+                    if not success:
+                        failed_jobs.add(job_id)
+                        if state.get('last_error'):
+                            reporter.event('error', job=job_id, message=state['last_error'])
+                    reporter.event('job_end', job=job_id, daemon_job=remote_id, success=success,
+                                   bytes=int(progress.get('processed_size', 0)),
+                                   files=int(progress.get('file_index', 0)),
+                                   elapsed=(state['finished_at'] or 0) - (state['started_at'] or state['finished_at'] or 0))
+                elif state['state'] == 'running' and progress:
+                    reporter.event(
+                        'progress', job=job_id, daemon_job=remote_id,
+                        current_file=progress.get('current_file', ''),
+                        file_index=int(progress.get('file_index', 0)),
+                        file_count=int(progress.get('file_count', 0)),
+                        bytes=int(progress.get('processed_size', 0)),
+                        total_bytes=int(progress.get('total_size', 0)),
+                        percent=float(progress.get('percentage', 0.0)),
+                        speed=float(progress.get('speed', 0.0)),
+                        paused=bool(state.get('paused')),
+                    )
+        if failed_jobs:
+            exit_code = EXIT_FAILED
+        reporter.event('summary', jobs=len(jobs), succeeded=len(jobs) - len(failed_jobs),
+                       elapsed=time.monotonic() - started, exit_code=exit_code)
+        return exit_code
+    except DaemonError as e:
+        reporter.event('error', message=str(e))
+        return EXIT_UNAVAILABLE if e.status == 0 else EXIT_FAILED
+    except KeyboardInterrupt:
+        reporter.event('error', message='Interrotto dall\'utente: job del demone annullati')
+        for _, remote_id in submitted:
+            try:
+                client.cancel(remote_id)
+            except DaemonError:
+                pass
+        return EXIT_INTERRUPTED
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    # Opzioni anche tra operazione e percorsi (python -m src copy --json A B)
+    args = parser.parse_intermixed_args(argv)
+
+    if args.jobs_file:
+        if args.operation or args.paths:
+            parser.error('--jobs-file non si combina con operazione/percorsi')
+        try:
+            jobs = load_jobs_file(args.jobs_file)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"{parser.prog}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    else:
+        if not args.operation or len(args.paths) < 2:
+            parser.error('servono operazione, almeno una sorgente e la destinazione (oppure --jobs-file)')
+        jobs = [{'operation': args.operation, 'sources': args.paths[:-1], 'destination': args.paths[-1]}]
+
+    reporter = _Reporter(args.json, args.quiet)
+    if args.daemon:
+        return run_via_daemon(jobs, args, reporter)
+    if args.detach:
+        parser.error('--detach richiede --daemon')
+
+    from .file_operations import FileOperationEngine
+    engine = FileOperationEngine(
+        buffer_size=(args.buffer_mb or DEFAULT_BUFFER_MB) * MB,
+        use_ramdrive=False,
+        ramdrive_letter=None,
+        num_threads=args.threads or DEFAULT_THREADS,
+        auto_tune=not args.no_auto_tune,
+        collect_stats=args.stats,
+    )
+    engine.set_info_callback(lambda message: reporter.event('info', message=message))
+    engine.set_error_callback(lambda message: reporter.event('error', message=message))
+    if args.trace:
+        from .trace_recorder import TraceRecorder
+        engine.trace = TraceRecorder(output_path=args.trace)
+
+    started = time.monotonic()
+    succeeded = 0
+    exit_code = EXIT_OK
+    try:
+        for job_id, job in enumerate(jobs, start=1):
+            if run_job(engine, job, job_id, args, reporter):
+                succeeded += 1
+            else:
+                exit_code = EXIT_FAILED
+                if args.stop_on_error:
+                    break
+    except KeyboardInterrupt:
+        exit_code = EXIT_INTERRUPTED
+        reporter.event('error', message='Interrotto dall\'utente')
+
+    reporter.event('summary', jobs=len(jobs), succeeded=succeeded, elapsed=time.monotonic() - started,
+                   exit_code=exit_code)
+    return exit_code
@@ -0,0 +1,492 @@
+"""
+Demone di trasferimento in background con API locale (HTTP JSON su loopback)
+
+Un solo processo tiene calde le cache di rilevamento storage e i profili misurati
+e gestisce un unico JobScheduler (limiti di stream per device) condiviso da tutti
+i trasferimenti della macchina; la CLI (python -m src --daemon) e gli script sono
+client leggeri.
+
+    python -m src.daemon serve [--port N] [--limit-mb MB/S] [--metrics-jsonl FILE]
+    python -m src.daemon status | jobs | cancel ID | pause ID | resume ID | forget | stop [--cancel]
+
+API (header "Authorization: Bearer <token>"):
+    GET  /v1/status                  pid, uptime, job in coda / in corso
+    GET  /v1/jobs                    tutti i job
+    GET  /v1/jobs/<id>               un job
+    POST /v1/jobs                    {"operation", "sources" | "source", "destination",
+                                      "priority", "buffer_mb", "threads", "limit_mb", "preserve",
+                                      "symlinks", "special_files", "archive_format"}
+    POST /v1/jobs/<id>/cancel        (anche pause / resume)
+    POST /v1/jobs/forget             rimuove i job terminati
+    POST /v1/shutdown                {"cancel": true} annulla i job, altrimenti li completa
+
+Ascolta solo su 127.0.0.1; porta e token (casuale a ogni avvio) stanno in
+%LOCALAPPDATA%/AdvancedFileMover/daemon.json, leggibile solo dall'utente.
+"""
+import argparse
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+STATE_FILE = 'daemon.json'
+DEFAULT_HOST = '127.0.0.1'
+MAX_BODY = 1024 * 1024
+MB = 1024 * 1024
+
+
+def _data_dir() -> Path:
+    """Cartella dati utente (stessa di config.json / .storage_cache.json)"""
+    try:
+        local_appdata = Path(os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local')))
+    except Exception:
+        local_appdata = Path.home() / 'AppData' / 'Local'
+    return local_appdata / 'AdvancedFileMover'
+
+
+def state_path() -> Path:
+    return _data_dir() / STATE_FILE
+
+
+class DaemonError(Exception):
+    """Errore dell'API del demone (status HTTP 0 = demone non raggiungibile)"""
+
+    def __init__(self, message: str, status: int = 0):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Server ------------------------------------------------------------------
+
+class TransferDaemon:
+    """JobScheduler condiviso esposto via HTTP su loopback"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = 0, limit_mb: float = 0,
+                 auto_tune: bool = True, collect_stats: bool = False,
+                 metrics_jsonl: Optional[str] = None, metrics_prom: Optional[str] = None):
+        from .file_operations import FileOperationEngine
+        from .job_scheduler import JobScheduler
+        from .ramdrive_handler import RamDriveManager
+
+        self.auto_tune = auto_tune
+        self.collect_stats = collect_stats
+        self.started_at = time.time()
+        self.token = secrets.token_urlsafe(32)
+
+        # Stato caldo condiviso da tutti i job
+        self.ramdrive_manager = RamDriveManager()
+        self._profiles = {}  # device -> profilo storage (buffer/thread)
+        self._profiles_lock = threading.Lock()
+
+        bandwidth = None
+        if limit_mb and limit_mb > 0:
+            from .bandwidth import BandwidthManager
+            bandwidth = BandwidthManager(job_limit=limit_mb * MB)
+
+        metrics = None
+        if metrics_jsonl or metrics_prom:
+            from .metrics_export import MetricsExporter
+            metrics = MetricsExporter(jsonl_path=metrics_jsonl, prom_path=metrics_prom,
+                                      storage_type_resolver=self.ramdrive_manager.get_storage_type)
+
+        self._engine_class = FileOperationEngine
+        self.scheduler = JobScheduler(
+            ramdrive_manager=self.ramdrive_manager,
+            engine_factory=self._create_engine,
+            bandwidth_manager=bandwidth,
+            metrics_exporter=metrics,
+        )
+        self.scheduler.configure_engine = self._configure_engine
+
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.transfer_daemon = self
+        self._cancel_on_shutdown = False
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    # --- Engine -------------------------------------------------------------
+
+    def _create_engine(self):
+        from .cli import DEFAULT_BUFFER_MB, DEFAULT_THREADS
+        return self._engine_class(
+            buffer_size=DEFAULT_BUFFER_MB * MB,
+            use_ramdrive=False,
+            ramdrive_letter=None,
+            num_threads=DEFAULT_THREADS,
+            auto_tune=self.auto_tune,
+            collect_stats=self.collect_stats,
+        )
+
+    def _profile_for(self, path: str) -> dict:
+        """Profilo storage della destinazione, calcolato una volta per device"""
+        from .cli import storage_profile
+        from .utils import get_device_key
+
+        key = get_device_key(path)
+        with self._profiles_lock:
+            profile = self._profiles.get(key)
+        if profile is None:
+            profile = storage_profile(path, ramdrive_manager=self.ramdrive_manager)
+            with self._profiles_lock:
+                self._profiles[key] = profile
+        return profile
+
+    def _configure_engine(self, job, engine):
+        options = job.options
+        profile = None
+        if options.get('buffer_mb') is None or options.get('threads') is None:
+            profile = self._profile_for(job.destination)
+        engine.buffer_size = max(1, int(options.get('buffer_mb') or profile['buffer_mb'])) * MB
+        engine.num_threads = max(1, int(options.get('threads') or profile['threads']))
+
+        # Limite del job: sostituisce quello globale del demone per questo trasferimento
+        limit_mb = options.get('limit_mb') or 0
+        if limit_mb > 0:
+            from .bandwidth import BandwidthManager
+            engine.throttle = BandwidthManager(job_limit=limit_mb * MB).throttle_for(job.source, job.destination)
+        if options.get('preserve') is not None:
+            engine.preserve = frozenset(options['preserve'])
+        if options.get('symlinks') is not None:
+            engine.symlinks = options['symlinks']
+        if options.get('special_files') is not None:
+            engine.skip_special = options['special_files'] == 'skip'
+        if options.get('archive_format') is not None:
+            engine.archive_format = options['archive_format']
+
+    # --- Operazioni API -----------------------------------------------------
+
+    def status(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'url': self.url,
+            'started_at': self.started_at,
+            'uptime': time.time() - self.started_at,
+            'queued': self.scheduler.queue_depth(),
+            'running': self.scheduler.running_count(),
+            'jobs': len(self.scheduler.jobs()),
+        }
+
+    def submit(self, request: dict) -> list:
+        """Una richiesta (anche con più sorgenti) -> un job dello scheduler per sorgente"""
+        from .cli import _item_destination, _normalize_job
+        from .transfer_plan import dedupe_sources
+
+        job = _normalize_job(request, 'richiesta')
+        paths = job['sources'] + [job['destination']]
+        relative = [p for p in paths if not os.path.isabs(p)]
+        if relative:
+            raise ValueError(f"servono percorsi assoluti: {', '.join(relative)}")
+        try:
+            priority = int(request.get('priority', 0) or 0)
+        except (TypeError, ValueError):
+            raise ValueError("'priority' non numerico")
+        options = {key: job[key] for key in ('buffer_mb', 'threads', 'limit_mb', 'preserve', 'symlinks',
+                                             'special_files', 'archive_format') if key in job}
+
+        sources, _ = dedupe_sources(job['sources'])  # selezioni sovrapposte: una sola copia
+        destination = job['destination']
+        # Stesse regole della CLI: più sorgenti (o "dest/") = cartella; cartelle copiate dentro
+        if len(sources) > 1 or destination.endswith(('/', '\\')):
+            os.makedirs(destination, exist_ok=True)
+        submitted = []
+        for source in sources:
+            submitted.append(self.scheduler.submit(job['operation'], source, _item_destination(source, destination),
+                                                   priority=priority, options=options))
+        return submitted
+
+    def handle(self, method: str, path: str, body: dict):
+        """Instrada una richiesta API; ritorna (status HTTP, payload JSON)"""
+        parts = [p for p in path.split('?', 1)[0].split('/') if p]
+        if parts[:1] != ['v1']:
+            return 404, {'error': 'risorsa non trovata'}
+        parts = parts[1:]
+
+        if parts == ['status'] and method == 'GET':
+            return 200, self.status()
+        if parts == ['jobs'] and method == 'GET':
+            return 200, {'jobs': [job.to_dict() for job in self.scheduler.jobs()]}
+        if parts == ['jobs'] and method == 'POST':
+            return 201, {'jobs': [job.to_dict() for job in self.submit(body)]}
+        if parts == ['jobs', 'forget'] and method == 'POST':
+            self.scheduler.forget_finished()
+            return 200, {'ok': True}
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[1].isdigit():
+            job = self.scheduler.get(int(parts[1]))
+            if job is None:
+                return 404, {'error': f"job {parts[1]} inesistente"}
+            if len(parts) == 2 and method == 'GET':
+                return 200, job.to_dict()
+            if len(parts) == 3 and method == 'POST' and parts[2] in ('cancel', 'pause', 'resume'):
+                if parts[2] == 'cancel':
+                    self.scheduler.cancel(job.id)
+                elif parts[2] == 'pause':
+                    job.pause()
+                else:
+                    job.resume()
+                return 200, job.to_dict()
+        if parts == ['shutdown'] and method == 'POST':
+            self._cancel_on_shutdown = bool(body.get('cancel'))
+            threading.Thread(target=self._server.shutdown, name='afm-daemon-stop', daemon=True).start()
+            return 202, {'ok': True}
+        return 404, {'error': 'risorsa non trovata'}
+
+    def check_token(self, header: str) -> bool:
+        scheme, _, token = (header or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), self.token)
+
+    # --- Ciclo di vita ------------------------------------------------------
+
+    def _write_state(self):
+        """daemon.json scritto atomicamente con permessi 0600 (contiene il token)"""
+        path = state_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        fd = os.open(str(temp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'pid': os.getpid(), 'url': self.url, 'token': self.token,
+                       'started_at': self.started_at}, f)
+        os.replace(temp, path)
+
+    def _remove_state(self):
+        path = state_path()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if json.load(f).get('pid') != os.getpid():
+                    return  # scritto da un altro demone
+            os.remove(path)
+        except (OSError, ValueError):
+            pass
+
+    def serve_forever(self):
+        """Serve fino a /v1/shutdown o Ctrl+C; poi completa (o annulla) i job"""
+        self._write_state()
+        try:
+            self._server.serve_forever(poll_interval=0.25)
+        except KeyboardInterrupt:
+            self._cancel_on_shutdown = True
+        finally:
+            self._remove_state()
+            self._server.server_close()
+            self.scheduler.shutdown(cancel_pending=self._cancel_on_shutdown, wait=True)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'AdvancedFileMoverDaemon/1'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str):
+        daemon = self.server.transfer_daemon
+        if not daemon.check_token(self.headers.get('Authorization', '')):
+            self._reply(401, {'error': 'token non valido'})
+            return
+
+        body = {}
+        if method == 'POST':
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_BODY:
+                self._reply(413, {'error': 'richiesta troppo grande'})
+                return
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, {'error': 'JSON non valido'})
+                return
+            if not isinstance(body, dict):
+                self._reply(400, {'error': 'atteso un oggetto JSON'})
+                return
+
+        try:
+            status, payload = daemon.handle(method, self.path, body)
+        except ValueError as e:
+            status, payload = 400, {'error': str(e)}
+        except OSError as e:
+            status, payload = 400, {'error': f"{e.filename or ''}: {e.strerror or e}".lstrip(': ')}
+        except RuntimeError as e:
+            status, payload = 503, {'error': str(e)}
+        self._reply(status, payload)
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# --- Client ------------------------------------------------------------------
+
+class DaemonClient:
+    """Client dell'API del demone (solo libreria standard)"""
+
+    def __init__(self, url: str, token: str, timeout: float = 10.0):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self._opener = None
+
+    @classmethod
+    def discover(cls, timeout: float = 10.0) -> Optional['DaemonClient']:
+        """Client del demone dell'utente corrente; None se daemon.json manca o è illeggibile"""
+        try:
+            with open(state_path(), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return cls(str(state['url']), str(state['token']), timeout=timeout)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        import urllib.error
+        import urllib.request
+
+        if self._opener is None:
+            # Loopback: mai passare da un proxy di sistema
+            self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        request = urllib.request.Request(f"{self.url}/v1/{path}", data=data, method=method)
+        request.add_header('Authorization', f"Bearer {self.token}")
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with self._opener.open(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error') or e.reason
+            except Exception:
+                message = e.reason
+            raise DaemonError(str(message), e.code)
+        except (urllib.error.URLError, OSError) as e:
+            reason = getattr(e, 'reason', e)
+            raise DaemonError(f"demone non raggiungibile ({reason})")
+
+    def status(self) -> dict:
+        return self._request('GET', 'status')
+
+    def jobs(self) -> List[dict]:
+        return self._request('GET', 'jobs')['jobs']
+
+    def job(self, job_id: int) -> dict:
+        return self._request('GET', f"jobs/{int(job_id)}")
+
+    def submit(self, operation: str, sources: List[str], destination: str, **options) -> List[dict]:
+        """Sottomette un job; i percorsi vengono resi assoluti qui (il demone ha un'altra cwd)"""
+        body = {
+            'operation': operation,
+            'sources': [os.path.abspath(s) for s in sources],
+            'destination': os.path.abspath(destination) + (os.sep if destination.endswith(('/', '\\')) else ''),
+        }
+        body.update({k: v for k, v in options.items() if v is not None})
+        return self._request('POST', 'jobs', body)['jobs']
+
+    def cancel(self, job_id: int) -> dict:
+        return self._request('POST', f"jobs/{int(job_id)}/cancel", {})
+
+    def pause(self, job_id: int) -> dict:
+        return self._request('POST', f"jobs/{int(job_id)}/pause", {})
+
+    def resume(self, job_id: int) -> dict:
+        return self._request('POST', f"jobs/{int(job_id)}/resume", {})
+
+    def forget(self) -> dict:
+        return self._request('POST', 'jobs/forget', {})
+
+    def shutdown(self, cancel: bool = False) -> dict:
+        return self._request('POST', 'shutdown', {'cancel': bool(cancel)})
+
+
+# --- Riga di comando ---------------------------------------------------------
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.daemon',
+                                     description='Demone di trasferimento in background (API su loopback)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Avvia il demone (in primo piano)')
+    serve.add_argument('--port', type=int, default=0, help='Porta TCP su 127.0.0.1 (default: libera)')
+    serve.add_argument('--limit-mb', type=float, default=0, metavar='MB/S', help='Limite di banda per job')
+    serve.add_argument('--no-auto-tune', action='store_true', help='Disattiva l\'auto-tuning a runtime')
+    serve.add_argument('--stats', action='store_true', help='Statistiche per fase nei job')
+    serve.add_argument('--metrics-jsonl', metavar='FILE', help='Metriche JSON Lines dei job')
+    serve.add_argument('--metrics-prom', metavar='FILE', help='Metriche Prometheus (textfile collector)')
+
+    commands.add_parser('status', help='Stato del demone')
+    commands.add_parser('jobs', help='Elenco dei job (JSON)')
+    for name in ('cancel', 'pause', 'resume'):
+        command = commands.add_parser(name, help=f"{name} di un job")
+        command.add_argument('job_id', type=int)
+    commands.add_parser('forget', help='Rimuove i job terminati dallo storico')
+    stop = commands.add_parser('stop', help='Chiude il demone (completa i job in corso)')
+    stop.add_argument('--cancel', action='store_true', help='Annulla i job in coda e in corso')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _build_parser().parse_args(argv)
+
+    if args.command == 'serve':
+        existing = DaemonClient.discover(timeout=2.0)
+        if existing is not None:
+            try:
+                existing.status()
+                print(f"Demone già in esecuzione su {existing.url}", file=sys.stderr)
+                return 1
+            except DaemonError:
+                pass  # daemon.json orfano
+        daemon = TransferDaemon(port=args.port, limit_mb=args.limit_mb, auto_tune=not args.no_auto_tune,
+                                collect_stats=args.stats, metrics_jsonl=args.metrics_jsonl,
+                                metrics_prom=args.metrics_prom)
+        print(f"Demone in ascolto su {daemon.url} (pid {os.getpid()})", file=sys.stderr, flush=True)
+        daemon.serve_forever()
+        return 0
+
+    client = DaemonClient.discover()
+    if client is None:
+        print("Demone non in esecuzione (python -m src.daemon serve)", file=sys.stderr)
+        return 1
+    try:
+        if args.command == 'status':
+            result = client.status()
+        elif args.command == 'jobs':
+            result = client.jobs()
+        elif args.command in ('cancel', 'pause', 'resume'):
+            result = getattr(client, args.command)(args.job_id)
+        elif args.command == 'forget':
+            result = client.forget()
+        else:
+            result = client.shutdown(cancel=args.cancel)
+    except DaemonError as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
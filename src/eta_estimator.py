@@ -0,0 +1,259 @@
+"""
+Stima del tempo residuo con costo per byte E costo per file
+
+La media MB/s sottostima il tempo sugli alberi di file piccoli, dove domina il
+costo fisso di ogni file (apertura, creazione, metadati, rename). Il modello
+
+    tempo ≈ a · MB + b · file
+
+viene stimato durante il job con minimi quadrati sugli incrementi (dt, dMB,
+dfile) dei campioni, con oblio esponenziale per seguire i cambi di regime.
+Prima dei dati del job il modello parte dai coefficienti dei job precedenti
+sulla stessa coppia di volumi (.eta_history.json), che poi perdono peso.
+
+estimate() ritorna (eta, minimo, massimo): l'intervallo combina l'incertezza
+dei coefficienti e la variabilità osservata tra un campione e l'altro.
+"""
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .utils import get_volume_id
+
+MB = 1024 * 1024
+
+
+def _cache_dir() -> Path:
+    """Cartella dati utente (stessa di .storage_cache.json)"""
+    try:
+        local_appdata = Path(os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local')))
+    except Exception:
+        local_appdata = Path.home() / 'AppData' / 'Local'
+    return local_appdata / 'AdvancedFileMover'
+
+
+class EtaEstimator:
+    """Modello online tempo ≈ a·MB + b·file (a = s/MB, b = s/file)"""
+
+    SAMPLE_INTERVAL = 0.5   # Secondi minimi tra due campioni (incrementi più lunghi = meno rumore)
+    FORGET = 0.98           # Peso residuo di un campione a ogni nuovo campione
+    PRIOR_SECONDS = 5.0     # Peso dello storico: equivale a ~5 s di osservazioni
+    MIN_SAMPLES = 3         # Senza storico: campioni prima della prima stima
+    Z = 1.645               # Intervallo al 90%
+    SIGNIFICANCE = 2.0      # s/file usato solo se supera N errori standard
+    FILE_RIDGE = 1.0        # Penalità su s/file: con byte e file proporzionali il tempo va ai byte
+    MIN_SPREAD = 0.05       # Incertezza relativa minima (sigma / eta)
+    PRIOR_SPREAD = 0.25     # ... finché la stima viene solo dallo storico
+
+    def __init__(self, prior: Optional[dict] = None):
+        """
+        Args:
+            prior: {'sec_per_mb', 'sec_per_file'} da EtaHistory.prior() (None = nessuno storico)
+        """
+        self.prior = prior
+        self.samples = 0
+        self._last: Optional[Tuple[float, float, int]] = None  # (t, MB, file) dell'ultimo campione
+        # Somme pesate delle equazioni normali (x = dMB, y = dfile, t = dt)
+        self._sxx = self._sxy = self._syy = 0.0
+        self._stx = self._sty = self._stt = 0.0
+        self._st = 0.0
+        self._weight = 0.0
+        if prior:
+            a0 = max(0.0, float(prior.get('sec_per_mb') or 0.0))
+            b0 = max(0.0, float(prior.get('sec_per_file') or 0.0))
+            # Due pseudo-osservazioni "pure" (solo byte, solo file) da PRIOR_SECONDS/2 ciascuna
+            half = self.PRIOR_SECONDS / 2
+            if a0 > 0:
+                self._add(half, half / a0, 0.0)
+            if b0 > 0:
+                self._add(half, 0.0, half / b0)
+
+    def _add(self, dt: float, dx: float, dy: float):
+        f = self.FORGET
+        self._sxx = self._sxx * f + dx * dx
+        self._sxy = self._sxy * f + dx * dy
+        self._syy = self._syy * f + dy * dy
+        self._stx = self._stx * f + dt * dx
+        self._sty = self._sty * f + dt * dy
+        self._stt = self._stt * f + dt * dt
+        self._st = self._st * f + dt
+        self._weight = self._weight * f + 1.0
+
+    def update(self, bytes_done: int, files_done: int, paused: bool = False, now: Optional[float] = None):
+        """Progresso cumulativo del job (chiamabile a ogni aggiornamento: campiona da sé)"""
+        now = time.monotonic() if now is None else now
+        mb = max(0, int(bytes_done or 0)) / MB
+        files = max(0, int(files_done or 0))
+        last = self._last
+        if last is None or paused or mb < last[1] or files < last[2]:
+            # Primo punto, pausa (non è tempo di trasferimento) o contatori ripartiti
+            self._last = (now, mb, files)
+            return
+        dt = now - last[0]
+        if dt < self.SAMPLE_INTERVAL:
+            return
+        self._add(dt, mb - last[1], files - last[2])
+        self.samples += 1
+        self._last = (now, mb, files)
+
+    def coefficients(self) -> Optional[Tuple[float, float]]:
+        """(s/MB, s/file) correnti; None se non ci sono ancora dati sufficienti"""
+        if not self.prior and self.samples < self.MIN_SAMPLES:
+            return None
+        sxx, sxy, syy, stx, sty = self._sxx, self._sxy, self._syy, self._stx, self._sty
+        # File tutti uguali rendono byte e file collineari: la penalità sul solo termine per
+        # file attribuisce il tempo ai byte finché i dati non mostrano un costo per file
+        sxx += 1e-12
+        syy += self.FILE_RIDGE
+        det = sxx * syy - sxy * sxy
+        a = (stx * syy - sty * sxy) / det if det > 0 else -1.0
+        b = (sty * sxx - stx * sxy) / det if det > 0 else -1.0
+        if a < 0 or b < 0:
+            # Coefficiente negativo (senza senso fisico): vince il termine singolo che spiega meglio i dati
+            a_only = max(0.0, stx / sxx)
+            b_only = max(0.0, sty / syy)
+            sse_a = self._stt - 2 * a_only * stx + a_only * a_only * sxx
+            sse_b = self._stt - 2 * b_only * sty + b_only * b_only * syy
+            a, b = (a_only, 0.0) if sse_a <= sse_b else (0.0, b_only)
+        elif b > 0:
+            # Costo per file non distinguibile dal rumore (es. solo file grandi finora): tutto ai byte
+            sse = max(0.0, self._stt - 2 * (a * stx + b * sty) + a * a * sxx + 2 * a * b * sxy + b * b * syy)
+            se_b = math.sqrt(sse / max(1.0, self._weight - 2) * sxx / det)
+            if b < self.SIGNIFICANCE * se_b:
+                a, b = max(0.0, stx / sxx), 0.0
+        if a == 0.0 and b == 0.0:
+            return None
+        return a, b
+
+    def estimate(self, bytes_left: int, files_left: int) -> Optional[Tuple[float, float, float]]:
+        """(eta, minimo, massimo) in secondi per il lavoro residuo; None se non stimabile"""
+        coefficients = self.coefficients()
+        if coefficients is None:
+            return None
+        a, b = coefficients
+        x = max(0, int(bytes_left or 0)) / MB
+        y = max(0, int(files_left or 0))
+        eta = a * x + b * y
+        if eta <= 0:
+            return 0.0, 0.0, 0.0
+
+        # Varianza residua per campione e covarianza dei coefficienti (s² · M⁻¹)
+        sxx, sxy, syy = self._sxx, self._sxy, self._syy
+        sse = max(0.0, self._stt - 2 * (a * self._stx + b * self._sty)
+                  + a * a * sxx + 2 * a * b * sxy + b * b * syy)
+        dof = max(1.0, self._weight - 2)
+        s2 = sse / dof
+        det = sxx * syy - sxy * sxy
+        if det > 0:
+            param_var = s2 * (x * x * syy - 2 * x * y * sxy + y * y * sxx) / det
+        else:
+            param_var = s2 * ((x * x / sxx) if sxx else 0.0) + s2 * ((y * y / syy) if syy else 0.0)
+        # Rumore dei campioni futuri: ~eta / durata media di un campione
+        mean_dt = self._st / self._weight if self._weight else self.SAMPLE_INTERVAL
+        noise_var = s2 * eta / max(mean_dt, 1e-3)
+        sigma = math.sqrt(max(0.0, param_var) + max(0.0, noise_var))
+        sigma = max(sigma, eta * (self.PRIOR_SPREAD if self.samples < self.MIN_SAMPLES else self.MIN_SPREAD))
+        return eta, max(0.0, eta - self.Z * sigma), eta + self.Z * sigma
+
+
+class EtaHistory:
+    """Coefficienti dei job passati per coppia di volumi (sorgente > destinazione)"""
+
+    HISTORY_FILE = '.eta_history.json'
+    HISTORY_VERSION = 1
+    MAX_ENTRIES = 64
+    SMOOTHING = 0.3          # Peso del job appena concluso nella media mobile
+    MIN_JOB_SECONDS = 2.0    # Job più brevi non dicono nulla di affidabile
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = Path(cache_path) if cache_path else _cache_dir() / self.HISTORY_FILE
+        self._lock = threading.Lock()
+        self._pairs: Dict[str, dict] = {}
+        self._volume_ids: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.HISTORY_VERSION:
+                self._pairs = dict(data.get('pairs') or {})
+        except Exception:
+            self._pairs = {}
+
+    def _save(self):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(self.cache_path.name + f'.{os.getpid()}.tmp')
+            with self._lock:
+                payload = {'version': self.HISTORY_VERSION, 'pairs': dict(self._pairs)}
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except Exception:
+            pass
+
+    def _volume(self, path: str) -> str:
+        volume = self._volume_ids.get(path)
+        if volume is None:
+            try:
+                volume = get_volume_id(path)
+            except Exception:
+                volume = '?'
+            self._volume_ids[path] = volume
+        return volume
+
+    def pair_key(self, source: str, destination: str) -> str:
+        return f"{self._volume(source)}>{self._volume(destination)}"
+
+    def prior(self, source: str, destination: str) -> Optional[dict]:
+        """Coefficienti medi dei job precedenti sulla stessa coppia (None se nessuno)"""
+        with self._lock:
+            entry = self._pairs.get(self.pair_key(source, destination))
+        return dict(entry) if entry else None
+
+    def record(self, source: str, destination: str, estimator: EtaEstimator, elapsed: float) -> bool:
+        """Aggiunge il job concluso alla media della coppia; False se troppo breve o senza dati"""
+        if elapsed < self.MIN_JOB_SECONDS or estimator.samples < EtaEstimator.MIN_SAMPLES:
+            return False
+        coefficients = estimator.coefficients()
+        if coefficients is None:
+            return False
+        a, b = coefficients
+        key = self.pair_key(source, destination)
+        with self._lock:
+            entry = self._pairs.get(key)
+            if entry:
+                k = self.SMOOTHING
+                entry = {
+                    'sec_per_mb': entry.get('sec_per_mb', a) * (1 - k) + a * k,
+                    'sec_per_file': entry.get('sec_per_file', b) * (1 - k) + b * k,
+                    'jobs': int(entry.get('jobs', 0)) + 1,
+                }
+            else:
+                entry = {'sec_per_mb': a, 'sec_per_file': b, 'jobs': 1}
+            entry['updated_at'] = time.time()
+            self._pairs[key] = entry
+            if len(self._pairs) > self.MAX_ENTRIES:
+                oldest = sorted(self._pairs, key=lambda k: self._pairs[k].get('updated_at', 0))
+                for stale in oldest[:len(self._pairs) - self.MAX_ENTRIES]:
+                    del self._pairs[stale]
+        self._save()
+        return True
+
+
+_default_history: Optional[EtaHistory] = None
+_default_history_lock = threading.Lock()
+
+
+def get_eta_history() -> EtaHistory:
+    """Istanza condivisa (uno storico per processo)"""
+    global _default_history
+    with _default_history_lock:
+        if _default_history is None:
+            _default_history = EtaHistory()
+        return _default_history
@@ -3,18 +3,241 @@ Engine core per operazioni file ottimizzate
 """
 import os
 import shutil
+import stat
 import threading
 import time
 import tempfile
+import itertools
+import uuid
+import queue
+import collections
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
 
+from .archive_writer import (PARALLEL_MIN_BYTES, ArchiveBuilder, ArchiveCancelled, archive_suffix,
+                             parse_archive_format)
+from .archive_reader import (CHRDEV, DIR, EXTRACT_CHUNK_MAX, FIFO, FILE, HARDLINK, SYMLINK,
+                             link_target_inside, open_archive)
+from .autotuner import AdaptiveTuner
+from .metadata import MetadataCopier, parse_preserve
+from .transfer_plan import DEFAULT_SYMLINK_POLICY, format_entry_counts, parse_symlink_policy, scan_source
+from .transfer_stats import TransferStats
+from .utils import format_bytes, get_device_key, get_host_id, is_pid_alive
+
 
 class OperationType(Enum):
     """Tipo di operazione"""
     COPY = "copy"
     MOVE = "move"
+    ARCHIVE = "archive"  # un solo file tar/zip in destinazione (src.archive_writer)
+    EXTRACT = "extract"  # archivio tar/zip come sorgente (src.archive_reader)
+
+
+def _fsync_file(path: str):
+    """Forza su disco il contenuto di un file già chiuso"""
+    # Su Windows FlushFileBuffers richiede un handle in scrittura
+    flags = os.O_RDWR if os.name == 'nt' else os.O_RDONLY
+    fd = os.open(path, flags | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: str):
+    """Rende durevoli i rename in una cartella (POSIX; su NTFS i metadati sono journaled)"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Alcuni filesystem (CIFS, FUSE) non supportano fsync su directory
+        pass
+    finally:
+        os.close(fd)
+
+
+class ProgressSnapshot:
+    """Stato del progresso in un istante (immutabile).
+
+    L'engine ne pubblica uno nuovo a ogni aggiornamento sostituendo il riferimento
+    (engine.progress): chi legge da un altro thread (loop UI) ottiene sempre valori
+    coerenti tra loro, senza lock.
+    """
+
+    __slots__ = ('current_file', 'total_size', 'processed_size', 'speed', 'file_index', 'file_count')
+
+    def __init__(self, current_file: str = "", total_size: int = 0, processed_size: int = 0,
+                 speed: float = 0, file_index: int = 0, file_count: int = 0):
+        self.current_file = current_file
+        self.total_size = total_size
+        self.processed_size = processed_size
+        self.speed = speed
+        self.file_index = file_index
+        self.file_count = file_count
+
+    @property
+    def percentage(self) -> float:
+        return (self.processed_size / max(self.total_size, 1)) * 100
+
+    def as_dict(self) -> dict:
+        """Formato della callback on_progress"""
+        return {
+            'current_file': self.current_file,
+            'total_size': self.total_size,
+            'processed_size': self.processed_size,
+            'speed': self.speed,
+            'percentage': self.percentage,
+            'file_index': self.file_index,
+            'file_count': self.file_count,
+        }
+
+
+class _SourceDeleter:
+    """Worker che elimina le sorgenti di un MOVE fuori dal thread di copia.
+
+    Riceve batch per cartella destinazione: rende durevoli i file finali (fsync file +
+    cartella) e solo dopo cancella le sorgenti corrispondenti. A fine job pota
+    l'albero sorgente dal basso verso l'alto.
+    """
+
+    def __init__(self, engine: 'FileOperationEngine'):
+        self._engine = engine
+        self._queue = queue.Queue()
+        self.deleted = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name='afm-source-deleter', daemon=True)
+        self._thread.start()
+
+    def submit(self, dest_dir: str, items: List[Tuple[str, str]]):
+        """Accoda [(file finale, sorgente)] già rinominati in dest_dir"""
+        self._queue.put((dest_dir, items))
+
+    def pending(self) -> int:
+        """Batch in attesa di eliminazione"""
+        return self._queue.qsize()
+
+    def finish(self, prune_source: Optional[str] = None,
+               prune_destination: Optional[str] = None) -> bool:
+        """Attende lo svuotamento della coda e, se richiesto, pota l'albero sorgente"""
+        self._queue.put(None)
+        self._thread.join()
+        if prune_source:
+            self._prune_tree(prune_source, prune_destination)
+        return self.failures == 0
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+
+            dest_dir, items = batch
+            durable = []
+            started = time.perf_counter()
+            for final_path, source in items:
+                try:
+                    _fsync_file(final_path)
+                    durable.append(source)
+                except Exception as e:
+                    self.failures += 1
+                    self._engine._log_error(
+                        f"Destinazione non confermata su disco, sorgente mantenuta: {final_path} "
+                        f"({self._engine._format_exc(e)})"
+                    )
+            _fsync_dir(dest_dir)
+            self._engine._stat('fsync', started, calls=len(items) + 1)
+
+            started = time.perf_counter()
+            for source in durable:
+                try:
+                    os.remove(source)
+                    self.deleted += 1
+                except Exception as e:
+                    self.failures += 1
+                    self._engine._log_error(f"Errore eliminazione sorgente: {source} ({self._engine._format_exc(e)})")
+            self._engine._stat('delete', started, calls=len(durable))
+
+    def _prune_tree(self, source_root: str, dest_root: Optional[str]):
+        """Rimuove le cartelle sorgente rimaste vuote (bottom-up).
+
+        Le cartelle già vuote in origine vengono ricreate in destinazione prima di
+        essere rimosse, così lo spostamento non perde la struttura.
+        """
+        for root, dirs, files in os.walk(source_root, topdown=False):
+            if files:
+                continue
+            try:
+                if dest_root:
+                    rel_path = os.path.relpath(root, source_root)
+                    os.makedirs(dest_root if rel_path == '.' else os.path.join(dest_root, rel_path), exist_ok=True)
+                os.rmdir(root)
+            except OSError:
+                # Cartella non vuota (file non spostati) o non accessibile: resta al suo posto
+                pass
+
+
+class _ArchiveSourceReader:
+    """Lettura di un file sorgente per l'archivio: pausa, annulla e progresso in byte sorgente"""
+
+    def __init__(self, engine: 'FileOperationEngine', fh):
+        self._engine = engine
+        self._fh = fh
+
+    def read(self, size: int = -1) -> bytes:
+        engine = self._engine
+        engine._wait_if_paused()
+        if engine.is_cancelled:
+            raise ArchiveCancelled()
+        started = time.perf_counter()
+        data = self._fh.read(size)
+        engine._stat('read', started, nbytes=len(data))
+        if data:
+            engine.processed_size += len(data)
+            engine._report_progress()
+        return data
+
+
+class _ChunkPipe:
+    """Coda tra thread di lettura anticipata e thread di scrittura.
+
+    Il limite di chunk in coda è rivalutato a ogni put (l'auto-tuning lo cambia live).
+    """
+
+    def __init__(self, limit: Callable[[], int]):
+        self._limit = limit
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def put(self, item, force: bool = False) -> bool:
+        with self._cond:
+            while not self.closed and not force and len(self._items) >= max(1, self._limit()):
+                self._cond.wait()
+            if self.closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._items.clear()
+            self._cond.notify_all()
 
 
 class FileOperationEngine:
@@ -24,12 +247,28 @@ class FileOperationEngine:
     BUFFER_SIZE = 10 * 1024 * 1024  # 10 MB default
     LARGE_FILE_THRESHOLD = 100 * 1024 * 1024  # 100 MB
     LARGE_FILE_BUFFER = 50 * 1024 * 1024  # 50 MB per file grandi
+
+    # Scrittura atomica: i dati vanno in un file temporaneo nascosto nella cartella
+    # destinazione e vengono rinominati sul nome finale solo a copia completata
+    TEMP_PREFIX = '.afm-'
+    TEMP_SUFFIX = '.partial'
+    RENAME_BATCH_SIZE = 256  # Rename accodati per cartella prima del flush
+    # Temp di altri host (destinazione condivisa) o senza host/pid: il proprietario non è
+    # verificabile da qui, sono orfani solo se non vengono scritti da almeno questo tempo
+    ORPHAN_TEMP_MIN_AGE = 10 * 60  # Secondi
+    # Numerazione dei temp condivisa da tutti gli engine del processo (job in parallelo)
+    _temp_counter = itertools.count(1)
     
     def __init__(self,
                  buffer_size: int = BUFFER_SIZE,
                  use_ramdrive: bool = True,
                  ramdrive_letter: Optional[str] = None,
-                 num_threads: int = 4):
+                 num_threads: int = 4,
+                 auto_tune: bool = False,
+                 collect_stats: bool = False,
+                 preserve=None,
+                 symlinks: str = DEFAULT_SYMLINK_POLICY,
+                 skip_special: bool = True):
         """
         Inizializza engine
         
@@ -38,11 +277,21 @@ class FileOperationEngine:
             use_ramdrive: Usare RamDrive se disponibile
             ramdrive_letter: Lettera RamDrive (A-Z)
             num_threads: Numero thread per operazioni parallele
+            auto_tune: Affina chunk e letture anticipate a runtime (buffer_size = punto di partenza)
+            collect_stats: Misura tempo/chiamate/bytes per fase (get_stats(), report a fine job)
+            preserve: Metadati da conservare (src.metadata.parse_preserve; None = tempi e permessi)
+            symlinks: Link nelle cartelle: preserve / follow / skip (src.transfer_plan)
+            skip_special: Salta FIFO/socket/device nelle cartelle (False = FIFO e device ricreati)
         """
         self.buffer_size = buffer_size
         self.use_ramdrive = use_ramdrive
         self.ramdrive_letter = ramdrive_letter
         self.num_threads = num_threads
+        self.auto_tune = auto_tune
+        self.collect_stats = collect_stats
+        self.preserve = parse_preserve(preserve)
+        self.symlinks = parse_symlink_policy(symlinks)
+        self.skip_special = skip_special
         
         # Progress tracking
         self.current_file = ""
@@ -51,14 +300,61 @@ class FileOperationEngine:
         self.current_speed = 0  # bytes/sec
         self.is_cancelled = False
 
+        # Pausa: il loop di copia attende finché l'evento non è di nuovo "set"
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+
+        # Limite banda opzionale (src.bandwidth.TransferThrottle); None = nessun costo
+        self.throttle = None
+
+        # Auto-tuning: un controller per coppia di device, riusato tra operazioni successive
+        self.tuner: Optional[AdaptiveTuner] = None
+        self._tuners: Dict[Tuple[str, str], AdaptiveTuner] = {}
+
+        # Statistiche per fase del job corrente/ultimo (None = disattivate, costo zero)
+        self.stats: Optional[TransferStats] = None
+
+        # Export metriche opzionale (src.metrics_export.MetricsExporter)
+        self.metrics = None
+
+        # Timeline opzionale (src.trace_recorder.TraceRecorder); None = nessun costo
+        self.trace = None
+        self._trace_file: Optional[Tuple[str, int, float]] = None
+        self.error_count = 0
+
         # File counting (per mostrare 1/n)
         self.file_index = 0
         self.file_count = 0
+
+        # Ultimo snapshot pubblicato (letto dal loop UI a frequenza fissa)
+        self.progress = ProgressSnapshot()
+        
+        # Rename differiti: cartella destinazione -> [(temp, finale, sorgente da eliminare)]
+        self._pending_commits: Dict[str, List[Tuple[str, str, Optional[str]]]] = {}
+        self._deleter: Optional[_SourceDeleter] = None
+
+        # Metadati dell'operazione corrente (None = nessuno da conservare)
+        self._metadata: Optional[MetadataCopier] = None
+
+        # Cartelle destinazione già verificate/create nell'operazione corrente (niente stat per file)
+        self._ready_dirs: set = set()
+
+        # Operazione ARCHIVE: formato, livello (None = default del codec) e processi di
+        # compressione (None = un processo per CPU)
+        self.archive_format = parse_archive_format(None)
+        self.archive_level: Optional[int] = None
+        self.archive_workers: Optional[int] = None
+
+        # Operazione EXTRACT: byte scritti dai thread zip, arresto dei thread su errore
+        self._extract_lock = threading.Lock()
+        self._extract_stop = False
+        self._extract_estimate: Optional[Callable[[], Optional[int]]] = None
         
         # Callback
         self.on_progress: Optional[Callable] = None
         self.on_error: Optional[Callable] = None
         self.on_complete: Optional[Callable] = None
+        self.on_info: Optional[Callable] = None
     
     def set_progress_callback(self, callback: Callable):
         """Imposta callback per progress"""
@@ -71,11 +367,34 @@ class FileOperationEngine:
     def set_complete_callback(self, callback: Callable):
         """Imposta callback per completamento"""
         self.on_complete = callback
+
+    def set_info_callback(self, callback: Callable):
+        """Imposta callback per messaggi informativi"""
+        self.on_info = callback
     
     def cancel(self):
-        """Cancella operazione in corso"""
+        """Cancella operazione in corso (resta attivo fino a reset_progress())"""
         self.is_cancelled = True
+        # Sblocca un'eventuale pausa così il loop di copia vede l'annullamento
+        self._resume_event.set()
+
+    def pause(self):
+        """Mette in pausa l'operazione (effettiva al prossimo chunk)"""
+        self._resume_event.clear()
+
+    def resume(self):
+        """Riprende un'operazione in pausa"""
+        self._resume_event.set()
+
+    @property
+    def is_paused(self) -> bool:
+        return not self._resume_event.is_set()
     
+    def get_stats(self) -> Optional[dict]:
+        """Statistiche per fase del job in corso (o dell'ultimo); None se disattivate"""
+        stats = self.stats
+        return stats.snapshot() if stats is not None else None
+
     def reset_progress(self):
         """Resetta lo stato del progresso per una nuova operazione"""
         self.current_file = ""
@@ -83,55 +402,158 @@ class FileOperationEngine:
         self.processed_size = 0
         self.current_speed = 0
         self.is_cancelled = False
+        self._resume_event.set()
 
         self.file_index = 0
         self.file_count = 0
+        self.progress = ProgressSnapshot()
     
-    def copy(self, source: str, destination: str) -> bool:
+    def copy(self, source: str, destination: str, scan=None) -> bool:
         """
         Copia file/cartella da source a destination
-        
+
+        Args:
+            scan: SourceScan già pronto (transfer_plan) per non ripetere la scansione
         Returns:
             True se successo, False se errore
         """
-        return self._perform_operation(source, destination, OperationType.COPY)
+        return self._perform_operation(source, destination, OperationType.COPY, scan)
     
-    def move(self, source: str, destination: str) -> bool:
+    def move(self, source: str, destination: str, scan=None) -> bool:
         """
         Sposta file/cartella da source a destination
-        
+
+        Args:
+            scan: SourceScan già pronto (transfer_plan) per non ripetere la scansione
         Returns:
             True se successo, False se errore
         """
-        return self._perform_operation(source, destination, OperationType.MOVE)
+        return self._perform_operation(source, destination, OperationType.MOVE, scan)
+
+    def archive(self, source: str, destination: str, scan=None) -> bool:
+        """
+        Archivia file/cartella in un unico file (formato archive_format) in destinazione
+
+        L'archivio si chiama come destination più l'estensione del formato (dest/Nome.tar.gz);
+        le sorgenti restano dove sono.
+
+        Args:
+            scan: SourceScan già pronto (transfer_plan) per non ripetere la scansione
+        Returns:
+            True se successo, False se errore
+        """
+        return self._perform_operation(source, destination, OperationType.ARCHIVE, scan)
+
+    def extract(self, source: str, destination: str, scan=None) -> bool:
+        """
+        Estrae l'archivio source (tar, tar compresso o zip) dentro la cartella destination
+
+        I membri vanno direttamente nei file destinazione (temp + rename come una copia);
+        i membri zip vengono decompressi in parallelo su num_threads thread.
+
+        Args:
+            scan: Ignorato (l'elenco dei membri viene dall'archivio)
+        Returns:
+            True se successo, False se errore
+        """
+        return self._perform_operation(source, destination, OperationType.EXTRACT, scan)
     
-    def _perform_operation(self, source: str, destination: str, 
-                          operation: OperationType) -> bool:
-        """Esegue operazione (copy/move)"""
+    def _perform_operation(self, source: str, destination: str,
+                           operation: OperationType, scan=None) -> bool:
+        """Esegue operazione (copy/move), notificando l'eventuale export metriche e timeline"""
+        self.error_count = 0
+        metrics = self.metrics
+        trace = self.trace
+        if metrics is None and trace is None:
+            return self._execute_operation(source, destination, operation, scan)
+
+        success = False
+        started = time.perf_counter()
+        if metrics is not None:
+            metrics.job_started(self, source, destination, operation)
+        try:
+            success = self._execute_operation(source, destination, operation, scan)
+            return success
+        finally:
+            if metrics is not None:
+                metrics.job_finished(self, success)
+            if trace is not None:
+                self._finish_trace(trace, started, source, destination, operation, success)
+
+    def _finish_trace(self, trace, started: float, source: str, destination: str,
+                      operation: OperationType, success: bool):
+        """Chiude lo span del job e salva la timeline (un solo file anche per più job)"""
+        trace.complete(f"{operation.value} {os.path.basename(source.rstrip(os.sep)) or source}", 'job', started,
+                       args={'source': source, 'destination': destination, 'success': bool(success),
+                             'bytes': self.processed_size, 'files': self.file_index})
+        if not trace.output_path:
+            return
+        try:
+            path = trace.save()
+            dropped = f" ({trace.dropped} eventi più vecchi scartati)" if trace.dropped else ""
+            self._log_info(f"🧭 Timeline salvata: {path}{dropped}")
+        except OSError as e:
+            self._log_info(f"⚠️ Impossibile salvare la timeline: {self._format_exc(e)}")
+
+    def _execute_operation(self, source: str, destination: str,
+                           operation: OperationType, scan=None) -> bool:
+        """Esegue operazione (copy/move/archive/extract)"""
         ramdrive_temp_path = None
+        extract_source = None
+        self.stats = TransferStats() if self.collect_stats else None
         try:
             if not os.path.exists(source):
                 self._log_error(f"Sorgente non trovata: {source}")
                 return False
 
             self.processed_size = 0
-            self.is_cancelled = False
+            self._ready_dirs = set()
+            # is_cancelled NON viene azzerato qui: un cancel() arrivato prima dell'avvio
+            # (es. job asincrono) deve valere; l'azzeramento è compito di reset_progress()
+            if self.is_cancelled:
+                return False
 
-            files_to_process = None
+            dir_scan = None
 
             # Calcola size totale (ottimizzato per directory: un solo passaggio)
-            if os.path.isfile(source):
+            if operation == OperationType.EXTRACT:
+                # Totali dall'indice dello zip / dalle intestazioni del tar (stima se compresso)
+                extract_source = self._open_extract_source(source)
+                if extract_source is None:
+                    return False
+                self.total_size = extract_source.total_size
+                self.file_count = extract_source.file_count
+                self.file_index = 0
+                sweep_dirs = {destination} | {os.path.dirname(os.path.join(destination, entry.path))
+                                              for entry in extract_source.entries}
+            elif os.path.isfile(source):
                 self.total_size = self._get_total_size(source)
                 self.file_count = 1
                 self.file_index = 0
+                sweep_dirs = [destination if os.path.isdir(destination) else os.path.dirname(destination)]
             else:
-                plan = self._prepare_directory_plan(source, destination)
-                if plan is None:
+                # Scansione già fatta dal piano del job (solo se completa, per la stessa
+                # destinazione e con le stesse politiche su link e file speciali)
+                if (scan is not None and scan.is_dir and scan.complete and scan.destination == destination
+                        and scan.symlinks == self.symlinks and scan.skip_special == self.skip_special):
+                    dir_scan = scan
+                else:
+                    dir_scan = self._prepare_directory_plan(source, destination)
+                if dir_scan is None:
                     return False
-                files_to_process, total_size = plan
-                self.total_size = total_size
-                self.file_count = len(files_to_process)
+                self.total_size = dir_scan.total_size
+                self.file_count = dir_scan.file_count
                 self.file_index = 0
+                sweep_dirs = {os.path.dirname(dst_path)
+                              for entries in (dir_scan.files, dir_scan.links, dir_scan.specials)
+                              for _, dst_path in entries}
+            if operation == OperationType.ARCHIVE:
+                sweep_dirs = [os.path.dirname(self._archive_path(source, destination))]
+
+            # Pulizia temp orfani (crash/kill precedenti) SOLO nelle cartelle che scriveremo
+            self._sweep_orphan_temp_files(sweep_dirs)
+
+            self.tuner = self._tuner_for(source, destination) if self.auto_tune else None
             
             # Decidi se usare flusso a 2 fasi (con RamDrive) o diretto
             use_ramdrive_buffer = False
@@ -152,7 +574,8 @@ class FileOperationEngine:
                         if ram_usage.free >= self.total_size:
                             # RamDrive ha spazio: usa flusso a 2 fasi SOLO se destinazione non è ramdrive
                             use_ramdrive_buffer = True
-                            ramdrive_temp_path = os.path.join(ram_drive, f".transfer_{int(time.time())}")
+                            # Cartella di staging propria del job: engine paralleli non condividono file né cleanup
+                            ramdrive_temp_path = os.path.join(ram_drive, f".transfer_{uuid.uuid4().hex}")
                             self._log_info(f"✅ RamDrive buffer intermedio disponibile: {self.ramdrive_letter}:")
                         else:
                             # RamDrive insufficiente: fallback a diretto
@@ -172,8 +595,8 @@ class FileOperationEngine:
                     usage = shutil.disk_usage(dest_drive)
                     free_space = usage.free
                     
-                    if operation == OperationType.COPY:
-                        required = self.total_size
+                    if operation != OperationType.MOVE:
+                        required = self.total_size  # ARCHIVE: caso peggiore, senza compressione
                     else:  # MOVE
                         required = 0
                     
@@ -188,27 +611,67 @@ class FileOperationEngine:
                 except:
                     pass
             
-            # Esegui operazione
-            if os.path.isfile(source):
-                # Singolo file
-                self.file_index = 1
-                return self._handle_file_with_ramdrive(source, destination, operation, 
-                                                       use_ramdrive_buffer, ramdrive_temp_path)
-            else:
-                # Directory
-                return self._handle_directory_with_ramdrive(
-                    source,
-                    destination,
-                    operation,
-                    use_ramdrive_buffer,
-                    ramdrive_temp_path,
-                    files_to_process=files_to_process,
-                )
+            # MOVE: le sorgenti vengono eliminate da un worker dedicato, dopo che la
+            # destinazione è durevole, senza rallentare il thread di copia
+            if operation == OperationType.MOVE:
+                self._deleter = _SourceDeleter(self)
+
+            # Tempi/permessi: i file li ricevono alla chiusura, le cartelle a fine operazione
+            # (l'archivio conserva tempi e permessi al suo interno)
+            self._metadata = (MetadataCopier(self.preserve)
+                              if self.preserve and operation != OperationType.ARCHIVE else None)
+
+            success = False
+            source_is_file = os.path.isfile(source)
+            try:
+                # Esegui operazione
+                if operation == OperationType.ARCHIVE:
+                    success = self._handle_archive(source, destination, dir_scan)
+                elif operation == OperationType.EXTRACT:
+                    success = self._handle_extract(extract_source, destination)
+                elif source_is_file:
+                    # Singolo file
+                    self.file_index = 1
+                    success = self._handle_file_with_ramdrive(source, destination, operation, 
+                                                              use_ramdrive_buffer, ramdrive_temp_path)
+                else:
+                    # Directory
+                    success = self._handle_directory_with_ramdrive(
+                        source,
+                        destination,
+                        operation,
+                        use_ramdrive_buffer,
+                        ramdrive_temp_path,
+                        scan=dir_scan,
+                    )
+            finally:
+                if self._deleter is not None:
+                    deleter, self._deleter = self._deleter, None
+                    prune = success and not source_is_file
+                    deleted_ok = deleter.finish(
+                        prune_source=source if prune else None,
+                        prune_destination=destination if prune else None,
+                    )
+                    success = success and deleted_ok
+                if self._metadata is not None:
+                    # Dopo rename e potatura: nulla cambia più l'mtime delle cartelle destinazione
+                    metadata, self._metadata = self._metadata, None
+                    started = time.perf_counter()
+                    applied = metadata.apply_dirs()
+                    if applied:
+                        self._stat('metadata', started, calls=applied)
+                    warning = metadata.summary()
+                    if warning:
+                        self._log_info(warning)
+
+            return success
         
         except Exception as e:
             self._log_error(f"Errore operazione: {e}")
             return False
         finally:
+            if extract_source is not None:
+                extract_source.close()
             # Pulizia cartella temporanea ramdrive
             if ramdrive_temp_path and os.path.exists(ramdrive_temp_path):
                 try:
@@ -217,6 +680,10 @@ class FileOperationEngine:
                     self._log_info(f"✅ Cartella temporanea rimossa: {ramdrive_temp_path}")
                 except Exception as e:
                     self._log_error(f"⚠️ Errore rimozione cartella temporanea: {e}")
+
+            if self.stats is not None:
+                self.stats.finish()
+                self._log_info(self.stats.format_report())
     
     def _get_total_size(self, path: str) -> int:
         """Calcola size totale di file/directory"""
@@ -238,7 +705,7 @@ class FileOperationEngine:
         return total
 
     def _prepare_directory_plan(self, source: str, destination: str):
-        """Prepara lista file e total_size con un solo os.walk."""
+        """Scansione della cartella (SourceScan, politiche link/file speciali dell'engine); None se annullata"""
         try:
             self.current_file = "Scansione...(0 file)"
             # Durante la scansione teniamo processed_size a 0, ma aggiorniamo total_size
@@ -246,51 +713,40 @@ class FileOperationEngine:
             self.processed_size = 0
             self.total_size = 0
 
-            last_report_ts = time.time()
-            file_count = 0
-            files_to_process = []
-            total_size = 0
-
-            def _on_walk_error(err):
-                try:
-                    self._log_error(f"Errore accesso directory durante scansione: {getattr(err, 'filename', '')} ({err})")
-                except Exception:
-                    pass
+            last_report_ts = [time.time()]
+            found = [0, 0]
+            scan_started = time.perf_counter()
 
-            for root, dirs, files in os.walk(source, onerror=_on_walk_error):
-                if self.is_cancelled:
-                    return None
+            def _on_file(size):
+                found[0] += 1
+                found[1] += size
+                # Update UI (throttled)
+                now = time.time()
+                if (now - last_report_ts[0]) >= 0.2:
+                    self.total_size = found[1]
+                    self.current_file = f"Scansione...({int(found[0])} file)"
+                    self._report_progress()
+                    last_report_ts[0] = now
 
-                rel_path = os.path.relpath(root, source)
-                dst_root = destination if rel_path == '.' else os.path.join(destination, rel_path)
+            scan = scan_source(source, destination, lambda: self.is_cancelled, _on_file,
+                               self.symlinks, self.skip_special)
+            for error in scan.errors:
+                self._log_error(error)
+            if not scan.complete:
+                return None
 
-                for filename in files:
-                    if self.is_cancelled:
-                        return None
-
-                    src_file = os.path.join(root, filename)
-                    dst_file = os.path.join(dst_root, filename)
-                    files_to_process.append((src_file, dst_file))
-                    file_count += 1
-                    try:
-                        total_size += os.path.getsize(src_file)
-                    except Exception:
-                        pass
-
-                    # Update UI (throttled)
-                    now = time.time()
-                    if (now - last_report_ts) >= 0.2:
-                        self.total_size = total_size
-                        self.current_file = f"Scansione...({int(file_count)} file)"
-                        self._report_progress()
-                        last_report_ts = now
+            # scandir per cartella + stat per file
+            self._stat('scan', scan_started, calls=scan.dir_count + scan.file_count)
+            counts = format_entry_counts(scan.counts())
+            if counts:
+                self._log_info(f"🔗 Scansione: {counts} (link: {self.symlinks})")
 
             # Report finale scansione
-            self.total_size = total_size
-            self.current_file = f"Scansione...({int(file_count)} file)"
+            self.total_size = scan.total_size
+            self.current_file = f"Scansione...({scan.file_count} file)"
             self._report_progress()
 
-            return files_to_process, total_size
+            return scan
         except Exception as e:
             self._log_error(f"Errore preparazione directory: {e}")
             return None
@@ -307,9 +763,308 @@ class FileOperationEngine:
         except Exception:
             return repr(e)
     
+    def _temp_path_for(self, destination: str) -> str:
+        """Nome temporaneo nascosto (stessa cartella = rename atomico sullo stesso volume)"""
+        name = (f"{self.TEMP_PREFIX}{get_host_id()}-{os.getpid():x}-{next(self._temp_counter):x}"
+                f"{self.TEMP_SUFFIX}")
+        return os.path.join(os.path.dirname(destination), name)
+
+    def _discard_temp(self, temp_path: Optional[str]):
+        """Rimuove un file temporaneo incompleto (best-effort)"""
+        if not temp_path:
+            return
+        try:
+            os.remove(temp_path)
+        except Exception:
+            pass
+
+    def _temp_owner(self, name: str) -> Optional[Tuple[str, int]]:
+        """(host, pid) di chi ha creato il temp; None per i nomi senza host (versioni precedenti)"""
+        parts = name[len(self.TEMP_PREFIX):-len(self.TEMP_SUFFIX)].split('-')
+        # .afm-<host>-<pid>-<n>.partial (engine) / .afm-probe-<host>-<pid>.partial (StorageProbe)
+        fields = parts[1:] if parts[0] == 'probe' else parts[:-1]
+        if len(fields) != 2:
+            return None
+        try:
+            return fields[0], int(fields[1], 16)
+        except ValueError:
+            return None
+
+    def _sweep_orphan_temp_files(self, directories) -> int:
+        """Rimuove i temp orfani lasciati da esecuzioni interrotte.
+
+        Scansione non ricorsiva (os.scandir) delle sole cartelle indicate. Il nome del temp
+        contiene host e pid di chi lo scrive: quelli di questo host vengono eliminati a
+        qualsiasi età se il processo non è più vivo. Per gli altri (postazioni diverse su
+        NAS/SMB, nomi senza host) vale l'età minima ORPHAN_TEMP_MIN_AGE.
+        """
+        removed = 0
+        host = get_host_id()
+        now = time.time()
+        alive = {}  # pid -> in esecuzione (un controllo per pid per sweep)
+        for directory in directories:
+            if not directory:
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if not (name.startswith(self.TEMP_PREFIX) and name.endswith(self.TEMP_SUFFIX)):
+                            continue
+                        owner = self._temp_owner(name)
+                        try:
+                            # Anche link e file speciali temporanei (_transfer_entries)
+                            if entry.is_dir(follow_symlinks=False):
+                                continue
+                            if owner is not None and owner[0] == host:
+                                pid = owner[1]
+                                if pid not in alive:
+                                    alive[pid] = is_pid_alive(pid)
+                                if alive[pid]:
+                                    continue
+                            elif (now - entry.stat(follow_symlinks=False).st_mtime) < self.ORPHAN_TEMP_MIN_AGE:
+                                continue
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+            except OSError:
+                continue
+
+        if removed:
+            self._log_info(f"🧹 Rimossi {removed} file temporanei orfani")
+        return removed
+
+    def _queue_commit(self, temp_path: str, final_path: str,
+                      source_to_delete: Optional[str] = None) -> bool:
+        """Accoda il rename temp -> finale; flush al cambio cartella o a batch pieno"""
+        dest_dir = os.path.dirname(final_path)
+        if dest_dir not in self._pending_commits and self._pending_commits:
+            # I file arrivano raggruppati per cartella (os.walk): chiudi il batch precedente
+            if not self._commit_pending():
+                self._discard_temp(temp_path)
+                return False
+
+        batch = self._pending_commits.setdefault(dest_dir, [])
+        batch.append((temp_path, final_path, source_to_delete))
+        if len(batch) >= self.RENAME_BATCH_SIZE:
+            return self._commit_pending(dest_dir)
+        return True
+
+    def _commit_pending(self, dest_dir: Optional[str] = None) -> bool:
+        """Rinomina sul nome finale i file completati (e, per MOVE, elimina le sorgenti)"""
+        if dest_dir is not None:
+            dirs = [dest_dir]
+        else:
+            dirs = list(self._pending_commits.keys())
+
+        ok = True
+        for directory in dirs:
+            batch = self._pending_commits.pop(directory, None)
+            if not batch:
+                continue
+            moved = []
+            started = time.perf_counter()
+            for temp_path, final_path, source_to_delete in batch:
+                try:
+                    os.replace(temp_path, final_path)
+                except Exception as e:
+                    self._log_error(f"Errore rename finale: {temp_path} -> {final_path} ({self._format_exc(e)})")
+                    self._discard_temp(temp_path)
+                    ok = False
+                    continue
+
+                # La sorgente si elimina solo quando il file finale è al suo posto
+                if source_to_delete:
+                    moved.append((final_path, source_to_delete))
+            self._stat('rename', started, calls=len(batch))
+
+            if not moved:
+                continue
+            if self._deleter is not None:
+                self._deleter.submit(directory, moved)
+            else:
+                started = time.perf_counter()
+                for _, source_to_delete in moved:
+                    try:
+                        os.remove(source_to_delete)
+                    except Exception as e:
+                        self._log_error(f"Errore eliminazione sorgente: {source_to_delete} ({self._format_exc(e)})")
+                self._stat('delete', started, calls=len(moved))
+        return ok
+
+    def _tuner_for(self, source: str, destination: str) -> AdaptiveTuner:
+        """Controller di auto-tuning per la coppia di device sorgente -> destinazione"""
+        try:
+            pair = (get_device_key(source), get_device_key(destination))
+        except Exception:
+            pair = ('', '')
+        tuner = self._tuners.get(pair)
+        if tuner is None:
+            def _on_converged(point, pair=pair):
+                self._log_info(
+                    f"⚙️ Auto-tuning {pair[0]} → {pair[1]}: chunk {point['chunk_size'] / (1024 * 1024):.2f} MB, "
+                    f"in-flight {point['inflight']}, {point['throughput'] / (1024 * 1024):.1f} MB/s"
+                )
+
+            tuner = AdaptiveTuner(
+                initial_chunk=self.buffer_size,
+                max_inflight=self.num_threads,
+                on_converged=_on_converged,
+            )
+            self._tuners[pair] = tuner
+        return tuner
+
+    def _next_chunk_size(self, use_buffer: int) -> int:
+        """Chunk della prossima lettura (auto-tuning e throttle riletti a ogni chunk)"""
+        tuner = self.tuner
+        if tuner is not None:
+            use_buffer = tuner.chunk_size
+        throttle = self.throttle
+        return use_buffer if throttle is None else throttle.chunk_size(use_buffer)
+
+    def _stat(self, phase: str, started: float, calls: int = 1, nbytes: int = 0):
+        """Accumula il tempo trascorso da started (perf_counter) nella fase indicata"""
+        stats = self.stats
+        trace = self.trace
+        if stats is None and trace is None:
+            return
+        now = time.perf_counter()
+        if stats is not None:
+            stats.add(phase, now - started, calls, nbytes)
+        if trace is not None:
+            trace.complete(phase, 'phase', started, now, {'bytes': nbytes} if nbytes else None)
+
+    def _begin_file_record(self, source: str):
+        stats = self.stats
+        trace = self.trace
+        if stats is None and trace is None:
+            return
+        try:
+            size = os.path.getsize(source)
+        except OSError:
+            size = 0
+        if stats is not None:
+            stats.begin_file(source, size)
+        if trace is not None:
+            self._trace_file = (source, size, time.perf_counter())
+
+    def _end_file_record(self, ok: bool):
+        stats = self.stats
+        if stats is not None:
+            stats.end_file(ok)
+        current, self._trace_file = self._trace_file, None
+        trace = self.trace
+        if trace is not None and current is not None:
+            source, size, started = current
+            trace.complete(os.path.basename(source) or source, 'file', started,
+                           args={'path': source, 'size': size, 'ok': bool(ok)})
+
+    def _wait_if_paused(self):
+        if not self._resume_event.is_set():
+            started = time.perf_counter()
+            self._resume_event.wait()
+            self._stat('pause', started)
+
+    def _write_chunk(self, dst, buffer: bytes):
+        throttle = self.throttle
+        if throttle is not None:
+            started = time.perf_counter()
+            throttle.consume(len(buffer), self._should_abort_wait)
+            self._stat('throttle', started)
+        started = time.perf_counter()
+        dst.write(buffer)
+        self._stat('write', started, nbytes=len(buffer))
+        self.processed_size += len(buffer)
+        tuner = self.tuner
+        if tuner is not None:
+            tuner.record(len(buffer))
+        self._report_progress()
+
+    def _copy_stream(self, src, dst, use_buffer: int) -> bool:
+        """Loop di copia a chunk. Ritorna False se l'operazione viene annullata."""
+        trace = self.trace
+        if trace is None:
+            return self._copy_chunks(src, dst, use_buffer)
+
+        # Timeline: uno span 'stream' raggruppa i chunk di un file aperto
+        started = time.perf_counter()
+        start_bytes = self.processed_size
+        completed = False
+        try:
+            completed = self._copy_chunks(src, dst, use_buffer)
+            return completed
+        finally:
+            trace.complete('stream', 'stream', started,
+                           args={'bytes': self.processed_size - start_bytes, 'completed': completed})
+
+    def _copy_chunks(self, src, dst, use_buffer: int) -> bool:
+        tuner = self.tuner
+        if tuner is not None and tuner.inflight > 1:
+            try:
+                remaining = os.fstat(src.fileno()).st_size - src.tell()
+            except Exception:
+                remaining = 0
+            if remaining > tuner.chunk_size * 2:
+                return self._copy_stream_pipelined(src, dst, use_buffer)
+
+        while True:
+            self._wait_if_paused()
+            if self.is_cancelled:
+                return False
+
+            started = time.perf_counter()
+            buffer = src.read(self._next_chunk_size(use_buffer))
+            self._stat('read', started, nbytes=len(buffer))
+            if not buffer:
+                return True
+            self._write_chunk(dst, buffer)
+
+    def _copy_stream_pipelined(self, src, dst, use_buffer: int) -> bool:
+        """Come _copy_stream, con letture anticipate su un thread dedicato (tuner.inflight chunk in volo)"""
+        tuner = self.tuner
+        pipe = _ChunkPipe(lambda: tuner.inflight)
+
+        def _reader():
+            try:
+                while True:
+                    started = time.perf_counter()
+                    buffer = src.read(self._next_chunk_size(use_buffer))
+                    self._stat('read', started, nbytes=len(buffer))
+                    if not pipe.put(buffer) or not buffer:
+                        return
+            except BaseException as e:
+                pipe.put(e, force=True)
+
+        reader = threading.Thread(target=_reader, name='afm-readahead', daemon=True)
+        reader.start()
+        try:
+            while True:
+                self._wait_if_paused()
+                if self.is_cancelled:
+                    return False
+
+                # Attesa qui = il lettore non tiene il passo dello scrittore
+                started = time.perf_counter()
+                item = pipe.get()
+                self._stat('readahead_wait', started)
+                if isinstance(item, BaseException):
+                    raise item
+                if not item:
+                    return True
+                self._write_chunk(dst, item)
+        finally:
+            pipe.close()
+            reader.join()
+
+    def _should_abort_wait(self) -> bool:
+        """Interrompe le attese del throttle su annulla"""
+        return self.is_cancelled
+    
     def _handle_file(self, source: str, destination: str,
-                    operation: OperationType) -> bool:
-        """Gestisce copia/spostamento singolo file"""
+                    operation: OperationType, defer_commit: bool = False) -> bool:
+        """Gestisce copia/spostamento singolo file (scrittura su temp + rename atomico)"""
+        temp_path = None
         try:
             # Se destination è una directory, aggiungi il nome del file
             if os.path.isdir(destination):
@@ -317,12 +1072,16 @@ class FileOperationEngine:
             
             # Creare directory destinazione se necessaria
             dest_dir = os.path.dirname(destination)
-            if dest_dir and not os.path.exists(dest_dir):
-                try:
-                    os.makedirs(dest_dir, exist_ok=True)
-                except Exception as e:
-                    self._log_error(f"Errore creazione directory destinazione: {dest_dir} ({self._format_exc(e)})")
-                    return False
+            if dest_dir and dest_dir not in self._ready_dirs:
+                if not os.path.exists(dest_dir):
+                    try:
+                        started = time.perf_counter()
+                        os.makedirs(dest_dir, exist_ok=True)
+                        self._stat('mkdir', started)
+                    except Exception as e:
+                        self._log_error(f"Errore creazione directory destinazione: {dest_dir} ({self._format_exc(e)})")
+                        return False
+                self._ready_dirs.add(dest_dir)
             
             self.current_file = os.path.basename(source)
             if self.file_count <= 0:
@@ -332,7 +1091,10 @@ class FileOperationEngine:
             self._report_progress()
             
             # Ottimizza buffer in base a sorgente/destinazione
-            file_size = os.path.getsize(source)
+            started = time.perf_counter()
+            source_stat = os.stat(source)
+            file_size = source_stat.st_size
+            self._stat('stat', started)
             
             # Se target è ramdrive, usa buffer minimo (è già RAM)
             dest_drive = os.path.splitdrive(destination)[0].upper()
@@ -349,14 +1111,16 @@ class FileOperationEngine:
                 use_buffer = self.buffer_size
             
             # Copia effettiva con buffering
+            started = time.perf_counter()
             try:
                 src_fh = open(source, 'rb')
             except Exception as e:
                 self._log_error(f"Errore apertura sorgente: {source} ({self._format_exc(e)})")
                 return False
 
+            temp_path = self._temp_path_for(destination)
             try:
-                dst_fh = open(destination, 'wb')
+                dst_fh = open(temp_path, 'wb')
             except Exception as e:
                 try:
                     src_fh.close()
@@ -364,24 +1128,31 @@ class FileOperationEngine:
                     pass
                 self._log_error(f"Errore apertura destinazione: {destination} ({self._format_exc(e)})")
                 return False
+            self._stat('open', started, calls=2)
 
+            path_times = False
             with src_fh as src, dst_fh as dst:
-                while True:
-                    if self.is_cancelled:
-                        os.remove(destination)
-                        return False
-                    
-                    buffer = src.read(use_buffer)
-                    if not buffer:
-                        break
-                    
-                    dst.write(buffer)
-                    self.processed_size += len(buffer)
-                    self._report_progress()
+                completed = self._copy_stream(src, dst, use_buffer)
+                if completed and self._metadata is not None:
+                    path_times = self._apply_file_metadata(dst, source_stat, src)
+                closing = time.perf_counter()
+            self._stat('close', closing, calls=2)
+
+            if not completed:
+                self._discard_temp(temp_path)
+                return False
+            if path_times:
+                started = time.perf_counter()
+                self._metadata.apply_times(temp_path, source_stat)
+                self._stat('metadata', started)
             
-            # Se move, cancellare sorgente
-            if operation == OperationType.MOVE:
-                os.remove(source)
+            # Rename sul nome finale (subito o a batch); se move, la sorgente segue il rename
+            source_to_delete = source if operation == OperationType.MOVE else None
+            if not self._queue_commit(temp_path, destination, source_to_delete):
+                return False
+            temp_path = None
+            if not defer_commit and not self._commit_pending(dest_dir):
+                return False
             
             if self.on_complete:
                 self.on_complete()
@@ -390,11 +1161,7 @@ class FileOperationEngine:
         
         except Exception as e:
             self._log_error(f"Errore copia file: {source} -> {destination} ({self._format_exc(e)})")
-            if os.path.exists(destination):
-                try:
-                    os.remove(destination)
-                except:
-                    pass
+            self._discard_temp(temp_path)
             return False
     
     def _handle_directory(self, source: str, destination: str,
@@ -491,11 +1258,17 @@ class FileOperationEngine:
             self._report_progress()
             
             # Flusso a 2 fasi con RamDrive
-            if use_ramdrive_buffer and ramdrive_temp_path:
-                return self._copy_via_ramdrive(source, destination, ramdrive_temp_path, operation)
-            else:
-                # Flusso diretto
-                return self._handle_file(source, destination, operation)
+            self._begin_file_record(source)
+            ok = False
+            try:
+                if use_ramdrive_buffer and ramdrive_temp_path:
+                    ok = self._copy_via_ramdrive(source, destination, ramdrive_temp_path, operation)
+                else:
+                    # Flusso diretto
+                    ok = self._handle_file(source, destination, operation)
+            finally:
+                self._end_file_record(ok)
+            return ok
         
         except Exception as e:
             self._log_error(f"Errore file {source}: {e}")
@@ -505,142 +1278,660 @@ class FileOperationEngine:
                                        operation: OperationType,
                                        use_ramdrive_buffer: bool = False,
                                        ramdrive_temp_path: Optional[str] = None,
-                                       files_to_process=None) -> bool:
+                                       scan=None) -> bool:
         """Gestisce directory con supporto RamDrive 2-fasi"""
         try:
             if not os.path.exists(destination):
                 os.makedirs(destination, exist_ok=True)
 
-            if files_to_process is None:
-                plan = self._prepare_directory_plan(source, destination)
-                if plan is None:
+            if scan is None:
+                scan = self._prepare_directory_plan(source, destination)
+                if scan is None:
                     return False
-                files_to_process, total_size = plan
-                self.total_size = total_size
+                self.total_size = scan.total_size
+            files_to_process = scan.files
+            copy_only = scan.copy_only
             
-            # Processare file
-            for i, (src_file, dst_file) in enumerate(files_to_process, start=1):
-                if self.is_cancelled:
-                    return False
-                
-                dst_dir = os.path.dirname(dst_file)
-                if not os.path.exists(dst_dir):
+            # Processare file (rename finali accodati per cartella, flush anche su annulla/errore
+            # così i file già completi restano validi)
+            try:
+                for i, (src_file, dst_file) in enumerate(files_to_process, start=1):
+                    if self.is_cancelled:
+                        return False
+                    
+                    dst_dir = os.path.dirname(dst_file)
+                    if dst_dir not in self._ready_dirs:
+                        if not os.path.exists(dst_dir):
+                            try:
+                                started = time.perf_counter()
+                                os.makedirs(dst_dir, exist_ok=True)
+                                self._stat('mkdir', started)
+                            except Exception as e:
+                                self._log_error(f"Errore creazione directory: {dst_dir} ({self._format_exc(e)})")
+                                return False
+                        self._ready_dirs.add(dst_dir)
+                        if self._metadata is not None:
+                            self._metadata.remember_dir(os.path.dirname(src_file), dst_dir, source, destination)
+
+                    self.file_count = max(self.file_count, len(files_to_process))
+                    self.file_index = i
+                    self.current_file = os.path.basename(src_file)
+                    
+                    # Dietro un link seguito: il MOVE copia senza eliminare il bersaglio
+                    file_operation = OperationType.COPY if copy_only and src_file in copy_only else operation
+
+                    # Flusso a 2 fasi o diretto
+                    self._begin_file_record(src_file)
+                    ok = False
                     try:
-                        os.makedirs(dst_dir, exist_ok=True)
-                    except Exception as e:
-                        self._log_error(f"Errore creazione directory: {dst_dir} ({self._format_exc(e)})")
+                        if use_ramdrive_buffer and ramdrive_temp_path:
+                            os.makedirs(ramdrive_temp_path, exist_ok=True)
+                            ok = self._copy_via_ramdrive(src_file, dst_file, ramdrive_temp_path, file_operation,
+                                                         defer_commit=True)
+                        else:
+                            ok = self._handle_file(src_file, dst_file, file_operation, defer_commit=True)
+                    finally:
+                        self._end_file_record(ok)
+                    if not ok:
                         return False
-                
-                self.file_count = max(self.file_count, len(files_to_process))
-                self.file_index = i
-                self.current_file = os.path.basename(src_file)
-                
-                # Flusso a 2 fasi o diretto
-                if use_ramdrive_buffer and ramdrive_temp_path:
-                    temp_file = os.path.join(ramdrive_temp_path, os.path.basename(src_file))
-                    os.makedirs(ramdrive_temp_path, exist_ok=True)
-                    if not self._copy_via_ramdrive(src_file, dst_file, ramdrive_temp_path, operation):
+            finally:
+                committed = self._commit_pending()
+            if not committed:
+                return False
+
+            # Link e file speciali: nessun dato da copiare, vengono ricreati dopo i file
+            if scan.links or scan.specials or (operation == OperationType.MOVE and scan.followed_links):
+                return self._transfer_entries(scan, operation)
+
+            # MOVE: la potatura delle cartelle sorgente avviene nel deleter a fine job
+            return True
+        except Exception as e:
+            self._log_error(f"Errore directory: {source} -> {destination} ({self._format_exc(e)})")
+            return False
+    
+    def _archive_path(self, source: str, destination: str) -> str:
+        """File archivio: destination + estensione (file singolo verso una cartella: cartella/nome)"""
+        if os.path.isdir(destination) and not os.path.isdir(source):
+            destination = os.path.join(destination, os.path.basename(source))
+        return destination.rstrip('\\/') + archive_suffix(self.archive_format)
+
+    def _handle_archive(self, source: str, destination: str, scan=None) -> bool:
+        """Scrive la sorgente in un unico archivio (temp + rename); progresso in byte sorgente"""
+        archive_path = self._archive_path(source, destination)
+        if scan is None:
+            # File singolo (le cartelle arrivano già scansionate da _execute_operation)
+            scan = scan_source(source, destination, symlinks=self.symlinks, skip_special=self.skip_special)
+            if not scan.complete:
+                for error in scan.errors:
+                    self._log_error(error)
+                return False
+        # Nomi nell'archivio relativi alla cartella che contiene la destinazione: "Nome/..."
+        # (file singolo: il suo nome)
+        arc_root = os.path.dirname(scan.destination)
+
+        def _arcname(dst_path: str) -> str:
+            if not scan.is_dir:
+                return os.path.basename(source)
+            return os.path.relpath(dst_path, arc_root).replace(os.sep, '/')
+
+        dest_dir = os.path.dirname(archive_path)
+        if dest_dir and not os.path.exists(dest_dir):
+            try:
+                os.makedirs(dest_dir, exist_ok=True)
+            except OSError as e:
+                self._log_error(f"Errore creazione directory destinazione: {dest_dir} ({self._format_exc(e)})")
+                return False
+
+        workers = self.archive_workers or os.cpu_count() or 1
+        if scan.total_size < PARALLEL_MIN_BYTES:
+            workers = 1
+        temp_path = self._temp_path_for(archive_path)
+        builder = None
+        completed = False
+        try:
+            with open(temp_path, 'wb') as dst:
+                builder = ArchiveBuilder(self.archive_format, lambda data: self._archive_write(dst, data),
+                                         workers=workers, level=self.archive_level, chunk_size=self.buffer_size,
+                                         should_abort=lambda: self.is_cancelled)
+                # Cartelle prima dei file (come tar): anche quelle vuote, con permessi e mtime
+                started = time.perf_counter()
+                for src_dir, dst_dir in scan.dirs:
+                    try:
+                        builder.add_dir(_arcname(dst_dir), os.stat(src_dir))
+                    except OSError as e:
+                        self._log_error(f"Errore archiviazione cartella: {src_dir} ({self._format_exc(e)})")
                         return False
-                else:
-                    if not self._handle_file(src_file, dst_file, operation):
+                if scan.dirs:
+                    self._stat('stat', started, calls=len(scan.dirs))
+                for index, (src_file, dst_file) in enumerate(scan.files, start=1):
+                    if self.is_cancelled:
                         return False
-            
-            if operation == OperationType.MOVE:
+                    self.file_index = index
+                    self.current_file = os.path.basename(src_file)
+                    arcname = _arcname(dst_file)
+                    self._begin_file_record(src_file)
+                    ok = False
+                    try:
+                        started = time.perf_counter()
+                        with open(src_file, 'rb') as src:
+                            st = os.fstat(src.fileno())
+                            self._stat('open', started)
+                            builder.add_file(arcname, st, _ArchiveSourceReader(self, src))
+                        ok = True
+                    except ArchiveCancelled:
+                        return False
+                    except OSError as e:
+                        # Come per la copia: il primo errore interrompe (l'archivio resterebbe incompleto)
+                        self._log_error(f"Errore archiviazione file: {src_file} ({self._format_exc(e)})")
+                        return False
+                    finally:
+                        self._end_file_record(ok)
+
+                skipped = 0
+                started = time.perf_counter()
+                for src_path, dst_path in scan.links:
+                    try:
+                        builder.add_symlink(_arcname(dst_path), os.lstat(src_path), os.readlink(src_path))
+                    except OSError as e:
+                        self._log_error(f"Errore archiviazione link: {src_path} ({self._format_exc(e)})")
+                        return False
+                for src_path, dst_path in scan.specials:
+                    if not builder.add_special(_arcname(dst_path), os.lstat(src_path)):
+                        skipped += 1
+                if scan.links or scan.specials:
+                    self._stat('links', started, calls=len(scan.links) + len(scan.specials))
+                if skipped:
+                    self._log_info(f"⏭️ {skipped} file speciali non rappresentabili in {self.archive_format}, ignorati")
+
+                builder.close()
+                completed = True
+                # Compressione nel thread engine (1 processo) o attese sul pool, fine compresa: è
+                # sparsa lungo tutto lo stream, quindi va nei contatori ma non nella timeline
+                if self.stats is not None and builder.compress_blocks:
+                    self.stats.add('compress', builder.compress_seconds, calls=builder.compress_blocks,
+                                   nbytes=builder.bytes_out)
+        except ArchiveCancelled:
+            return False
+        except Exception as e:
+            self._log_error(f"Errore archivio: {archive_path} ({self._format_exc(e)})")
+            return False
+        finally:
+            if not completed:
+                if builder is not None:
+                    builder.abort()
+                self._discard_temp(temp_path)
+
+        ratio = builder.bytes_out / scan.total_size * 100 if scan.total_size else 100.0
+        self._log_info(f"🗜️ Archivio {os.path.basename(archive_path)}: {format_bytes(builder.bytes_out)} "
+                       f"({ratio:.0f}% di {format_bytes(scan.total_size)}, {workers} processi)")
+        if not self._queue_commit(temp_path, archive_path):
+            return False
+        if not self._commit_pending(dest_dir):
+            return False
+        if self.on_complete:
+            self.on_complete()
+        return True
+
+    def _archive_write(self, dst, data: bytes):
+        """Scrittura dello stream archivio (throttle sui byte scritti, progresso sui byte letti)"""
+        throttle = self.throttle
+        if throttle is not None:
+            started = time.perf_counter()
+            throttle.consume(len(data), self._should_abort_wait)
+            self._stat('throttle', started)
+            if self.is_cancelled:
+                raise ArchiveCancelled()
+        started = time.perf_counter()
+        dst.write(data)
+        self._stat('write', started, nbytes=len(data))
+
+    def _open_extract_source(self, source: str):
+        """Apre l'archivio sorgente di EXTRACT (None se non è un archivio leggibile)"""
+        started = time.perf_counter()
+        try:
+            archive = open_archive(source)
+        except Exception as e:
+            # Formato non riconosciuto, zip/tar corrotto, permessi
+            self._log_error(f"Archivio non leggibile: {source} ({self._format_exc(e)})")
+            return None
+        self._stat('scan', started)
+        return archive
+
+    def _handle_extract(self, archive, destination: str) -> bool:
+        """Scrive i membri sotto destination: file via temp + rename a batch, link a fine estrazione"""
+        if not self._ensure_extract_dir(destination):
+            return False
+        self._extract_stop = False
+        # Tar compresso: totale ricalcolato a ogni chunk dal rapporto di compressione osservato
+        self._extract_estimate = None if archive.exact_totals else archive.estimated_total
+        deferred = []  # link e hard link: dopo i file (un link non può deviare le scritture)
+        workers = max(1, int(self.num_threads or 1)) if archive.parallel else 1
+        try:
+            if workers > 1 and archive.file_count > 1:
+                ok = self._extract_parallel(archive, destination, workers, deferred)
+            else:
+                ok = self._extract_sequential(archive, destination, deferred)
+        finally:
+            # Come per la copia: i membri completi restano anche se l'estrazione si interrompe
+            committed = self._commit_pending()
+        ok = ok and committed
+        if ok and deferred:
+            ok = self._create_extracted_links(deferred, destination)
+        if archive.skipped:
+            examples = ", ".join(archive.skipped[:3])
+            self._log_info(f"⏭️ {len(archive.skipped)} membri ignorati (percorso non sicuro o tipo "
+                           f"non supportato): {examples}")
+        if not ok:
+            return False
+        # Totali definitivi (per i tar compressi erano stimati)
+        self.total_size = self.processed_size
+        self.file_count = self.file_index
+        self._report_progress()
+        if self.on_complete:
+            self.on_complete()
+        return True
+
+    def _ensure_extract_dir(self, directory: str) -> bool:
+        if directory in self._ready_dirs:
+            return True
+        try:
+            started = time.perf_counter()
+            os.makedirs(directory, exist_ok=True)
+            self._stat('mkdir', started)
+        except OSError as e:
+            self._log_error(f"Errore creazione directory: {directory} ({self._format_exc(e)})")
+            return False
+        self._ready_dirs.add(directory)
+        return True
+
+    def _extract_entry(self, entry, destination: str, deferred: list) -> bool:
+        """Membro che non è un file: cartella subito, link rimandati, file speciali secondo skip_special"""
+        path = os.path.join(destination, entry.path)
+        if entry.kind == DIR:
+            if not self._ensure_extract_dir(path):
+                return False
+            if self._metadata is not None:
+                self._metadata.remember_dir_stat(path, entry.stat)
+            return True
+        if entry.kind == SYMLINK and self.symlinks == 'skip':
+            return True
+        if entry.kind not in (SYMLINK, HARDLINK) and self.skip_special:
+            return True
+        deferred.append(entry)
+        return True
+
+    def _extract_member(self, stream, entry, final_path: str, report: bool = True) -> Optional[str]:
+        """
+        Scrive un membro nel temp accanto a final_path (metadati compresi).
+
+        Returns:
+            Percorso del temp; None se annullato
+        """
+        temp_path = self._temp_path_for(final_path)
+        completed = False
+        try:
+            started = time.perf_counter()
+            with open(temp_path, 'wb') as dst:
+                self._stat('open', started)
+                # Mai più grande del membro: i lettori di zipfile/tarfile allocano il chunk richiesto
+                chunk = min(self._next_chunk_size(self.buffer_size), EXTRACT_CHUNK_MAX, max(entry.size, 1))
+                while True:
+                    self._wait_if_paused()
+                    if self.is_cancelled or self._extract_stop:
+                        return None
+                    started = time.perf_counter()
+                    data = stream.read(chunk)  # decompressione compresa
+                    self._stat('read', started, nbytes=len(data))
+                    if not data:
+                        break
+                    self._write_extracted(dst, data, report)
+                path_times = False
+                if self._metadata is not None:
+                    path_times = self._apply_file_metadata(dst, entry.stat)
+                closing = time.perf_counter()
+            self._stat('close', closing)
+            if path_times:
+                self._metadata.apply_times(temp_path, entry.stat)
+            completed = True
+            return temp_path
+        finally:
+            if not completed:
+                self._discard_temp(temp_path)
+
+    def _write_extracted(self, dst, data: bytes, report: bool):
+        """Scrittura di un chunk estratto; progresso in byte scritti (report=False nei worker zip)"""
+        throttle = self.throttle
+        if throttle is not None:
+            started = time.perf_counter()
+            throttle.consume(len(data), self._should_abort_wait)
+            self._stat('throttle', started)
+        started = time.perf_counter()
+        dst.write(data)
+        self._stat('write', started, nbytes=len(data))
+        with self._extract_lock:
+            self.processed_size += len(data)
+        if report:
+            estimate = self._extract_estimate
+            if estimate is not None:
+                self.total_size = max(self.processed_size, estimate() or 0)
+            self._report_progress()
+
+    def _extract_sequential(self, archive, destination: str, deferred: list) -> bool:
+        """Membri nell'ordine dell'archivio (tar: lo stream non si può riavvolgere)"""
+        try:
+            for entry, stream in archive.iter_entries():
+                if self.is_cancelled:
+                    return False
+                if entry.kind != FILE:
+                    if not self._extract_entry(entry, destination, deferred):
+                        return False
+                    continue
+                final_path = os.path.join(destination, entry.path)
+                if not self._ensure_extract_dir(os.path.dirname(final_path)):
+                    return False
+                self.current_file = os.path.basename(entry.path)
+                self.file_index += 1
+                self.file_count = max(self.file_count, self.file_index)
+                if stream is None:
+                    stream = archive.open(entry)
                 try:
-                    os.rmdir(source)
-                except:
-                    pass
-            
+                    temp_path = self._extract_member(stream, entry, final_path)
+                finally:
+                    stream.close()
+                if temp_path is None:
+                    return False
+                if not self._queue_commit(temp_path, final_path):
+                    return False
             return True
         except Exception as e:
-            self._log_error(f"Errore directory: {source} -> {destination} ({self._format_exc(e)})")
+            self._log_error(f"Errore estrazione: {archive.path} ({self._format_exc(e)})")
             return False
-    
+
+    def _extract_parallel(self, archive, destination: str, workers: int, deferred: list) -> bool:
+        """Zip: membri decompressi da più thread, rename e progresso dal thread engine in ordine"""
+        from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+        def _run(entry, final_path):
+            with archive.open(entry) as stream:
+                return self._extract_member(stream, entry, final_path, report=False)
+
+        pending = collections.deque()
+        ok = False
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='afm-extract') as pool:
+            try:
+                for entry in archive.entries:
+                    if self.is_cancelled:
+                        return False
+                    if entry.kind != FILE:
+                        if not self._extract_entry(entry, destination, deferred):
+                            return False
+                        continue
+                    final_path = os.path.join(destination, entry.path)
+                    if not self._ensure_extract_dir(os.path.dirname(final_path)):
+                        return False
+                    pending.append((entry, final_path, pool.submit(_run, entry, final_path)))
+                    # Due membri per thread in volo: i rename seguono l'ordine dell'archivio
+                    while pending and (pending[0][2].done() or len(pending) >= workers * 2):
+                        if not self._finish_extracted(pending.popleft(), FutureTimeout):
+                            return False
+                while pending:
+                    if not self._finish_extracted(pending.popleft(), FutureTimeout):
+                        return False
+                ok = True
+                return True
+            except Exception as e:
+                self._log_error(f"Errore estrazione: {archive.path} ({self._format_exc(e)})")
+                return False
+            finally:
+                if not ok:
+                    # I worker si fermano al prossimo chunk; i temp già completi vanno scartati
+                    self._extract_stop = True
+                    for _, _, future in pending:
+                        try:
+                            self._discard_temp(future.result())
+                        except Exception:
+                            pass
+
+    def _finish_extracted(self, item, timeout_error) -> bool:
+        """Attende un membro zip (aggiornando il progresso) e ne accoda il rename"""
+        entry, final_path, future = item
+        while True:
+            try:
+                temp_path = future.result(timeout=0.1)
+                break
+            except timeout_error:
+                self._report_progress()
+            except Exception as e:
+                self._log_error(f"Errore estrazione: {entry.path} ({self._format_exc(e)})")
+                return False
+        if temp_path is None:
+            return False
+        self.file_index += 1
+        self.current_file = os.path.basename(entry.path)
+        self._report_progress()
+        return self._queue_commit(temp_path, final_path)
+
+    def _create_extracted_links(self, entries: list, destination: str) -> bool:
+        """Hard link, file speciali e link simbolici estratti (temp + rename come i file)"""
+        ok = True
+        root = os.path.realpath(destination)
+        skipped = 0
+        started = time.perf_counter()
+        # Link simbolici per ultimi: nessuna scrittura successiva passa attraverso di loro
+        for entry in sorted(entries, key=lambda e: e.kind == SYMLINK):
+            if self.is_cancelled:
+                return False
+            dst_path = os.path.join(destination, entry.path)
+            temp_path = None
+            try:
+                if not self._ensure_extract_dir(os.path.dirname(dst_path)):
+                    return False
+                parent = os.path.realpath(os.path.dirname(dst_path))
+                if parent != root and not parent.startswith(root.rstrip(os.sep) + os.sep):
+                    skipped += 1  # cartella raggiunta attraverso un link che esce dalla destinazione
+                    continue
+                if entry.kind == SYMLINK and not link_target_inside(root, parent, entry.linkname):
+                    skipped += 1
+                    continue
+                temp_path = self._temp_path_for(dst_path)
+                if entry.kind == SYMLINK:
+                    os.symlink(entry.linkname, temp_path)
+                elif entry.kind == HARDLINK:
+                    target = os.path.join(destination, entry.linkname)
+                    try:
+                        os.link(target, temp_path)
+                    except OSError:
+                        shutil.copyfile(target, temp_path)  # filesystem senza hard link (FAT, exFAT)
+                elif entry.kind == FIFO:
+                    os.mkfifo(temp_path, entry.mode & 0o777)
+                else:
+                    kind = stat.S_IFCHR if entry.kind == CHRDEV else stat.S_IFBLK
+                    os.mknod(temp_path, kind | (entry.mode & 0o777), os.makedev(entry.devmajor, entry.devminor))
+                if self._metadata is not None and entry.kind != HARDLINK:
+                    self._metadata.apply_entry(temp_path, entry.stat, entry.kind == SYMLINK)
+                os.replace(temp_path, dst_path)
+                temp_path = None
+            except (OSError, NotImplementedError) as e:
+                hint = ""
+                if entry.kind == SYMLINK and os.name == 'nt' and getattr(e, 'winerror', None) == 1314:
+                    hint = " - serve la modalità sviluppatore o l'amministratore; in alternativa link: skip"
+                self._log_error(f"Errore creazione {entry.kind}: {dst_path} ({self._format_exc(e)}){hint}")
+                self._discard_temp(temp_path)
+                ok = False
+        self._stat('links', started, calls=len(entries))
+        if skipped:
+            self._log_info(f"⏭️ {skipped} link che uscirebbero dalla destinazione ignorati")
+        return ok
+
+    def _transfer_entries(self, scan, operation: OperationType) -> bool:
+        """Ricrea link (politica preserve) e FIFO/device (skip_special=False) in destinazione"""
+        move = operation == OperationType.MOVE
+        ok = True
+        entries = [(src, dst, True) for src, dst in scan.links] + [(src, dst, False) for src, dst in scan.specials]
+        started = time.perf_counter()
+        for src_path, dst_path, is_link in entries:
+            if self.is_cancelled:
+                return False
+            temp_path = None
+            try:
+                dst_dir = os.path.dirname(dst_path)
+                if dst_dir not in self._ready_dirs:
+                    os.makedirs(dst_dir, exist_ok=True)
+                    self._ready_dirs.add(dst_dir)
+                    if self._metadata is not None:
+                        self._metadata.remember_dir(os.path.dirname(src_path), dst_dir,
+                                                    scan.source, scan.destination)
+                st = os.lstat(src_path)
+                # Temp + rename come per i file: una voce esistente viene sostituita in modo atomico
+                temp_path = self._temp_path_for(dst_path)
+                if is_link:
+                    target = os.readlink(src_path)
+                    os.symlink(target, temp_path, target_is_directory=os.path.isdir(src_path))
+                elif stat.S_ISFIFO(st.st_mode):
+                    os.mkfifo(temp_path, stat.S_IMODE(st.st_mode))
+                else:
+                    os.mknod(temp_path, st.st_mode, st.st_rdev)
+                if self._metadata is not None:
+                    self._metadata.apply_entry(temp_path, st, is_link)
+                os.replace(temp_path, dst_path)
+                temp_path = None
+                if move and src_path not in scan.copy_only:
+                    os.remove(src_path)
+            except (OSError, NotImplementedError) as e:
+                hint = ""
+                if is_link and os.name == 'nt' and getattr(e, 'winerror', None) == 1314:
+                    hint = " - serve la modalità sviluppatore o l'amministratore; in alternativa link: follow o skip"
+                self._log_error(f"Errore creazione {'link' if is_link else 'file speciale'}: "
+                                f"{src_path} -> {dst_path} ({self._format_exc(e)}){hint}")
+                self._discard_temp(temp_path)
+                ok = False
+
+        # MOVE seguendo i link: il contenuto è stato copiato, sparisce il link (mai il bersaglio)
+        if move and ok:
+            for link_path in scan.followed_links:
+                try:
+                    if os.name == 'nt' and os.path.isdir(link_path):
+                        os.rmdir(link_path)  # link/junction a cartella su Windows
+                    else:
+                        os.remove(link_path)
+                except OSError as e:
+                    self._log_error(f"Errore eliminazione link sorgente: {link_path} ({self._format_exc(e)})")
+                    ok = False
+        self._stat('links', started, calls=len(entries))
+        return ok
+
     def _copy_via_ramdrive(self, source: str, destination: str,
-                          ramdrive_temp_path: str, operation: OperationType) -> bool:
+                          ramdrive_temp_path: str, operation: OperationType,
+                          defer_commit: bool = False) -> bool:
         """Copia file a 2 fasi: Sorgente → RamDrive → Destinazione"""
+        dest_temp = None
         try:
             # Fase 1: Sorgente → RamDrive
             temp_file = os.path.join(ramdrive_temp_path, os.path.basename(source))
             os.makedirs(ramdrive_temp_path, exist_ok=True)
             
+            started = time.perf_counter()
+            source_stat = os.stat(source) if self._metadata is not None else None
             if not self._copy_file_internal(source, temp_file, use_buffer=8 * 1024 * 1024):
                 return False
+            self._stat('ramdrive_stage', started)
             
-            # Fase 2: RamDrive → Destinazione
-            if not self._copy_file_internal(temp_file, destination, use_buffer=self.buffer_size):
+            # Fase 2: RamDrive → Destinazione (su temp nascosto, poi rename)
+            dest_temp = self._temp_path_for(destination)
+            started = time.perf_counter()
+            if not self._copy_file_internal(temp_file, dest_temp, use_buffer=self.buffer_size,
+                                            source_stat=source_stat):
                 try:
                     os.remove(temp_file)
                 except:
                     pass
                 return False
+            self._stat('ramdrive_drain', started)
             
             # Cleanup temp file
+            started = time.perf_counter()
             try:
                 os.remove(temp_file)
             except:
                 pass
+            self._stat('ramdrive_cleanup', started)
             
-            # Se move, cancella source
-            if operation == OperationType.MOVE:
-                try:
-                    os.remove(source)
-                except:
-                    pass
+            # Rename finale; se move, la sorgente viene cancellata dopo il rename
+            source_to_delete = source if operation == OperationType.MOVE else None
+            if not self._queue_commit(dest_temp, destination, source_to_delete):
+                return False
+            dest_temp = None
+            if not defer_commit:
+                return self._commit_pending(os.path.dirname(destination))
             
             return True
         except Exception as e:
             self._log_error(f"Errore copia via RamDrive: {e}")
+            self._discard_temp(dest_temp)
             return False
     
-    def _copy_file_internal(self, source: str, destination: str, use_buffer: int) -> bool:
-        """Copia file con buffer specificato (senza delete source)"""
+    def _copy_file_internal(self, source: str, destination: str, use_buffer: int,
+                            source_stat: Optional[os.stat_result] = None) -> bool:
+        """Copia file con buffer specificato (senza delete source); source_stat = metadati da applicare"""
         try:
+            started = time.perf_counter()
+            path_times = False
             with open(source, 'rb') as src, open(destination, 'wb') as dst:
-                while True:
-                    if self.is_cancelled:
-                        try:
-                            os.remove(destination)
-                        except:
-                            pass
-                        return False
-                    
-                    buffer = src.read(use_buffer)
-                    if not buffer:
-                        break
-                    
-                    dst.write(buffer)
-                    self.processed_size += len(buffer)
-                    self._report_progress()
+                self._stat('open', started, calls=2)
+                completed = self._copy_stream(src, dst, use_buffer)
+                if completed and source_stat is not None and self._metadata is not None:
+                    path_times = self._apply_file_metadata(dst, source_stat)
+                closing = time.perf_counter()
+            self._stat('close', closing, calls=2)
+
+            if not completed:
+                try:
+                    os.remove(destination)
+                except:
+                    pass
+                return False
+            if path_times:
+                self._metadata.apply_times(destination, source_stat)
             
             return True
         except Exception as e:
             self._log_error(f"Errore copia interna: {source} -> {destination} ({self._format_exc(e)})")
-            return False
-            if self.on_complete:
-                self.on_complete()
-            
-            return True
-        
-        except Exception as e:
-            self._log_error(f"Errore copia directory: {e}")
+            try:
+                os.remove(destination)
+            except:
+                pass
             return False
     
+    def _apply_file_metadata(self, dst, source_stat: os.stat_result, src=None) -> bool:
+        """Metadati sul file destinazione ancora aperto; True se i tempi vanno messi sul percorso"""
+        started = time.perf_counter()
+        dst.flush()  # l'ultima scrittura dopo os.utime riporterebbe l'mtime a adesso
+        path_times = self._metadata.apply_fd(dst.fileno(), source_stat,
+                                             src.fileno() if src is not None else None)
+        self._stat('metadata', started)
+        return path_times
+
     def _report_progress(self):
-        """Riporta progress"""
+        """Pubblica lo snapshot del progresso (e lo passa alla callback, se impostata)"""
+        snapshot = ProgressSnapshot(
+            self.current_file,
+            self.total_size,
+            self.processed_size,
+            self.current_speed,
+            int(self.file_index),
+            int(self.file_count),
+        )
+        self.progress = snapshot  # un solo assegnamento di riferimento: atomico
         if self.on_progress:
-            progress_data = {
-                'current_file': self.current_file,
-                'total_size': self.total_size,
-                'processed_size': self.processed_size,
-                'speed': self.current_speed,
-                'percentage': (self.processed_size / max(self.total_size, 1)) * 100,
-                'file_index': int(self.file_index),
-                'file_count': int(self.file_count),
-            }
-            self.on_progress(progress_data)
+            self.on_progress(snapshot.as_dict())
     
     def _log_error(self, message: str):
         """Log errore"""
+        self.error_count += 1
         if self.on_error:
             self.on_error(message)
+
+    def _log_info(self, message: str):
+        """Log informativo"""
+        if self.on_info:
+            self.on_info(message)
@@ -0,0 +1,222 @@
+"""
+Canale IPC tra istanze della GUI (single-instance con inoltro della selezione)
+
+La prima istanza apre un listener locale (named pipe su Windows, socket Unix
+altrove) con multiprocessing.connection; gli avvii successivi dal menu
+contestuale consegnano argv e cwd e terminano in pochi millisecondi, prima di
+importare Tk/customtkinter o l'engine.
+
+Sicurezza: la connessione richiede la chiave per utente salvata nella cartella
+dati (challenge HMAC di multiprocessing.connection) e i messaggi sono JSON, mai
+pickle.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from multiprocessing.connection import Client, Listener
+
+KEY_FILE = '.ipc_key'
+MAX_MESSAGE = 1024 * 1024
+
+
+def _data_dir() -> Path:
+    """Cartella dati utente (stessa di config.json / .storage_cache.json)"""
+    try:
+        local_appdata = Path(os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local')))
+    except Exception:
+        local_appdata = Path.home() / 'AppData' / 'Local'
+    return local_appdata / 'AdvancedFileMover'
+
+
+def _user_tag() -> str:
+    name = os.environ.get('USERNAME') or os.environ.get('USER') or 'user'
+    return ''.join(c for c in name if c.isalnum() or c in '-_')[:32] or 'user'
+
+
+def default_address() -> str:
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\AdvancedFileMover-{_user_tag()}'
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(runtime_dir, f"afm-{os.getuid()}.sock")
+
+
+def _family(address: str) -> str:
+    return 'AF_PIPE' if address.startswith('\\\\') else 'AF_UNIX'
+
+
+def _read_key(create: bool = False) -> Optional[bytes]:
+    """Chiave per utente; la crea (0600, O_EXCL) solo l'istanza primaria"""
+    path = _data_dir() / KEY_FILE
+    for _ in range(20):
+        try:
+            with open(path, 'rb') as f:
+                key = f.read()
+            if len(key) >= 32:
+                return key
+        except FileNotFoundError:
+            if not create:
+                return None
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+            except FileExistsError:
+                continue
+            except OSError:
+                return None
+            key = os.urandom(32)
+            try:
+                os.write(fd, key)
+            finally:
+                os.close(fd)
+            return key
+        except OSError:
+            return None
+        # File appena creato da un'altra istanza e non ancora scritto
+        time.sleep(0.01)
+    return None
+
+
+def send_to_primary(argv: List[str], cwd: Optional[str] = None, wait: float = 0.0,
+                    address: Optional[str] = None) -> bool:
+    """
+    Consegna argv (e cwd) all'istanza primaria.
+
+    Args:
+        wait: Secondi per cui riprovare se l'istanza primaria è ancora in avvio
+    Returns:
+        True se l'istanza primaria ha preso in carico la richiesta
+    """
+    address = address or default_address()
+    payload = json.dumps({
+        'argv': [str(a) for a in argv],
+        'cwd': cwd or os.getcwd(),
+        'pid': os.getpid(),
+    }).encode('utf-8')
+    deadline = time.monotonic() + max(0.0, wait)
+    while True:
+        key = _read_key()
+        if key is not None:
+            try:
+                conn = Client(address, family=_family(address), authkey=key)
+                try:
+                    conn.send_bytes(payload)
+                    return conn.recv_bytes(64) == b'ok'
+                finally:
+                    conn.close()
+            except (OSError, EOFError, ValueError):
+                pass
+            except Exception:
+                # AuthenticationError (chiave rigenerata) o simili: nessuna istanza utilizzabile
+                pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+
+
+class InstanceServer:
+    """Listener dell'istanza primaria; le richieste arrivate prima di set_handler() restano in attesa"""
+
+    def __init__(self, address: Optional[str] = None):
+        self.address = address or default_address()
+        self._listener = None
+        self._handler: Optional[Callable[[dict], None]] = None
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> bool:
+        """False se un'altra istanza attiva possiede già l'indirizzo"""
+        key = _read_key(create=True)
+        if key is None:
+            return False
+        family = _family(self.address)
+        if family == 'AF_UNIX' and os.path.exists(self.address):
+            if self._alive(key):
+                return False
+            try:
+                os.unlink(self.address)  # socket orfano (crash precedente)
+            except OSError:
+                return False
+        try:
+            self._listener = Listener(self.address, family=family, authkey=key)
+        except OSError:
+            return False
+        self._thread = threading.Thread(target=self._accept_loop, name='afm-instance-ipc', daemon=True)
+        self._thread.start()
+        return True
+
+    def _alive(self, key: bytes) -> bool:
+        try:
+            conn = Client(self.address, family=_family(self.address), authkey=key)
+        except Exception:
+            return False
+        try:
+            conn.send_bytes(b'{"ping": true}')
+            conn.recv_bytes(64)
+        except Exception:
+            pass
+        finally:
+            conn.close()
+        return True
+
+    def set_handler(self, handler: Callable[[dict], None]):
+        """Imposta il gestore (chiamato sul thread IPC) e consegna le richieste in attesa"""
+        with self._lock:
+            self._handler = handler
+            pending, self._pending = self._pending, []
+        for request in pending:
+            self._dispatch(handler, request)
+
+    def _dispatch(self, handler, request: dict):
+        try:
+            handler(request)
+        except Exception:
+            pass
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    return
+                continue
+            except Exception:
+                # AuthenticationError: client senza la chiave giusta
+                continue
+            try:
+                request = json.loads(conn.recv_bytes(MAX_MESSAGE).decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError('richiesta non valida')
+                conn.send_bytes(b'ok')
+            except Exception:
+                continue
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            if request.get('ping'):
+                continue
+
+            with self._lock:
+                handler = self._handler
+                if handler is None:
+                    self._pending.append(request)
+                    continue
+            self._dispatch(handler, request)
+
+    def close(self):
+        self._closed = True
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            try:
+                listener.close()
+            except Exception:
+                pass
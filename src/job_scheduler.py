@@ -0,0 +1,401 @@
+"""
+Scheduler job di copia/spostamento con limiti di concorrenza per device
+
+- Coda con priorità (più alta prima) e FIFO a parità di priorità
+- Ogni job occupa uno "slot" sui device di sorgente e destinazione
+- Limiti per device derivati dalla classificazione RamDriveManager.get_storage_type
+  (1 stream per HDD/USB, molti per NVMe/RAM)
+- Job su device disgiunti girano in parallelo; un job in attesa riserva i suoi slot
+  così i job arrivati dopo non lo scavalcano all'infinito
+"""
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .file_operations import FileOperationEngine, OperationType
+from .utils import get_device_key
+
+
+class JobState:
+    """Stati di un TransferJob"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class TransferJob:
+    """Job sottomesso al JobScheduler"""
+
+    def __init__(self, job_id: int, operation: OperationType, source: str,
+                 destination: str, priority: int = 0, options: Optional[dict] = None, scan=None):
+        self.id = job_id
+        self.operation = operation
+        self.source = source
+        self.destination = destination
+        self.priority = priority
+        self.options = dict(options or {})  # Parametri per configure_engine (es. buffer_mb/threads)
+        self.scan = scan  # SourceScan già pronta (piano del chiamante): l'engine non riscansiona
+
+        self.state = JobState.QUEUED
+        self.result: Optional[bool] = None
+        self.last_error: Optional[str] = None
+        self.progress: dict = {}
+        self.devices: Optional[Tuple[str, ...]] = None
+        self.engine: Optional[FileOperationEngine] = None
+
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._cancel_requested = False
+        self._paused = False
+        self._finished = threading.Event()
+
+    def cancel(self):
+        """Annulla il job (in coda: non partirà; in esecuzione: cancel dell'engine)"""
+        self._cancel_requested = True
+        engine = self.engine
+        if engine is not None:
+            engine.cancel()
+
+    def pause(self):
+        self._paused = True
+        engine = self.engine
+        if engine is not None:
+            engine.pause()
+
+    def resume(self):
+        self._paused = False
+        engine = self.engine
+        if engine is not None:
+            engine.resume()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attende la fine del job; ritorna True se terminato entro il timeout"""
+        return self._finished.wait(timeout)
+
+    def to_dict(self) -> dict:
+        """Stato serializzabile (JSON) del job"""
+        return {
+            'id': self.id,
+            'operation': self.operation.value,
+            'source': self.source,
+            'destination': self.destination,
+            'priority': self.priority,
+            'options': dict(self.options),
+            'state': self.state,
+            'result': self.result,
+            'paused': self._paused,
+            'last_error': self.last_error,
+            'devices': list(self.devices or ()),
+            'progress': dict(self.progress),
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobScheduler:
+    """Coda di job con limiti di stream concorrenti per device"""
+
+    # Stream concorrenti per classe di storage (chiavi di RamDriveManager.get_storage_type)
+    DEVICE_CONCURRENCY = {
+        'ram': 16,
+        'nvme': 8,
+        'ssd': 4,
+        'nas': 2,
+        'usb': 1,
+        'hdd': 1,
+    }
+    DEFAULT_CONCURRENCY = 1
+
+    def __init__(self,
+                 ramdrive_manager=None,
+                 engine_factory: Optional[Callable[[], FileOperationEngine]] = None,
+                 device_limits: Optional[Dict[str, int]] = None,
+                 storage_type_resolver: Optional[Callable[[str], str]] = None,
+                 bandwidth_manager=None,
+                 metrics_exporter=None):
+        """
+        Args:
+            ramdrive_manager: RamDriveManager per la classificazione (creato lazy se None)
+            engine_factory: Crea l'engine per ogni job (default FileOperationEngine())
+            device_limits: Override dei limiti per classe di storage
+            storage_type_resolver: path -> classe storage (default ramdrive_manager.get_storage_type)
+            bandwidth_manager: BandwidthManager opzionale (limiti di banda per job/device)
+            metrics_exporter: MetricsExporter opzionale (metriche dei job + profondità coda)
+        """
+        self._ramdrive_manager = ramdrive_manager
+        self.engine_factory = engine_factory or FileOperationEngine
+        self.device_limits = dict(self.DEVICE_CONCURRENCY)
+        if device_limits:
+            self.device_limits.update(device_limits)
+        self._storage_type_resolver = storage_type_resolver
+        self.bandwidth_manager = bandwidth_manager
+        self.metrics_exporter = metrics_exporter
+        if metrics_exporter is not None:
+            metrics_exporter.add_queue('scheduler', self.queue_depth)
+
+        self._lock = threading.Condition()
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._queue: List[Tuple[int, int, TransferJob]] = []  # (-priority, seq, job)
+        self._jobs: Dict[int, TransferJob] = {}
+        self._running: Dict[str, int] = {}  # device -> stream attivi
+        self._device_caps: Dict[str, int] = {}
+        self._shutdown = False
+
+        # Callback (chiamate dai thread dello scheduler)
+        self.on_job_update: Optional[Callable[[TransferJob], None]] = None
+        self.on_job_progress: Optional[Callable[[TransferJob, dict], None]] = None
+        # Configura l'engine di un job prima dell'avvio (sul thread del job: può essere lenta)
+        self.configure_engine: Optional[Callable[[TransferJob, FileOperationEngine], None]] = None
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='afm-scheduler', daemon=True)
+        self._dispatcher.start()
+
+    # --- API pubblica -------------------------------------------------------
+
+    def submit(self, operation, source: str, destination: str, priority: int = 0,
+               options: Optional[dict] = None, scan=None) -> TransferJob:
+        """Accoda un job copy/move/archive/extract; ritorna subito il TransferJob"""
+        if not isinstance(operation, OperationType):
+            operation = OperationType(str(operation).lower())
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("JobScheduler chiuso")
+            job = TransferJob(next(self._ids), operation, source, destination, priority, options, scan)
+            self._jobs[job.id] = job
+            self._queue.append((-int(priority), next(self._seq), job))
+            self._queue.sort(key=lambda item: (item[0], item[1]))
+            self._lock.notify_all()
+        self._notify(job)
+        return job
+
+    def get(self, job_id: int) -> Optional[TransferJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[TransferJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        with self._lock:
+            self._lock.notify_all()
+        return True
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """Cambia la priorità di un job ancora in coda; False se già avviato o sconosciuto"""
+        with self._lock:
+            for index, (_, seq, job) in enumerate(self._queue):
+                if job.id == job_id:
+                    job.priority = int(priority)
+                    self._queue[index] = (-job.priority, seq, job)
+                    self._queue.sort(key=lambda item: (item[0], item[1]))
+                    self._lock.notify_all()
+                    break
+            else:
+                return False
+        self._notify(job)
+        return True
+
+    def queue_depth(self) -> int:
+        """Job in coda (non ancora avviati)"""
+        with self._lock:
+            return len(self._queue)
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == JobState.RUNNING)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Attende che tutti i job sottomessi siano terminati"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in self.jobs():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, cancel_pending: bool = False, wait: bool = True):
+        """Chiude lo scheduler (opzionalmente annullando i job in coda/in corso)"""
+        with self._lock:
+            self._shutdown = True
+            jobs = list(self._jobs.values())
+            self._lock.notify_all()
+        if cancel_pending:
+            for job in jobs:
+                job.cancel()
+        if wait:
+            self.wait_all()
+            self._dispatcher.join(timeout=5)
+
+    def forget_finished(self):
+        """Rimuove dallo storico i job terminati"""
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.state in JobState.FINISHED]:
+                self._jobs.pop(job_id, None)
+
+    # --- Device -------------------------------------------------------------
+
+    def _storage_type(self, path: str) -> str:
+        resolver = self._storage_type_resolver
+        if resolver is None:
+            if self._ramdrive_manager is None:
+                from .ramdrive_handler import RamDriveManager
+                self._ramdrive_manager = RamDriveManager()
+            resolver = self._ramdrive_manager.get_storage_type
+        try:
+            return str(resolver(path) or 'hdd')
+        except Exception:
+            return 'hdd'
+
+    def _resolve_devices(self, job: TransferJob) -> Tuple[str, ...]:
+        """Device coinvolti nel job (fuori dal lock: la classificazione può essere lenta)"""
+        devices = []
+        for path in (job.source, job.destination):
+            key = get_device_key(path)
+            if key not in devices:
+                devices.append(key)
+            if key not in self._device_caps:
+                storage_type = self._storage_type(path)
+                self._device_caps[key] = max(1, int(self.device_limits.get(storage_type, self.DEFAULT_CONCURRENCY)))
+        return tuple(devices)
+
+    # --- Dispatch -----------------------------------------------------------
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                while not self._shutdown and not self._has_work():
+                    self._lock.wait()
+                if self._shutdown and not self._queue:
+                    return
+                unresolved = [job for _, _, job in self._queue if job.devices is None]
+
+            for job in unresolved:
+                job.devices = self._resolve_devices(job)
+
+            started = []
+            with self._lock:
+                reserved: Dict[str, int] = {}
+                remaining = []
+                for item in self._queue:
+                    job = item[2]
+                    if job._cancel_requested:
+                        self._finish(job, JobState.CANCELLED, False)
+                        continue
+                    if job.devices is None:
+                        remaining.append(item)
+                        continue
+
+                    free = all(
+                        self._running.get(dev, 0) + reserved.get(dev, 0) < self._device_caps.get(dev, 1)
+                        for dev in job.devices
+                    )
+                    if free:
+                        for dev in job.devices:
+                            self._running[dev] = self._running.get(dev, 0) + 1
+                        job.state = JobState.RUNNING
+                        job.started_at = time.time()
+                        started.append(job)
+                    else:
+                        # Riserva gli slot: i job successivi non possono prendere l'ultimo posto
+                        for dev in job.devices:
+                            reserved[dev] = reserved.get(dev, 0) + 1
+                        remaining.append(item)
+                self._queue = remaining
+                if not started and not unresolved:
+                    # Nessun job avviabile: attendi la fine di un job o un nuovo submit
+                    self._lock.wait()
+
+            for job in started:
+                threading.Thread(target=self._run_job, args=(job,), name=f'afm-job-{job.id}', daemon=True).start()
+                self._notify(job)
+
+    def _has_work(self) -> bool:
+        return bool(self._queue)
+
+    def _run_job(self, job: TransferJob):
+        success = False
+        try:
+            engine = self.engine_factory()
+            job.engine = engine
+            factory_on_error = engine.on_error  # callback impostata dalla factory: resta attiva
+
+            def _on_error(message, job=job):
+                job.last_error = message
+                if factory_on_error:
+                    factory_on_error(message)
+
+            def _on_progress(data, job=job):
+                job.progress = data
+                callback = self.on_job_progress
+                if callback:
+                    try:
+                        callback(job, data)
+                    except Exception:
+                        pass
+
+            engine.set_error_callback(_on_error)
+            engine.set_progress_callback(_on_progress)
+            if self.bandwidth_manager is not None:
+                engine.throttle = self.bandwidth_manager.throttle_for(job.source, job.destination)
+            if self.metrics_exporter is not None:
+                engine.metrics = self.metrics_exporter
+            if self.configure_engine is not None:
+                self.configure_engine(job, engine)
+            if job._paused:
+                engine.pause()
+            if job._cancel_requested:
+                engine.cancel()
+
+            if job.operation == OperationType.MOVE:
+                success = engine.move(job.source, job.destination, scan=job.scan)
+            elif job.operation == OperationType.ARCHIVE:
+                success = engine.archive(job.source, job.destination, scan=job.scan)
+            elif job.operation == OperationType.EXTRACT:
+                success = engine.extract(job.source, job.destination, scan=job.scan)
+            else:
+                success = engine.copy(job.source, job.destination, scan=job.scan)
+        except Exception as e:
+            job.last_error = str(e)
+            success = False
+        finally:
+            if success:
+                state = JobState.DONE
+            elif job._cancel_requested:
+                state = JobState.CANCELLED
+            else:
+                state = JobState.FAILED
+            with self._lock:
+                for dev in job.devices or ():
+                    self._running[dev] = max(0, self._running.get(dev, 0) - 1)
+                self._finish(job, state, success)
+                self._lock.notify_all()
+
+    def _finish(self, job: TransferJob, state: str, success: bool):
+        """Chiude il job (chiamare con il lock acquisito)"""
+        job.state = state
+        job.result = bool(success)
+        job.finished_at = time.time()
+        job._finished.set()
+        threading.Thread(target=self._notify, args=(job,), daemon=True).start()
+
+    def _notify(self, job: TransferJob):
+        callback = self.on_job_update
+        if callback:
+            try:
+                callback(job)
+            except Exception:
+                pass
@@ -0,0 +1,207 @@
+"""
+Conservazione dei metadati (tempi, permessi, attributi estesi) sulla destinazione
+
+- File: applicati sul descrittore del temp appena scritto, prima della chiusura
+  (os.utime / os.fchmod / os.setxattr su fd): nessuna risoluzione di percorso in
+  più e il rename atomico porta con sé i metadati
+- Cartelle: stat della sorgente al primo incontro (prima che un MOVE la svuoti),
+  applicazione in un unico passaggio a fine operazione, quando i file creati al
+  loro interno non ne cambiano più l'mtime
+- Windows: os.utime non accetta fd, i tempi vanno sul percorso dopo la chiusura;
+  i permessi POSIX non esistono e l'attributo sola lettura non viene copiato
+  (bloccherebbe fsync e sovrascritture successive)
+- xattr (Linux; comprendono le ACL POSIX system.posix_acl_*): permesso negato o
+  filesystem senza supporto non fanno fallire il file, un solo avviso per tipo
+"""
+import errno
+import os
+import stat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PRESERVE_OPTIONS = ('times', 'mode', 'xattrs')
+DEFAULT_PRESERVE = frozenset({'times', 'mode'})
+
+_FD_UTIME = os.utime in os.supports_fd
+_LINK_UTIME = os.utime in os.supports_follow_symlinks
+_HAS_CHMOD = os.name != 'nt'
+_HAS_XATTR = hasattr(os, 'listxattr')
+
+
+def parse_preserve(value) -> frozenset:
+    """
+    Metadati da conservare.
+
+    Args:
+        value: None / 'default', 'none', 'all' o lista separata da virgole (times,mode,xattrs);
+               anche un iterabile di nomi
+    Raises:
+        ValueError: nome sconosciuto
+    """
+    if value is None:
+        return DEFAULT_PRESERVE
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('', 'default'):
+            return DEFAULT_PRESERVE
+        if text == 'none':
+            return frozenset()
+        if text == 'all':
+            return frozenset(PRESERVE_OPTIONS)
+        names = [name.strip() for name in text.split(',') if name.strip()]
+    else:
+        names = [str(name).strip().lower() for name in value]
+    unknown = [name for name in names if name not in PRESERVE_OPTIONS]
+    if unknown:
+        raise ValueError(f"metadati sconosciuti: {', '.join(unknown)} (ammessi: {', '.join(PRESERVE_OPTIONS)}, all, none)")
+    return frozenset(names)
+
+
+class MetadataCopier:
+    """Metadati di una singola operazione dell'engine (file subito, cartelle a fine job)"""
+
+    def __init__(self, preserve: Iterable[str]):
+        preserve = frozenset(preserve)
+        self.times = 'times' in preserve
+        self.mode = 'mode' in preserve and _HAS_CHMOD
+        self.xattrs = 'xattrs' in preserve and _HAS_XATTR
+        # Permessi con cui nascono i temp (0o666 & ~umask), letti dal primo file: chi ha già
+        # quei permessi (il caso comune) non costa un fchmod
+        self._created_mode: Optional[int] = None
+        # cartella destinazione -> (cartella sorgente, stat, xattr letti al primo incontro)
+        self._dirs: Dict[str, Tuple[str, os.stat_result, Optional[List[Tuple[str, bytes]]]]] = {}
+        self.failures = 0
+        self._warnings: Dict[str, str] = {}  # tipo -> primo errore
+
+    @property
+    def enabled(self) -> bool:
+        return self.times or self.mode or self.xattrs
+
+    # --- File -------------------------------------------------------------------
+
+    def apply_fd(self, dst_fd: int, st: os.stat_result, src_fd: Optional[int] = None) -> bool:
+        """
+        Metadati sul descrittore del file destinazione (dopo l'ultima scrittura e il flush).
+
+        Returns:
+            True se i tempi vanno ancora applicati sul percorso dopo la chiusura (Windows)
+        """
+        if self.xattrs and src_fd is not None:
+            self._copy_xattrs(self._read_xattrs(src_fd), dst_fd)
+        if self.mode:
+            mode = stat.S_IMODE(st.st_mode)
+            try:
+                if self._created_mode is None:
+                    self._created_mode = stat.S_IMODE(os.fstat(dst_fd).st_mode)
+                if mode != self._created_mode:
+                    os.fchmod(dst_fd, mode)
+            except OSError as e:
+                self._warn('mode', e)
+        if self.times:
+            if not _FD_UTIME:
+                return True
+            try:
+                os.utime(dst_fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+            except OSError as e:
+                self._warn('times', e)
+        return False
+
+    def apply_times(self, path: str, st: os.stat_result):
+        """Tempi sul percorso (file già chiuso: fallback di apply_fd su Windows)"""
+        try:
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        except OSError as e:
+            self._warn('times', e)
+
+    def apply_entry(self, path: str, st: os.stat_result, is_link: bool):
+        """Link simbolici e file speciali ricreati (sul percorso, senza aprirli)"""
+        if is_link:
+            # I permessi dei link non contano; i tempi solo dove utime non segue il link
+            if self.times and _LINK_UTIME:
+                try:
+                    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=False)
+                except (OSError, NotImplementedError) as e:
+                    self._warn('times', e)
+            return
+        if self.mode:
+            try:
+                os.chmod(path, stat.S_IMODE(st.st_mode))
+            except OSError as e:
+                self._warn('mode', e)
+        if self.times:
+            self.apply_times(path, st)
+
+    # --- Cartelle ---------------------------------------------------------------
+
+    def remember_dir(self, src_dir: str, dst_dir: str, src_root: str, dst_root: str):
+        """Registra la cartella e gli antenati fino alla radice (stat subito, applicazione differita)"""
+        while dst_dir not in self._dirs:
+            try:
+                st = os.stat(src_dir)
+            except OSError:
+                return
+            self._dirs[dst_dir] = (src_dir, st, self._read_xattrs(src_dir) if self.xattrs else None)
+            if os.path.normcase(src_dir) == os.path.normcase(src_root) or dst_dir == dst_root:
+                return
+            parent_src, parent_dst = os.path.dirname(src_dir), os.path.dirname(dst_dir)
+            if parent_src == src_dir or parent_dst == dst_dir:
+                return
+            src_dir, dst_dir = parent_src, parent_dst
+
+    def remember_dir_stat(self, dst_dir: str, st):
+        """Cartella con metadati già noti (membro d'archivio): applicazione a fine operazione"""
+        self._dirs[dst_dir] = ('', st, None)
+
+    def apply_dirs(self) -> int:
+        """Passaggio unico sulle cartelle registrate; ritorna quante sono state aggiornate"""
+        pending, self._dirs = self._dirs, {}
+        applied = 0
+        for dst_dir, (_, st, attributes) in pending.items():
+            if attributes:
+                self._copy_xattrs(attributes, dst_dir)
+            if self.mode:
+                try:
+                    os.chmod(dst_dir, stat.S_IMODE(st.st_mode))
+                except OSError as e:
+                    self._warn('mode', e)
+            if self.times:
+                self.apply_times(dst_dir, st)
+            applied += 1
+        return applied
+
+    # --- xattr ------------------------------------------------------------------
+
+    def _read_xattrs(self, target) -> Optional[List[Tuple[str, bytes]]]:
+        try:
+            names = os.listxattr(target)
+        except OSError as e:
+            if e.errno not in (errno.ENOTSUP, errno.EOPNOTSUPP):
+                self._warn('xattrs', e)
+            return None
+        attributes = []
+        for name in names:
+            try:
+                attributes.append((name, os.getxattr(target, name)))
+            except OSError as e:
+                self._warn('xattrs', e)
+        return attributes
+
+    def _copy_xattrs(self, attributes: Optional[List[Tuple[str, bytes]]], target):
+        for name, value in attributes or ():
+            try:
+                os.setxattr(target, name, value)
+            except OSError as e:
+                # security.* / trusted.* senza privilegi, filesystem senza xattr
+                self._warn('xattrs', e)
+
+    # --- Avvisi -----------------------------------------------------------------
+
+    def _warn(self, kind: str, error: OSError):
+        self.failures += 1
+        self._warnings.setdefault(kind, f"{getattr(error, 'strerror', None) or error}")
+
+    def summary(self) -> Optional[str]:
+        """Avviso unico di fine operazione (None se tutto è stato conservato)"""
+        if not self._warnings:
+            return None
+        details = ", ".join(f"{kind}: {message}" for kind, message in sorted(self._warnings.items()))
+        return f"⚠️ Metadati non conservati in {self.failures} casi ({details})"
@@ -0,0 +1,299 @@
+"""
+Esportazione metriche di trasferimento (JSON Lines e Prometheus textfile)
+
+Un MetricsExporter si aggancia a uno o più engine (engine.metrics = exporter) e
+scrive a intervalli regolari e a fine job:
+- JSON Lines: un record per riga (job_start / progress / job_end), in append con una
+  sola write per riga (le righe non si mescolano tra processi)
+- Prometheus textfile (node_exporter --collector.textfile.directory): file riscritto
+  per intero su temp + os.replace, quindi lo scraper non legge mai un file a metà
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class MetricsExporter:
+    """Campiona gli engine attivi e scrive le metriche su file"""
+
+    DEFAULT_INTERVAL = 10.0
+    PREFIX = 'afm'
+
+    def __init__(self, jsonl_path: Optional[str] = None, prom_path: Optional[str] = None,
+                 interval: float = DEFAULT_INTERVAL,
+                 storage_type_resolver: Optional[Callable[[str], str]] = None,
+                 instance: Optional[str] = None):
+        """
+        Args:
+            jsonl_path: File JSON Lines (append); None = disattivato
+            prom_path: File .prom per il textfile collector; None = disattivato
+            interval: Secondi tra due campionamenti durante i job
+            storage_type_resolver: path -> classe storage (default StorageProbe/RamDriveManager)
+            instance: Etichetta 'instance' (default nome host)
+        """
+        self.jsonl_path = jsonl_path or None
+        self.prom_path = prom_path or None
+        self.interval = max(0.5, float(interval or self.DEFAULT_INTERVAL))
+        self._storage_type_resolver = storage_type_resolver
+        self._ramdrive_manager = None
+        self.instance = instance or _hostname()
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, dict] = {}  # id(engine) -> stato job
+        self._queues: Dict[str, Callable[[], int]] = {}
+        self._wakeup = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+        # Contatori cumulativi del processo (sopravvivono ai singoli job)
+        self.jobs_succeeded = 0
+        self.jobs_failed = 0
+        self.bytes_total = 0
+        self.files_total = 0
+        self.errors_total = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.jsonl_path or self.prom_path)
+
+    def add_queue(self, name: str, depth: Callable[[], int]):
+        """Registra una coda esterna da esportare (es. 'scheduler' -> JobScheduler.queue_depth)"""
+        with self._lock:
+            self._queues[name] = depth
+
+    # --- Hook chiamati dall'engine -----------------------------------------
+
+    def job_started(self, engine, source: str, destination: str, operation):
+        job = {
+            'id': next(self._ids),
+            'engine': engine,
+            'operation': getattr(operation, 'value', str(operation)),
+            'source': source,
+            'destination': destination,
+            'source_class': self._storage_class(source),
+            'dest_class': self._storage_class(destination),
+            'started': time.time(),
+            'last_sample': (time.monotonic(), 0),
+            'throughput': 0.0,
+        }
+        with self._lock:
+            self._jobs[id(engine)] = job
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name='afm-metrics', daemon=True)
+                self._thread.start()
+        self._write(job, 'job_start')
+
+    def job_finished(self, engine, success: bool):
+        with self._lock:
+            job = self._jobs.pop(id(engine), None)
+            if job is None:
+                return
+            if success:
+                self.jobs_succeeded += 1
+            else:
+                self.jobs_failed += 1
+            self.bytes_total += int(engine.processed_size or 0)
+            self.files_total += int(engine.file_index or 0)
+            self.errors_total += int(getattr(engine, 'error_count', 0) or 0)
+            self._wakeup.notify_all()
+        job['success'] = bool(success)
+        self._write(job, 'job_end')
+
+    # --- Campionamento ------------------------------------------------------
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                self._wakeup.wait(self.interval)
+                if not self._jobs:
+                    self._thread = None
+                    return
+                jobs = list(self._jobs.values())
+            for job in jobs:
+                self._write(job, 'progress')
+
+    def _storage_class(self, path: str) -> str:
+        try:
+            resolver = self._storage_type_resolver
+            if resolver is None:
+                # Misura StorageProbe già applicata da get_storage_type (usb/nas esclusi)
+                if self._ramdrive_manager is None:
+                    from .ramdrive_handler import RamDriveManager
+                    self._ramdrive_manager = RamDriveManager()
+                resolver = self._ramdrive_manager.get_storage_type
+            return str(resolver(path) or 'unknown')
+        except Exception:
+            return 'unknown'
+
+    def _queue_depths(self, engine) -> Dict[str, int]:
+        depths = {
+            'rename': sum(len(batch) for batch in list(engine._pending_commits.values())),
+        }
+        deleter = engine._deleter
+        depths['delete'] = deleter.pending() if deleter is not None else 0
+        with self._lock:
+            queues = dict(self._queues)
+        for name, depth in queues.items():
+            try:
+                depths[name] = int(depth())
+            except Exception:
+                pass
+        return depths
+
+    def _record(self, job: dict, event: str) -> dict:
+        engine = job['engine']
+        now = time.monotonic()
+        processed = int(engine.processed_size or 0)
+        last_time, last_bytes = job['last_sample']
+        if now - last_time > 0.05:
+            job['throughput'] = max(0.0, (processed - last_bytes) / (now - last_time))
+            job['last_sample'] = (now, processed)
+        elapsed = max(time.time() - job['started'], 1e-9)
+
+        record = {
+            'ts': time.time(),
+            'event': event,
+            'instance': self.instance,
+            'job': job['id'],
+            'operation': job['operation'],
+            'source': job['source'],
+            'destination': job['destination'],
+            'source_class': job['source_class'],
+            'dest_class': job['dest_class'],
+            'bytes_processed': processed,
+            'bytes_total': int(engine.total_size or 0),
+            'files_processed': int(engine.file_index or 0),
+            'files_total': int(engine.file_count or 0),
+            'errors': int(getattr(engine, 'error_count', 0) or 0),
+            'throughput_bps': job['throughput'],
+            'avg_throughput_bps': processed / elapsed,
+            'elapsed': elapsed,
+            'paused': bool(engine.is_paused),
+            'queue_depths': self._queue_depths(engine),
+        }
+        if event == 'job_end':
+            record['success'] = job.get('success', False)
+            record['cancelled'] = bool(engine.is_cancelled)
+            stats = engine.get_stats()
+            if stats is not None:
+                record['phases'] = stats['phases']
+        return record
+
+    # --- Scrittura ----------------------------------------------------------
+
+    def _write(self, job: dict, event: str):
+        if not self.enabled:
+            return
+        try:
+            record = self._record(job, event)
+        except Exception:
+            return
+        with self._write_lock:
+            if self.jsonl_path:
+                self._append_jsonl(record)
+            if self.prom_path:
+                self._write_prometheus(record)
+
+    def _append_jsonl(self, record: dict):
+        try:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+            directory = os.path.dirname(os.path.abspath(self.jsonl_path))
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.jsonl_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def _write_prometheus(self, record: dict):
+        try:
+            text = self.format_prometheus(record)
+            directory = os.path.dirname(os.path.abspath(self.prom_path))
+            os.makedirs(directory, exist_ok=True)
+            # Il textfile collector ignora i file che non finiscono in .prom: il temp non viene letto
+            temp_path = f"{self.prom_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(text)
+            os.replace(temp_path, self.prom_path)
+        except OSError:
+            pass
+
+    def format_prometheus(self, last: dict) -> str:
+        """Testo per il textfile collector: job attivi + contatori cumulativi del processo"""
+        p = self.PREFIX
+        with self._lock:
+            active = list(self._jobs.values())
+            counters = (self.jobs_succeeded, self.jobs_failed, self.bytes_total,
+                        self.files_total, self.errors_total)
+
+        records = []
+        for job in active:
+            records.append(last if job['id'] == last['job'] else self._record(job, 'progress'))
+        if last['event'] == 'job_end':
+            records.append(last)
+
+        inst = self.instance
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items())
+                lines.append(f"{p}_{name}{{{label_text}}} {_number(value)}")
+
+        def job_labels(r, **extra):
+            labels = {'instance': inst, 'job_id': r['job'], 'operation': r['operation']}
+            labels.update(extra)
+            return labels
+
+        metric('job_info', 'gauge', 'Job di trasferimento (1 = attivo, 0 = terminato)',
+               [(job_labels(r, source_class=r['source_class'], dest_class=r['dest_class']),
+                 0 if r['event'] == 'job_end' else 1) for r in records])
+        metric('job_bytes_processed', 'gauge', 'Bytes copiati dal job', [(job_labels(r), r['bytes_processed']) for r in records])
+        metric('job_bytes_total', 'gauge', 'Bytes da copiare nel job', [(job_labels(r), r['bytes_total']) for r in records])
+        metric('job_files_processed', 'gauge', 'File elaborati dal job', [(job_labels(r), r['files_processed']) for r in records])
+        metric('job_files_total', 'gauge', 'File del job', [(job_labels(r), r['files_total']) for r in records])
+        metric('job_errors', 'gauge', 'Errori del job', [(job_labels(r), r['errors']) for r in records])
+        metric('job_throughput_bytes_per_second', 'gauge', 'Throughput dell\'ultimo intervallo',
+               [(job_labels(r), r['throughput_bps']) for r in records])
+        metric('job_avg_throughput_bytes_per_second', 'gauge', 'Throughput medio del job',
+               [(job_labels(r), r['avg_throughput_bps']) for r in records])
+        metric('job_elapsed_seconds', 'gauge', 'Durata del job', [(job_labels(r), r['elapsed']) for r in records])
+        metric('queue_depth', 'gauge', 'Profondità delle code (rename, delete, scheduler)',
+               [(job_labels(r, queue=name), depth) for r in records for name, depth in r['queue_depths'].items()])
+
+        succeeded, failed, total_bytes, total_files, total_errors = counters
+        metric('jobs_completed_total', 'counter', 'Job terminati dall\'avvio del processo',
+               [({'instance': inst, 'result': 'success'}, succeeded), ({'instance': inst, 'result': 'failure'}, failed)])
+        metric('bytes_transferred_total', 'counter', 'Bytes copiati dai job terminati', [({'instance': inst}, total_bytes)])
+        metric('files_transferred_total', 'counter', 'File elaborati dai job terminati', [({'instance': inst}, total_files)])
+        metric('errors_total', 'counter', 'Errori dei job terminati', [({'instance': inst}, total_errors)])
+        metric('last_update_timestamp_seconds', 'gauge', 'Ultima scrittura del file', [({'instance': inst}, last['ts'])])
+        return "\n".join(lines) + "\n"
+
+
+def _hostname() -> str:
+    try:
+        import socket
+        return socket.gethostname()
+    except Exception:
+        return 'localhost'
+
+
+def _label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
@@ -10,6 +10,7 @@ from typing import Optional, List, Tuple, Dict
 from pathlib import Path
 from ctypes import sizeof
 from .utils import get_command_output, format_bytes
+from .storage_probe import effective_storage_class, get_storage_probe
 
 
 class RamDriveManager:
@@ -22,6 +23,7 @@ class RamDriveManager:
         self._all_drives_cache: Dict[str, str] = {}  # Cache: lettera -> tipo (ram, ssd, hdd, nvme, usb)
         self._drives_scanned = False
         self._classification_cache: Dict[str, str] = {}  # Cache per classificazione accurata (più lenta)
+        self._overrides: Dict[str, str] = {}  # Override manuali da config.json (vincono su tutto)
         
         # Carica cache persistente dai precedenti avvii
         self._load_persistent_cache()
@@ -156,6 +158,7 @@ class RamDriveManager:
                         # Salta il comment field
                         if letter != "comment" and storage_type in ["ram", "ssd", "hdd", "nvme", "usb", "nas"]:
                             self._classification_cache[letter] = storage_type
+                            self._overrides[str(letter).upper().strip(':')[:1]] = storage_type
         except:
             pass
     
@@ -990,15 +993,19 @@ class RamDriveManager:
             return "hdd"
         
         # Estrai lettera drive
-        letter = os.path.splitdrive(path)[0].upper()
-        if not letter or len(letter) < 1:
-            return "hdd"
-        
-        letter = letter[0]
+        letter = os.path.splitdrive(path)[0].upper()[:1]
+        if letter in self._overrides:
+            return self._overrides[letter]
+
+        # Percorsi di rete (UNC) / senza lettera (POSIX): classe dal collegamento, poi la misura
+        if path.startswith('\\\\'):
+            return "nas"
+        if not letter:
+            return self._with_measurement(path, self._posix_storage_type(path))
         
         # PRIMA: Controlla cache di classificazione accurata
         if letter in self._classification_cache:
-            return self._classification_cache[letter]
+            return self._with_measurement(path, self._classification_cache[letter])
         
         # SECONDA: Ottieni classificazione veloce (QueryDosDevice - senza PowerShell)
         drives = self.scan_all_drives()
@@ -1007,6 +1014,10 @@ class RamDriveManager:
         # TERZA: Se è SSD/HDD generico, prova PowerShell lazy per accuratezza (NVME vs SSD)
         # Ma NON bloccante - se fallisce, usa il valore base
         if base_type in ["ssd", "hdd"]:
+            # Volume già misurato (StorageProbe): la misura distingue già NVMe/SSD/HDD
+            measured = self._with_measurement(path, None)
+            if measured:
+                return measured
             try:
                 accurate_type = self._detect_nvme_ssd_hdd_lazy(letter)
                 if accurate_type:  # Solo se PowerShell ritorna un valore
@@ -1017,7 +1028,44 @@ class RamDriveManager:
         
         # Salva nella cache il tipo base
         self._classification_cache[letter] = base_type
-        return base_type
+        return self._with_measurement(path, base_type)
+
+    def get_cached_storage_type(self, path: str) -> str:
+        """Come get_storage_type ma senza PowerShell (sicuro sul thread UI / all'avvio)
+        Override > usb/nas dal collegamento > misura StorageProbe > cache accurata (anche persistente)
+        > classificazione veloce. Non scrive nella cache accurata: il refresh in background resta necessario."""
+        if not path:
+            return "hdd"
+
+        letter = os.path.splitdrive(path)[0].upper()[:1]
+        if letter in self._overrides:
+            return self._overrides[letter]
+
+        if path.startswith('\\\\'):
+            return "nas"
+        if not letter:
+            return self._with_measurement(path, self._posix_storage_type(path))
+        if letter in self._classification_cache:
+            return self._with_measurement(path, self._classification_cache[letter])
+        return self._with_measurement(path, self.scan_all_drives().get(letter, "hdd"))
+
+    def _with_measurement(self, path: str, heuristic: Optional[str]) -> Optional[str]:
+        """Classe misurata (StorageProbe) al posto di quella euristica, tranne usb/nas:
+        il collegamento decide i limiti di stream, la misura solo buffer e thread"""
+        try:
+            return effective_storage_class(heuristic, get_storage_probe().cached(path))
+        except Exception:
+            return heuristic
+
+    def _posix_storage_type(self, path: str) -> str:
+        """Percorsi senza lettera: su Linux mountinfo + sysfs (nessun processo, ok sul thread UI)"""
+        if not sys.platform.startswith('linux'):
+            return "hdd"
+        try:
+            from .storage_detector import get_linux_resolver
+            return get_linux_resolver().storage_class(path) or "hdd"
+        except Exception:
+            return "hdd"
 
     def _extract_drive_letter(self, path: str) -> Optional[str]:
         try:
@@ -2,15 +2,227 @@
 Storage Hardware Detector - Rileva il tipo di storage e ottimizza i parametri
 
 Windows 11+: Usa PowerShell (wmic è deprecato)
-Linux: Analizza /sys/block/ e df
+Linux: /proc/self/mountinfo + /sys/class/block, senza processi esterni
 macOS: Usa diskutil
+
+Linux, dal percorso alla classe di storage:
+- mount del percorso da /proc/self/mountinfo (st_dev del primo antenato
+  esistente, poi il mount point più lungo che lo contiene)
+- tmpfs/ramfs = RAM, filesystem di rete (nfs, cifs, 9p, ceph, fuse.sshfs...) = NAS,
+  overlay = classe della sua upperdir
+- device a blocchi risolto in /sys/dev/block: partizione -> disco, dm/md -> slaves
+  (vince il membro più lento), loop -> classe del file di backing
+- disco: zram/ram = RAM, nbd/rbd/iSCSI/NVMe-oF = NAS, USB/removibile/SD = USB,
+  nvme = NVMe, queue/rotational 0/1 = SSD/HDD
+Classificazione in cache per mount ID (mountinfo viene riletto: costa microsecondi).
 """
 
 import os
 import sys
 import re
+import stat
 import platform
+import threading
+from collections import namedtuple
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .storage_probe import effective_storage_class, get_storage_probe
+
+
+RAM_FILESYSTEMS = frozenset({'tmpfs', 'ramfs'})
+NETWORK_FILESYSTEMS = frozenset({
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', '9p', 'afs', 'ceph', 'glusterfs',
+    'lustre', 'gpfs', 'beegfs', 'orangefs', 'davfs', 'coda',
+})
+# fuse.<sottotipo> che parlano con la rete
+NETWORK_FUSE = frozenset({
+    'sshfs', 'rclone', 'glusterfs', 's3fs', 'davfs', 'gcsfuse', 'goofys', 'cephfs',
+    'smbnetfs', 'curlftpfs', 'juicefs', 'seaweedfs',
+})
+# Trasporti NVMe over Fabrics (device/transport del controller)
+NETWORK_TRANSPORTS = frozenset({'tcp', 'rdma', 'fc'})
+
+# Dal più lento al più veloce: dm/md/overlay su più membri prendono il peggiore
+_CLASS_RANK = {'nas': 0, 'hdd': 1, 'usb': 2, 'ssd': 3, 'nvme': 4, 'ram': 5}
+_MAX_DEPTH = 8  # loop su file in un loop, overlay su overlay...
+
+MountEntry = namedtuple('MountEntry', 'mount_id major minor mount_point fstype source options')
+
+_OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+
+def _unescape(field: str) -> str:
+    # mountinfo codifica spazio, tab, a capo e backslash come \ooo
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(text: str) -> List[MountEntry]:
+    """Righe di /proc/<pid>/mountinfo (nell'ordine del file: i mount sovrapposti vengono dopo)"""
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split(' ')
+        try:
+            separator = fields.index('-', 6)  # campi opzionali di lunghezza variabile prima di '-'
+            major, minor = fields[2].split(':')
+            mounts.append(MountEntry(int(fields[0]), int(major), int(minor), _unescape(fields[4]),
+                                     fields[separator + 1], _unescape(fields[separator + 2]),
+                                     fields[separator + 3] if len(fields) > separator + 3 else ''))
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+
+def _read_sys(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _slowest(classes) -> Optional[str]:
+    known = [c for c in classes if c]
+    return min(known, key=_CLASS_RANK.__getitem__) if known else None
+
+
+class LinuxStorageResolver:
+    """Classe di storage ('ram'/'nvme'/'ssd'/'usb'/'nas'/'hdd') di un percorso su Linux"""
+
+    def __init__(self, mountinfo_path: str = '/proc/self/mountinfo', sys_root: str = '/sys'):
+        self.mountinfo_path = mountinfo_path
+        self.sys_root = sys_root
+        self._lock = threading.Lock()
+        # (mount ID, major, minor): un ID riusato dopo umount/mount di un altro device non inganna
+        self._cache: Dict[Tuple[int, int, int], Optional[str]] = {}
+
+    def storage_class(self, path: str, _depth: int = 0) -> Optional[str]:
+        """None se il mount o il device non sono riconoscibili"""
+        mount = self.find_mount(path)
+        if mount is None:
+            return None
+        key = (mount.mount_id, mount.major, mount.minor)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        storage_class = self._classify_mount(mount, _depth)
+        with self._lock:
+            self._cache[key] = storage_class
+        return storage_class
+
+    def find_mount(self, path: str) -> Optional[MountEntry]:
+        """Mount che contiene path (o il primo antenato esistente: destinazioni non ancora create)"""
+        try:
+            with open(self.mountinfo_path, 'r', errors='surrogateescape') as f:
+                mounts = parse_mountinfo(f.read())
+        except OSError:
+            return None
+        probe = os.path.abspath(path)
+        while True:
+            try:
+                st_dev = os.stat(probe).st_dev
+                break
+            except OSError:
+                parent = os.path.dirname(probe)
+                if parent == probe:
+                    return None
+                probe = parent
+        probe = os.path.realpath(probe)
+
+        def _contains(mount_point: str) -> bool:
+            return (probe == mount_point or mount_point == '/'
+                    or probe.startswith(mount_point.rstrip('/') + '/'))
+
+        candidates = [m for m in mounts if _contains(m.mount_point)]
+        # Prima i mount dello stesso device (bind mount, mount point nascosti da altri mount),
+        # poi il prefisso più lungo; a parità vince l'ultimo montato
+        same_device = [m for m in candidates
+                       if (m.major, m.minor) == (os.major(st_dev), os.minor(st_dev))]
+        pool = same_device or candidates
+        if not pool:
+            return None
+        return max(enumerate(pool), key=lambda item: (len(item[1].mount_point), item[0]))[1]
+
+    def _classify_mount(self, mount: MountEntry, depth: int) -> Optional[str]:
+        fstype = mount.fstype
+        if fstype in RAM_FILESYSTEMS:
+            return 'ram'
+        if fstype in NETWORK_FILESYSTEMS:
+            return 'nas'
+        if fstype.startswith('fuse.') and fstype[5:] in NETWORK_FUSE:
+            return 'nas'
+        if fstype == 'overlay':
+            for option in mount.options.split(','):
+                if option.startswith('upperdir=') and depth < _MAX_DEPTH:
+                    return self.storage_class(option[len('upperdir='):], depth + 1)
+            return None
+        device = (mount.major, mount.minor)
+        if mount.major == 0:
+            # Device anonimo (btrfs, bcachefs...): il device reale è la sorgente del mount
+            try:
+                st = os.stat(mount.source)
+            except (OSError, ValueError):
+                return None
+            if not stat.S_ISBLK(st.st_mode):
+                return None
+            device = (os.major(st.st_rdev), os.minor(st.st_rdev))
+        return self._classify_block(os.path.realpath(
+            os.path.join(self.sys_root, 'dev', 'block', f"{device[0]}:{device[1]}")), depth)
+
+    def _classify_block(self, node: str, depth: int) -> Optional[str]:
+        """node = cartella del device in /sys/devices (link di /sys/dev/block già risolto)"""
+        if not os.path.isdir(node) or depth > _MAX_DEPTH:
+            return None
+        if os.path.exists(os.path.join(node, 'partition')):
+            node = os.path.dirname(node)  # sda1 -> sda, nvme0n1p2 -> nvme0n1
+        slaves_dir = os.path.join(node, 'slaves')
+        try:
+            slaves = os.listdir(slaves_dir)
+        except OSError:
+            slaves = []
+        if slaves:
+            # dm (LVM, LUKS, multipath) e md (RAID): limita il membro più lento
+            return _slowest(self._classify_block(os.path.realpath(os.path.join(slaves_dir, name)), depth + 1)
+                            for name in slaves)
+        return self._classify_disk(node, depth)
+
+    def _classify_disk(self, node: str, depth: int) -> Optional[str]:
+        name = os.path.basename(node)
+        if name.startswith(('zram', 'ram')):
+            return 'ram'
+        if name.startswith(('nbd', 'rbd', 'drbd')):
+            return 'nas'
+        if name.startswith('loop'):
+            backing = _read_sys(os.path.join(node, 'loop', 'backing_file'))
+            if backing and depth < _MAX_DEPTH:
+                return self.storage_class(backing, depth + 1)
+            return None
+        transport = _read_sys(os.path.join(node, 'device', 'transport'))
+        if transport in NETWORK_TRANSPORTS or '/session' in node:
+            return 'nas'  # NVMe-oF, iSCSI
+        if '/usb' in node or name.startswith('mmcblk') or _read_sys(os.path.join(node, 'removable')) == '1':
+            return 'usb'
+        if name.startswith('nvme') or '/nvme' in node:
+            return 'nvme'
+        rotational = _read_sys(os.path.join(node, 'queue', 'rotational'))
+        if rotational == '1':
+            return 'hdd'
+        if rotational == '0':
+            return 'ssd'
+        return None
+
+
+_default_resolver: Optional[LinuxStorageResolver] = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_linux_resolver() -> LinuxStorageResolver:
+    """Istanza condivisa (cache per mount ID comune a detector e RamDriveManager)"""
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = LinuxStorageResolver()
+        return _default_resolver
 
 
 class StorageDetector:
@@ -25,6 +237,21 @@ class StorageDetector:
         'NAS': {'name': 'NAS/Network', 'speed': 'Lento', 'buffer_mb': 32, 'threads': 2, 'priority': 1},
         'HDD': {'name': 'HDD', 'speed': 'Lento', 'buffer_mb': 80, 'threads': 2, 'priority': 1},
     }
+
+    # Classi restituite da RamDriveManager.get_storage_type -> chiavi STORAGE_TYPES
+    TYPE_MAP = {
+        'ram': 'RAMDRIVE',
+        'nvme': 'NVME',
+        'ssd': 'SSD',
+        'usb': 'USB',
+        'nas': 'NAS',
+        'hdd': 'HDD',
+    }
+
+    @classmethod
+    def profile_for(cls, storage_type_str):
+        """Profilo STORAGE_TYPES per una classe 'ram'/'nvme'/... (default HDD)"""
+        return cls.STORAGE_TYPES[cls.TYPE_MAP.get(storage_type_str, 'HDD')]
     
     def __init__(self, ramdrive_manager=None):
         self.storage_cache = {}
@@ -40,6 +267,15 @@ class StorageDetector:
         """Rileva il tipo di storage per un percorso dato"""
         if not path:
             return self.STORAGE_TYPES['SSD']  # Default
+
+        # Misura reale del volume (se disponibile): i numeri decidono buffer e thread
+        measured = self.get_measured_profile(path)
+        if measured:
+            return measured
+
+        # Linux: niente lettere di drive, la cache è per mount ID (nel resolver)
+        if sys.platform.startswith('linux') and not str(path).startswith('\\\\') and '://' not in str(path):
+            return self._detect_linux(str(path))
         
         # Normalizza il percorso
         path = str(path).upper()
@@ -57,6 +293,42 @@ class StorageDetector:
         
         return storage_type
     
+    def get_measured_profile(self, path, storage_class=None):
+        """Profilo derivato da StorageProbe (None se il volume non è ancora stato misurato)
+
+        La misura decide buffer e thread; la classe resta usb/nas se il collegamento lo è
+        (storage_class dall'euristica del chiamante, altrimenti _transport_class).
+        """
+        try:
+            measured = get_storage_probe().cached(str(path))
+        except Exception:
+            return None
+        if not measured:
+            return None
+        if storage_class is None:
+            storage_class = self._transport_class(path)
+        profile = dict(self.profile_for(effective_storage_class(storage_class, measured)))
+        profile.update({
+            'buffer_mb': measured['buffer_mb'],
+            'threads': measured['threads'],
+            'measured': measured,
+        })
+        return profile
+
+    def _transport_class(self, path):
+        """Classe euristica senza PowerShell né processi (None se non determinabile)"""
+        text = str(path)
+        if text.startswith('\\\\') or '://' in text:
+            return 'nas'
+        try:
+            if self.ramdrive_manager:
+                return self.ramdrive_manager.get_cached_storage_type(text)
+            if sys.platform.startswith('linux'):
+                return get_linux_resolver().storage_class(text)
+        except Exception:
+            pass
+        return None
+    
     def _detect_storage_type(self, path):
         """Logica di rilevamento del tipo di storage"""
         
@@ -69,18 +341,7 @@ class StorageDetector:
             if self.ramdrive_manager:
                 storage_type_str = self.ramdrive_manager.get_storage_type(path)
                 
-                # Mappa il tipo restituito al dizionario STORAGE_TYPES
-                type_map = {
-                    'ram': 'RAMDRIVE',
-                    'nvme': 'NVME',
-                    'ssd': 'SSD',
-                    'usb': 'USB',
-                    'nas': 'NAS',
-                    'hdd': 'HDD',
-                }
-                
-                type_key = type_map.get(storage_type_str, 'HDD')
-                return self.STORAGE_TYPES[type_key]
+                return self.profile_for(storage_type_str)
         
         # RamDrive (priorità massima) - fallback se RamDriveManager non disponibile
         if self.ramdrive_letter and path.startswith(self.ramdrive_letter.upper() + ':'):
@@ -120,18 +381,7 @@ class StorageDetector:
                     if drive_letter in all_drives:
                         storage_type_str = all_drives[drive_letter]
                         
-                        # Mappa il tipo restituito al dizionario STORAGE_TYPES
-                        type_map = {
-                            'ram': 'RAMDRIVE',
-                            'nvme': 'NVME',
-                            'ssd': 'SSD',
-                            'usb': 'USB',
-                            'nas': 'NAS',
-                            'hdd': 'HDD',
-                        }
-                        
-                        type_key = type_map.get(storage_type_str, 'HDD')
-                        return self.STORAGE_TYPES[type_key]
+                        return self.profile_for(storage_type_str)
                 except:
                     pass
             
@@ -225,47 +475,14 @@ class StorageDetector:
         return self.STORAGE_TYPES['SSD']
     
     def _detect_linux(self, path):
-        """Rileva il tipo di storage su Linux"""
+        """Rileva il tipo di storage su Linux (mountinfo + sysfs, vedi docstring del modulo)"""
         try:
-            import subprocess
-            
-            # Ottieni il device mount
-            result = subprocess.run(
-                ['df', path],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                if len(lines) > 1:
-                    device = lines[1].split()[0]
-                    
-                    # Controlla il device
-                    if 'nvme' in device.lower():
-                        return self.STORAGE_TYPES['NVME']
-                    elif 'sda' in device.lower() or 'sdb' in device.lower():
-                        # Controlla se SSD
-                        try:
-                            result = subprocess.run(
-                                ['cat', f'/sys/block/{device.split("/")[-1]}/queue/rotational'],
-                                capture_output=True,
-                                text=True,
-                                timeout=5
-                            )
-                            if result.returncode == 0 and '0' in result.stdout:
-                                return self.STORAGE_TYPES['SSD']
-                            else:
-                                return self.STORAGE_TYPES['HDD']
-                        except:
-                            return self.STORAGE_TYPES['SSD']
-                    elif 'usb' in device.lower():
-                        return self.STORAGE_TYPES['USB']
-        except:
-            pass
-        
-        return self.STORAGE_TYPES['SSD']
+            storage_class = get_linux_resolver().storage_class(path)
+        except Exception:
+            storage_class = None
+        if storage_class is None:
+            return self.STORAGE_TYPES['SSD']
+        return self.profile_for(storage_class)
     
     def _detect_macos(self, path):
         """Rileva il tipo di storage su macOS"""
@@ -0,0 +1,375 @@
+"""
+Micro-benchmark dello storage (sonda attiva) con cache persistente per volume
+
+Al posto di indovinare la classe del device dal nome ('nvme' in device, 'sda', label
+del volume) misura su un file temporaneo, in circa 1 secondo:
+- scrittura sequenziale (fsync incluso)
+- lettura sequenziale (cache di sistema esclusa dove possibile)
+- latenza di letture casuali da 4K
+
+I risultati sono salvati per ID volume in .storage_probe.json (accanto a
+.storage_cache.json) e da questi numeri derivano buffer, thread e classe storage.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from .utils import get_device_key, get_host_id, get_volume_id
+
+
+MB = 1024 * 1024
+
+
+def _cache_dir() -> Path:
+    """Cartella dati utente (stessa di .storage_cache.json)"""
+    try:
+        local_appdata = Path(os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local')))
+    except Exception:
+        local_appdata = Path.home() / 'AppData' / 'Local'
+    return local_appdata / 'AdvancedFileMover'
+
+
+class _UnbufferedReader:
+    """Lettura che bypassa la cache di sistema.
+
+    Windows: CreateFileW con FILE_FLAG_NO_BUFFERING e buffer allineato (VirtualAlloc).
+    Altri: file normale + posix_fadvise(DONTNEED) prima di leggere (Linux).
+    """
+
+    ALIGN = 4096
+
+    def __init__(self, path: str, max_read: int):
+        self.bypassed = False
+        self._handle = None
+        self._fd = None
+        self._buffer = None
+        self._max_read = max_read
+        if sys.platform == 'win32':
+            try:
+                self._open_windows(path)
+                self.bypassed = True
+                return
+            except Exception:
+                self._close_windows()
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                self.bypassed = True
+            except OSError:
+                pass
+
+    def _open_windows(self, path: str):
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        kernel32.VirtualAlloc.restype = ctypes.c_void_p
+        kernel32.VirtualAlloc.argtypes = [ctypes.c_void_p, ctypes.c_size_t, wintypes.DWORD, wintypes.DWORD]
+        kernel32.VirtualFree.argtypes = [ctypes.c_void_p, ctypes.c_size_t, wintypes.DWORD]
+        kernel32.ReadFile.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD,
+                                      ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p]
+        kernel32.SetFilePointerEx.argtypes = [wintypes.HANDLE, ctypes.c_longlong,
+                                              ctypes.c_void_p, wintypes.DWORD]
+        self._kernel32 = kernel32
+        self._wintypes = wintypes
+        self._ctypes = ctypes
+
+        GENERIC_READ = 0x80000000
+        FILE_SHARE_READ = 0x1
+        OPEN_EXISTING = 3
+        FILE_FLAG_NO_BUFFERING = 0x20000000
+        handle = kernel32.CreateFileW(path, GENERIC_READ, FILE_SHARE_READ, None,
+                                      OPEN_EXISTING, FILE_FLAG_NO_BUFFERING, None)
+        if handle is None or handle == wintypes.HANDLE(-1).value:
+            raise OSError(ctypes.get_last_error(), 'CreateFileW')
+        self._handle = handle
+        # MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE: memoria allineata alla pagina
+        self._buffer = kernel32.VirtualAlloc(None, self._max_read, 0x3000, 0x04)
+        if not self._buffer:
+            raise OSError(ctypes.get_last_error(), 'VirtualAlloc')
+
+    def _close_windows(self):
+        if self._buffer:
+            self._kernel32.VirtualFree(self._buffer, 0, 0x8000)  # MEM_RELEASE
+            self._buffer = None
+        if self._handle is not None:
+            self._kernel32.CloseHandle(self._handle)
+            self._handle = None
+
+    def pread(self, size: int, offset: int) -> int:
+        """Legge size bytes (multiplo di ALIGN) all'offset indicato; ritorna i bytes letti"""
+        if self._handle is not None:
+            if not self._kernel32.SetFilePointerEx(self._handle, offset, None, 0):
+                raise OSError(self._ctypes.get_last_error(), 'SetFilePointerEx')
+            read = self._wintypes.DWORD()
+            if not self._kernel32.ReadFile(self._handle, self._buffer, size, self._ctypes.byref(read), None):
+                raise OSError(self._ctypes.get_last_error(), 'ReadFile')
+            return read.value
+        return len(os.pread(self._fd, size, offset))
+
+    def close(self):
+        if self._handle is not None or self._buffer:
+            self._close_windows()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class StorageProbe:
+    """Misura le prestazioni reali di un volume e le ricorda per ID volume"""
+
+    CACHE_FILE = '.storage_probe.json'
+    CACHE_VERSION = 1
+    MAX_AGE = 30 * 24 * 3600  # Secondi: dopo, la misura viene ripetuta
+
+    DEFAULT_BUDGET = 1.0      # Secondi totali della sonda
+    CHUNK = 1 * MB            # Blocco sequenziale
+    MAX_FILE_SIZE = 256 * MB  # Limite del file di prova
+    RANDOM_BLOCK = 4096
+
+    TEMP_NAME = '.afm-probe-{host}-{pid:x}.partial'  # Ripulito dallo sweep orfani dell'engine
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = Path(cache_path) if cache_path else _cache_dir() / self.CACHE_FILE
+        self._lock = threading.Lock()
+        self._volumes: Dict[str, dict] = {}
+        self._volume_ids: Dict[str, str] = {}  # get_device_key -> get_volume_id (memo)
+        self._probing = set()
+        self._load()
+
+    # --- Cache persistente --------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.CACHE_VERSION:
+                self._volumes = dict(data.get('volumes') or {})
+        except Exception:
+            self._volumes = {}
+
+    def _save(self):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(self.cache_path.name + f'.{os.getpid()}.tmp')
+            with self._lock:
+                payload = {'version': self.CACHE_VERSION, 'volumes': dict(self._volumes)}
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except Exception:
+            pass
+
+    def volume_id(self, path: str) -> str:
+        try:
+            device = get_device_key(path)
+        except Exception:
+            return get_volume_id(path)
+        volume = self._volume_ids.get(device)
+        if volume is None:
+            volume = get_volume_id(path)
+            self._volume_ids[device] = volume
+        return volume
+
+    def cached(self, path: str) -> Optional[dict]:
+        """Misura già disponibile per il volume di path (None se assente o scaduta)"""
+        if not path:
+            return None
+        try:
+            entry = self._volumes.get(self.volume_id(path))
+        except Exception:
+            return None
+        if not entry or (time.time() - entry.get('measured_at', 0)) > self.MAX_AGE:
+            return None
+        return entry
+
+    # --- Misura -------------------------------------------------------------
+
+    def probe(self, path: str, budget: float = DEFAULT_BUDGET, force: bool = False) -> Optional[dict]:
+        """Misura il volume di path (se non già in cache). Bloccante per ~budget secondi."""
+        if not force:
+            entry = self.cached(path)
+            if entry:
+                return entry
+
+        directory = os.path.abspath(path)
+        while directory and not os.path.isdir(directory):
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+        volume = self.volume_id(directory)
+        with self._lock:
+            if volume in self._probing:
+                return None
+            self._probing.add(volume)
+        try:
+            result = self._measure(directory, budget)
+            if result is None:
+                return None
+            network = directory.startswith('\\\\') or directory.startswith('//')
+            result.update(self.settings_for(result, network=network))
+            result['volume_id'] = volume
+            result['measured_at'] = time.time()
+            with self._lock:
+                self._volumes[volume] = result
+            self._save()
+            return result
+        finally:
+            with self._lock:
+                self._probing.discard(volume)
+
+    def probe_async(self, path: str, callback: Optional[Callable[[Optional[dict]], None]] = None,
+                    budget: float = DEFAULT_BUDGET) -> threading.Thread:
+        """Esegue probe() in un thread daemon e chiama callback(risultato)"""
+        def _run():
+            try:
+                result = self.probe(path, budget)
+            except Exception:
+                result = None
+            if callback:
+                try:
+                    callback(result)
+                except Exception:
+                    pass
+
+        thread = threading.Thread(target=_run, name='afm-storage-probe', daemon=True)
+        thread.start()
+        return thread
+
+    def _measure(self, directory: str, budget: float) -> Optional[dict]:
+        temp_path = os.path.join(directory, self.TEMP_NAME.format(host=get_host_id(), pid=os.getpid()))
+        block = os.urandom(self.CHUNK)  # Dati non comprimibili
+        try:
+            # Scrittura sequenziale (~40% del budget), fsync incluso nel tempo
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+            fd = os.open(temp_path, flags, 0o600)
+            written = 0
+            start = time.perf_counter()
+            deadline = start + budget * 0.4
+            try:
+                while written < self.MAX_FILE_SIZE and (written < 4 * self.CHUNK or time.perf_counter() < deadline):
+                    written += os.write(fd, block)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            write_elapsed = max(time.perf_counter() - start, 1e-6)
+
+            reader = _UnbufferedReader(temp_path, self.CHUNK)
+            try:
+                # Lettura sequenziale (~30% del budget)
+                read = 0
+                start = time.perf_counter()
+                deadline = start + budget * 0.3
+                while read < written and time.perf_counter() < deadline:
+                    n = reader.pread(self.CHUNK, read)
+                    if n <= 0:
+                        break
+                    read += n
+                read_elapsed = max(time.perf_counter() - start, 1e-6)
+
+                # Letture casuali da 4K (~30% del budget), su blocchi non ancora letti se possibile
+                blocks = written // self.RANDOM_BLOCK
+                first_block = min(read // self.RANDOM_BLOCK, max(blocks - 1024, 0))
+                ops = 0
+                start = time.perf_counter()
+                deadline = start + budget * 0.3
+                while time.perf_counter() < deadline and ops < 100000:
+                    offset = random.randrange(first_block, blocks) * self.RANDOM_BLOCK
+                    reader.pread(self.RANDOM_BLOCK, offset)
+                    ops += 1
+                random_elapsed = max(time.perf_counter() - start, 1e-6)
+                cache_bypassed = reader.bypassed
+            finally:
+                reader.close()
+        except OSError:
+            return None
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+        return {
+            'seq_write_mbps': round(written / write_elapsed / MB, 1),
+            'seq_read_mbps': round(read / read_elapsed / MB, 1),
+            'rand_read_4k_ms': round(random_elapsed / max(ops, 1) * 1000, 4),
+            'cache_bypassed': bool(cache_bypassed),
+        }
+
+    # --- Numeri -> parametri ------------------------------------------------
+
+    @staticmethod
+    def settings_for(measurement: dict, network: bool = False) -> dict:
+        """Buffer, thread e classe storage derivati dalla misura.
+
+        La classe misurata distingue solo ram/nvme/ssd/hdd (nas per i percorsi di rete):
+        usb/nas dell'euristica del collegamento vincono (effective_storage_class).
+        - buffer: ~50 ms di trasferimento sequenziale, ma abbastanza grande da
+          ammortizzare la latenza di posizionamento (x20) sui device lenti a cercare
+        - thread: più la latenza è bassa, più richieste parallele il device assorbe
+        """
+        seq = max(1.0, min(measurement.get('seq_read_mbps', 0) or 0, measurement.get('seq_write_mbps', 0) or 0))
+        latency_ms = float(measurement.get('rand_read_4k_ms', 10) or 10)
+
+        buffer_mb = max(seq * 0.05, seq * latency_ms / 1000 * 20)
+        buffer_mb = max(4, min(256, 1 << max(0, int(buffer_mb - 1).bit_length())))
+
+        if latency_ms < 0.05:
+            threads = 16
+        elif latency_ms < 0.2:
+            threads = 12
+        elif latency_ms < 1.0:
+            threads = 8
+        elif latency_ms < 4.0:
+            threads = 4
+        else:
+            threads = 2
+
+        if network:
+            storage_class = 'nas'
+        elif latency_ms < 0.02 and seq >= 2000:
+            storage_class = 'ram'
+        elif latency_ms < 0.2 and seq >= 800:
+            storage_class = 'nvme'
+        elif latency_ms < 1.0:
+            storage_class = 'ssd'
+        else:
+            storage_class = 'hdd'
+
+        return {'buffer_mb': buffer_mb, 'threads': threads, 'storage_class': storage_class}
+
+
+# Classi decise dal collegamento, non dalla velocità: una chiavetta USB veloce resta 'usb'
+# (limiti di stream per device, gruppi paralleli) anche se la misura la vede come un SSD
+TRANSPORT_CLASSES = ('usb', 'nas')
+
+
+def effective_storage_class(heuristic: Optional[str], measured: Optional[dict]) -> Optional[str]:
+    """Classe per limiti e profili: usb/nas dall'euristica del collegamento, altrimenti la misura"""
+    if heuristic in TRANSPORT_CLASSES:
+        return heuristic
+    if measured and measured.get('storage_class'):
+        return measured['storage_class']
+    return heuristic
+
+
+_default_probe: Optional[StorageProbe] = None
+_default_probe_lock = threading.Lock()
+
+
+def get_storage_probe() -> StorageProbe:
+    """Istanza condivisa (una cache per processo)"""
+    global _default_probe
+    with _default_probe_lock:
+        if _default_probe is None:
+            _default_probe = StorageProbe()
+        return _default_probe
@@ -0,0 +1,132 @@
+"""
+Registrazione timeline di un trasferimento (Chrome Trace Event JSON / Perfetto)
+
+Eventi per job, per file, per stream (la serie di chunk di un file aperto), per
+fase e per chunk (read/write), ognuno sul thread che lo ha generato: copia,
+lettura anticipata, deleter dei MOVE. Si apre con https://ui.perfetto.dev o
+chrome://tracing.
+
+Gli eventi sono "complete" (ph 'X', inizio + durata) in un ring buffer limitato:
+il recorder può restare attivo su job lunghi, conservando gli ultimi max_events
+senza coppie begin/end spezzate dall'eliminazione dei più vecchi.
+"""
+import collections
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+class TraceRecorder:
+    """Ring buffer di eventi Chrome Trace (thread-safe: deque.append è atomico)"""
+
+    DEFAULT_MAX_EVENTS = 500_000
+
+    def __init__(self, output_path: Optional[str] = None, max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Args:
+            output_path: File .json scritto a fine job (None = solo save() esplicito)
+            max_events: Capacità del ring buffer (gli eventi più vecchi vengono scartati)
+        """
+        self.output_path = output_path
+        self.max_events = max(1000, int(max_events))
+        self._events = collections.deque(maxlen=self.max_events)
+        self._recorded = 0
+        self._thread_names = {}
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+        self.started_at = time.time()
+
+    @property
+    def dropped(self) -> int:
+        """Eventi scartati dal ring buffer"""
+        return max(0, self._recorded - len(self._events))
+
+    def _tid(self) -> int:
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def _us(self, perf_time: float) -> float:
+        return round((perf_time - self._origin) * 1e6, 3)
+
+    def complete(self, name: str, category: str, start: float, end: Optional[float] = None,
+                 args: Optional[dict] = None):
+        """Evento con durata; start/end sono valori di time.perf_counter()"""
+        if end is None:
+            end = time.perf_counter()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': self._us(start),
+            'dur': round(max(end - start, 0.0) * 1e6, 3),
+            'pid': self._pid,
+            'tid': self._tid(),
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+        self._recorded += 1
+
+    def instant(self, name: str, category: str, args: Optional[dict] = None):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'i',
+            's': 't',
+            'ts': self._us(time.perf_counter()),
+            'pid': self._pid,
+            'tid': self._tid(),
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+        self._recorded += 1
+
+    def counter(self, name: str, values: dict):
+        """Serie numerica (es. profondità coda) mostrata come grafico"""
+        self._events.append({
+            'name': name,
+            'ph': 'C',
+            'ts': self._us(time.perf_counter()),
+            'pid': self._pid,
+            'args': dict(values),
+        })
+        self._recorded += 1
+
+    def to_dict(self) -> dict:
+        events = list(self._events)
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0,
+                     'args': {'name': 'Advanced File Mover'}}]
+        for tid, name in list(self._thread_names.items()):
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                             'args': {'name': name}})
+        return {
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'started_at': self.started_at,
+                'recorded_events': self._recorded,
+                'dropped_events': self.dropped,
+            },
+        }
+
+    def save(self, path: Optional[str] = None) -> Optional[str]:
+        """Scrive la timeline (temp + os.replace); ritorna il percorso o None"""
+        path = path or self.output_path
+        if not path:
+            return None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # più engine possono salvare insieme
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(temp_path, path)
+        return path
+
+    def clear(self):
+        self._events.clear()
+        self._recorded = 0
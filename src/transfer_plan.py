@@ -0,0 +1,361 @@
+"""
+Piano di trasferimento: scansione unica (e concorrente) di tutte le sorgenti selezionate
+
+- Selezioni sovrapposte (stesso percorso due volte, file o cartella dentro una
+  cartella già selezionata) vengono scartate prima di copiare: altrimenti i
+  dati verrebbero copiati due volte
+- Le sorgenti vengono scansionate una volta sola, un thread per device sorgente
+  (in sequenza sullo stesso disco, per non far saltare la testina degli HDD)
+- Il piano ha totali di byte e file dell'intero job: percentuale ed ETA non
+  ripartono da zero a ogni sorgente
+
+Ogni SourceScan può essere passato all'engine (copy/move(..., scan=...)) che
+così non ripete la scansione della cartella.
+
+Link simbolici (e junction) dentro le cartelle, secondo la politica scelta:
+- preserve: viene ricreato il link, non copiato il contenuto (default: nulla
+  di esterno all'albero entra nel job)
+- follow: viene copiato il contenuto; le cartelle già incluse (st_dev, st_ino)
+  non vengono ripercorse, così i cicli non fanno esplodere il job. In un MOVE
+  ciò che sta dietro un link viene solo copiato: si elimina il link, non il bersaglio
+- skip: ignorati
+Le sorgenti selezionate vengono sempre risolte (come "cp -H"). FIFO, socket e
+device vengono saltati; con skip_special=False FIFO e device vengono ricreati
+(un socket non ha senso senza il processo che lo ascolta).
+"""
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set, Tuple
+
+from .utils import get_device_key
+
+MAX_SCAN_THREADS = 8
+
+SYMLINK_POLICIES = ('preserve', 'follow', 'skip')
+DEFAULT_SYMLINK_POLICY = 'preserve'
+
+
+def parse_symlink_policy(value) -> str:
+    """Politica dei link simbolici (None = default); ValueError se sconosciuta"""
+    policy = DEFAULT_SYMLINK_POLICY if value is None else str(value).strip().lower()
+    if policy not in SYMLINK_POLICIES:
+        raise ValueError(f"politica link sconosciuta: {value} (ammesse: {', '.join(SYMLINK_POLICIES)})")
+    return policy
+
+
+class SourceScan:
+    """Risultato della scansione di una sorgente (usato anche da _prepare_directory_plan)"""
+
+    def __init__(self, source: str, destination: str,
+                 symlinks: str = DEFAULT_SYMLINK_POLICY, skip_special: bool = True):
+        self.source = source
+        self.destination = destination
+        self.symlinks = symlinks
+        self.skip_special = skip_special
+        self.is_dir = False
+        self.files: List[Tuple[str, str]] = []  # (file sorgente, file destinazione)
+        self.dirs: List[Tuple[str, str]] = []  # (cartella sorgente, cartella destinazione), radice compresa
+        self.links: List[Tuple[str, str]] = []  # link da ricreare (politica preserve)
+        self.specials: List[Tuple[str, str]] = []  # FIFO/device da ricreare (skip_special=False)
+        self.copy_only: Set[str] = set()  # raggiunti attraverso un link seguito: un MOVE non li elimina
+        self.followed_links: List[str] = []  # link a cartelle seguiti: un MOVE li elimina a fine job
+        self.total_size = 0
+        self.dir_count = 0
+        self.symlink_count = 0
+        self.special_count = 0
+        self.skipped_count = 0  # link e file speciali non trasferiti
+        self.loop_count = 0  # link a cartelle già incluse (cicli)
+        self.errors: List[str] = []
+        self.elapsed = 0.0
+        self.complete = False  # False se annullata o sorgente inesistente
+
+    @property
+    def file_count(self) -> int:
+        return len(self.files)
+
+    def counts(self) -> dict:
+        return {
+            'dirs': self.dir_count,
+            'symlinks': self.symlink_count,
+            'special': self.special_count,
+            'entries_skipped': self.skipped_count,
+            'loops': self.loop_count,
+        }
+
+
+def format_entry_counts(counts: dict) -> str:
+    """Link, file speciali, voci saltate e cicli (solo quelli presenti) per i messaggi di piano"""
+    parts = []
+    if counts.get('symlinks'):
+        parts.append(f"{counts['symlinks']} link")
+    if counts.get('special'):
+        parts.append(f"{counts['special']} file speciali")
+    if counts.get('entries_skipped'):
+        parts.append(f"{counts['entries_skipped']} saltati")
+    if counts.get('loops'):
+        parts.append(f"{counts['loops']} cicli evitati")
+    return ", ".join(parts)
+
+
+class TransferPlan:
+    """Sorgenti (già senza duplicati) con le loro scansioni e i totali del job"""
+
+    def __init__(self, items: List[SourceScan], skipped: List[Tuple[str, str]], elapsed: float):
+        self.items = items
+        self.skipped = skipped  # (percorso, motivo) delle selezioni scartate
+        self.elapsed = elapsed
+
+    @property
+    def sources(self) -> List[str]:
+        return [item.source for item in self.items]
+
+    @property
+    def total_size(self) -> int:
+        return sum(item.total_size for item in self.items)
+
+    @property
+    def file_count(self) -> int:
+        return sum(item.file_count for item in self.items)
+
+    @property
+    def errors(self) -> List[str]:
+        return [error for item in self.items for error in item.errors]
+
+    @property
+    def complete(self) -> bool:
+        return all(item.complete for item in self.items)
+
+    def counts(self) -> dict:
+        totals = dict.fromkeys(('dirs', 'symlinks', 'special', 'entries_skipped', 'loops'), 0)
+        for item in self.items:
+            for key, value in item.counts().items():
+                totals[key] += value
+        return totals
+
+    def summary(self) -> dict:
+        return {
+            'sources': len(self.items),
+            'files': self.file_count,
+            'bytes': self.total_size,
+            **self.counts(),
+            'skipped': len(self.skipped),
+            'errors': len(self.errors),
+            'scan_seconds': self.elapsed,
+        }
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path)).rstrip('\\/') or os.sep
+
+
+def group_by_source_device(items: List[Tuple[str, str]]) -> List[List[int]]:
+    """Indici degli elementi (sorgente, destinazione) raggruppati per device sorgente (ordine di prima comparsa)"""
+    groups: 'OrderedDict[str, List[int]]' = OrderedDict()
+    for index, (source, _) in enumerate(items):
+        try:
+            key = get_device_key(source)
+        except Exception:
+            key = '?'
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+def dedupe_sources(sources: List[str]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Scarta duplicati e percorsi contenuti in una cartella già selezionata.
+
+    Returns:
+        (sorgenti da trasferire nell'ordine originale, [(scartata, contenitore)])
+    """
+    normalized = [_norm(s) for s in sources]
+    directories = sorted({n for n, s in zip(normalized, sources) if os.path.isdir(s)}, key=len)
+
+    kept, skipped, seen = [], [], set()
+    for source, norm in zip(sources, normalized):
+        if norm in seen:
+            skipped.append((source, source))
+            continue
+        container = None
+        for directory in directories:
+            if len(directory) >= len(norm):
+                break
+            prefix = directory if directory.endswith(os.sep) else directory + os.sep
+            if norm.startswith(prefix):
+                container = directory
+                break
+        if container is not None:
+            skipped.append((source, container))
+            continue
+        seen.add(norm)
+        kept.append(source)
+    return kept, skipped
+
+
+def _is_link(entry) -> bool:
+    try:
+        if entry.is_symlink():
+            return True
+        # Junction NTFS: trattate come link (os.walk ci entrerebbe, anche in ciclo)
+        return bool(getattr(entry, 'is_junction', None) and entry.is_junction())
+    except OSError:
+        return False
+
+
+def scan_source(source: str, destination: str,
+                should_cancel: Optional[Callable[[], bool]] = None,
+                on_file: Optional[Callable[[int], None]] = None,
+                symlinks: str = DEFAULT_SYMLINK_POLICY,
+                skip_special: bool = True) -> SourceScan:
+    """
+    Scansione di una sorgente con os.scandir (un solo stat per file; su Windows gratis).
+
+    Stesso ordine e stessa mappatura destinazione di os.walk (preordine); link e
+    file speciali secondo symlinks / skip_special (vedi docstring del modulo).
+    """
+    scan = SourceScan(source, destination, symlinks, skip_special)
+    started = time.perf_counter()
+    follow = symlinks == 'follow'
+    try:
+        if not os.path.exists(source):
+            scan.errors.append(f"Sorgente non trovata: {source}")
+            return scan
+        if not os.path.isdir(source):
+            try:
+                scan.total_size = os.path.getsize(source)
+            except OSError:
+                pass
+            scan.files.append((source, destination))
+            scan.complete = True
+            if on_file is not None:
+                on_file(scan.total_size)
+            return scan
+
+        scan.is_dir = True
+        # Cartelle già incluse: servono solo seguendo i link (altrimenti l'albero non ha cicli)
+        visited = set()
+        if follow:
+            root = os.stat(source)
+            visited.add((root.st_dev, root.st_ino))
+        stack = [(source, destination, False)]
+        while stack:
+            if should_cancel is not None and should_cancel():
+                return scan
+            directory, dst_root, external = stack.pop()
+            scan.dir_count += 1
+            scan.dirs.append((directory, dst_root))
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        dst_path = os.path.join(dst_root, entry.name)
+                        link = _is_link(entry)
+                        if link:
+                            scan.symlink_count += 1
+                            if symlinks == 'skip':
+                                scan.skipped_count += 1
+                                continue
+                            if symlinks == 'preserve':
+                                scan.links.append((entry.path, dst_path))
+                                continue
+                        try:
+                            # Un link arrivato fin qui va seguito: stat del bersaglio
+                            st = entry.stat(follow_symlinks=link)
+                        except OSError:
+                            if link:
+                                scan.skipped_count += 1  # link interrotto
+                            else:
+                                scan.errors.append(f"Impossibile leggere durante scansione: {entry.path}")
+                            continue
+                        mode = st.st_mode
+                        if stat.S_ISDIR(mode):
+                            if follow:
+                                key = (st.st_dev, st.st_ino)
+                                if key in visited:
+                                    scan.loop_count += 1
+                                    continue
+                                visited.add(key)
+                                if link and not external:
+                                    scan.followed_links.append(entry.path)
+                            subdirs.append((entry.path, dst_path, external or link))
+                            continue
+                        if not stat.S_ISREG(mode):
+                            scan.special_count += 1
+                            if skip_special or stat.S_ISSOCK(mode):
+                                scan.skipped_count += 1
+                            else:
+                                scan.specials.append((entry.path, dst_path))
+                                if external:
+                                    scan.copy_only.add(entry.path)
+                            continue
+                        scan.files.append((entry.path, dst_path))
+                        if external:
+                            scan.copy_only.add(entry.path)
+                        scan.total_size += st.st_size
+                        if on_file is not None:
+                            on_file(st.st_size)
+            except OSError as e:
+                scan.errors.append(f"Errore accesso directory durante scansione: {getattr(e, 'filename', '')} ({e})")
+            # Preordine come os.walk: la prima sottocartella viene visitata per prima
+            stack.extend(reversed(subdirs))
+        scan.complete = True
+        return scan
+    finally:
+        scan.elapsed = time.perf_counter() - started
+
+
+def build_transfer_plan(sources: List[str], destination_for: Callable[[str], str],
+                        should_cancel: Optional[Callable[[], bool]] = None,
+                        on_progress: Optional[Callable[[int, int], None]] = None,
+                        max_threads: int = MAX_SCAN_THREADS,
+                        symlinks: str = DEFAULT_SYMLINK_POLICY,
+                        skip_special: bool = True) -> TransferPlan:
+    """
+    Piano dell'intero job.
+
+    Args:
+        sources: Sorgenti selezionate (anche sovrapposte)
+        destination_for: sorgente -> destinazione dell'elemento (es. dest/NomeCartella)
+        should_cancel: Interrompe la scansione (piano incompleto)
+        on_progress: (file, byte) trovati finora, da qualsiasi thread di scansione
+        symlinks: Link dentro le cartelle: preserve / follow / skip
+        skip_special: Salta FIFO, socket e device (False = FIFO e device ricreati)
+    """
+    started = time.perf_counter()
+    kept, skipped = dedupe_sources(list(sources))
+    scans = [SourceScan(source, destination_for(source), symlinks, skip_special) for source in kept]
+
+    lock = threading.Lock()
+    found = [0, 0]
+
+    def _on_file(size: int):
+        if on_progress is None:
+            return
+        with lock:
+            found[0] += 1
+            found[1] += size
+            files, total = found
+        on_progress(files, total)
+
+    def _scan_group(indices: List[int]):
+        for index in indices:
+            if should_cancel is not None and should_cancel():
+                return
+            item = scans[index]
+            scans[index] = scan_source(item.source, item.destination, should_cancel, _on_file,
+                                       symlinks, skip_special)
+
+    groups = group_by_source_device([(s.source, s.destination) for s in scans])
+    if len(groups) <= 1:
+        for group in groups:
+            _scan_group(group)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_threads, len(groups))),
+                                thread_name_prefix='afm-plan-scan') as pool:
+            for future in [pool.submit(_scan_group, group) for group in groups]:
+                future.result()
+
+    return TransferPlan(scans, skipped, time.perf_counter() - started)
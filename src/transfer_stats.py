@@ -0,0 +1,295 @@
+"""
+Statistiche per fase di un job di FileOperationEngine
+
+Accumula tempo (wall), numero di chiamate e bytes per fase: scan, mkdir, stat, open,
+read, write, close, rename, fsync, delete, staging RamDrive, attese (pausa,
+throttle, lettura anticipata). Disattivate = engine.stats è None e ogni punto di
+misura costa un solo controllo.
+
+Per file: istogrammi logaritmici di tempo e throughput per classe di dimensione
+(p50/p95/p99) e i file più lenti con il dettaglio delle fasi.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .utils import format_bytes
+
+
+class LogHistogram:
+    """Istogramma a bucket logaritmici: BUCKETS_PER_OCTAVE bucket per raddoppio.
+
+    Con 8 bucket per ottava l'errore relativo dei quantili è ~±4.5%; memoria
+    proporzionale ai bucket occupati (poche decine anche su milioni di campioni).
+    """
+
+    BUCKETS_PER_OCTAVE = 8
+    MIN_VALUE = 1e-9
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        value = max(float(value), self.MIN_VALUE)
+        index = math.floor(math.log2(value) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LogHistogram'):
+        """Somma i campioni di other (stessi bucket: il risultato è esatto)"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Quantile q (0..1): limite superiore del bucket, limitato a [min, max]"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = 2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'min': self.min or 0.0,
+            'max': self.max or 0.0,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets_per_octave': self.BUCKETS_PER_OCTAVE,
+            'buckets': {str(k): v for k, v in sorted(self.buckets.items())},
+        }
+
+
+class TransferStats:
+    """Contatori per fase, thread-safe (il deleter dei MOVE scrive da un altro thread)"""
+
+    # Ordine nel report; le fasi non elencate vanno in coda
+    PHASES = (
+        'scan', 'mkdir', 'stat', 'open', 'read', 'write', 'metadata', 'close', 'rename', 'links', 'compress',
+        'fsync', 'delete', 'ramdrive_stage', 'ramdrive_drain', 'ramdrive_cleanup',
+        'readahead_wait', 'throttle', 'pause',
+    )
+
+    # Fasi che contengono altre fasi (open/read/write/close del file interno)
+    AGGREGATE_PHASES = ('ramdrive_stage', 'ramdrive_drain')
+
+    # Fasi attribuite al file corrente (rename/fsync/delete sono a batch, scan è del job)
+    FILE_PHASES = frozenset((
+        'mkdir', 'stat', 'open', 'read', 'write', 'metadata', 'close', 'ramdrive_stage',
+        'ramdrive_drain', 'ramdrive_cleanup', 'readahead_wait', 'throttle', 'pause',
+    ))
+
+    # Classi di dimensione: (limite superiore escluso, etichetta)
+    SIZE_CLASSES = (
+        (64 * 1024, '<64K'),
+        (1024 * 1024, '64K-1M'),
+        (16 * 1024 * 1024, '1M-16M'),
+        (256 * 1024 * 1024, '16M-256M'),
+        (None, '>=256M'),
+    )
+
+    TOP_SLOW_FILES = 10
+
+    def __init__(self, top_slow_files: int = TOP_SLOW_FILES):
+        self._lock = threading.Lock()
+        self._phases: Dict[str, List[float]] = {}  # fase -> [secondi, chiamate, bytes]
+
+        # Per file
+        self.top_slow_files = top_slow_files
+        self._file_times: Dict[str, LogHistogram] = {}
+        self._file_rates: Dict[str, LogHistogram] = {}
+        self._slowest: List[Tuple[float, int, dict]] = []  # min-heap dei più lenti
+        self._seq = itertools.count()
+        self._file: Optional[dict] = None  # file in corso: path, size, start, phases
+        self.files_failed = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._start = time.perf_counter()
+        self._elapsed: Optional[float] = None
+
+    def add(self, phase: str, seconds: float, calls: int = 1, nbytes: int = 0):
+        with self._lock:
+            entry = self._phases.get(phase)
+            if entry is None:
+                entry = self._phases[phase] = [0.0, 0, 0]
+            entry[0] += seconds
+            entry[1] += calls
+            entry[2] += nbytes
+
+            current = self._file
+            if current is not None and phase in self.FILE_PHASES:
+                current['phases'][phase] = current['phases'].get(phase, 0.0) + seconds
+
+    # --- Per file -----------------------------------------------------------
+
+    @classmethod
+    def size_class(cls, size: int) -> str:
+        for limit, label in cls.SIZE_CLASSES:
+            if limit is None or size < limit:
+                return label
+        return cls.SIZE_CLASSES[-1][1]
+
+    def begin_file(self, path: str, size: int):
+        with self._lock:
+            self._file = {'path': path, 'size': int(size), 'phases': {}, 'start': time.perf_counter()}
+
+    def end_file(self, ok: bool = True):
+        with self._lock:
+            current, self._file = self._file, None
+        if current is None:
+            return
+        seconds = time.perf_counter() - current['start']
+        if not ok:
+            with self._lock:
+                self.files_failed += 1
+            return
+
+        size = current['size']
+        label = self.size_class(size)
+        record = {
+            'path': current['path'],
+            'size': size,
+            'seconds': seconds,
+            'size_class': label,
+            'phases': current['phases'],
+        }
+        with self._lock:
+            self._file_times.setdefault(label, LogHistogram()).add(seconds)
+            if size > 0:
+                self._file_rates.setdefault(label, LogHistogram()).add(size / max(seconds, 1e-9))
+            item = (seconds, next(self._seq), record)
+            if len(self._slowest) < self.top_slow_files:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def merge(self, other: 'TransferStats'):
+        """Aggiunge fasi, istogrammi e file lenti di other (job con più sorgenti: l'engine
+        crea uno stats per sorgente, chi guida il job li somma in uno solo)"""
+        with other._lock:
+            phases = {name: list(values) for name, values in other._phases.items()}
+            file_times = list(other._file_times.items())
+            file_rates = list(other._file_rates.items())
+            slowest = [item[2] for item in other._slowest]
+            files_failed = other.files_failed
+        with self._lock:
+            for name, values in phases.items():
+                entry = self._phases.setdefault(name, [0.0, 0, 0])
+                for i in range(3):
+                    entry[i] += values[i]
+            for target, source in ((self._file_times, file_times), (self._file_rates, file_rates)):
+                for label, histogram in source:
+                    target.setdefault(label, LogHistogram()).merge(histogram)
+            for record in slowest:
+                item = (record['seconds'], next(self._seq), record)
+                if len(self._slowest) < self.top_slow_files:
+                    heapq.heappush(self._slowest, item)
+                elif item[0] > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, item)
+            self.files_failed += files_failed
+
+    def finish(self):
+        """Chiude la misura (il tempo totale del job smette di crescere)"""
+        if self._elapsed is None:
+            self._elapsed = time.perf_counter() - self._start
+            self.finished_at = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        return self._elapsed if self._elapsed is not None else time.perf_counter() - self._start
+
+    def snapshot(self) -> dict:
+        """Copia serializzabile (JSON) dei contatori; valida anche a job in corso"""
+        with self._lock:
+            phases = {
+                name: {'seconds': values[0], 'calls': int(values[1]), 'bytes': int(values[2])}
+                for name, values in self._phases.items()
+            }
+            classes = {}
+            for _, label in self.SIZE_CLASSES:
+                if label not in self._file_times:
+                    continue
+                classes[label] = {
+                    'time': self._file_times[label].to_dict(),
+                    'throughput': self._file_rates[label].to_dict() if label in self._file_rates else None,
+                }
+            slowest = [dict(item[2]) for item in sorted(self._slowest, reverse=True)]
+            files_failed = self.files_failed
+        return {
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed': self.elapsed,
+            'phases': phases,
+            'files': {
+                'size_classes': classes,
+                'slowest': slowest,
+                'failed': files_failed,
+            },
+        }
+
+    def format_report(self) -> str:
+        """Report testuale per fase (ordinato come PHASES)"""
+        data = self.snapshot()
+        elapsed = max(data['elapsed'], 1e-9)
+        phases = data['phases']
+        order = [p for p in self.PHASES if p in phases] + sorted(p for p in phases if p not in self.PHASES)
+
+        lines = [f"📊 Statistiche per fase (totale {elapsed:.2f}s):"]
+        for name in order:
+            entry = phases[name]
+            line = f"  {name:<16} {entry['seconds']:9.3f}s {entry['seconds'] / elapsed * 100:5.1f}%  {entry['calls']:>8} chiamate"
+            if entry['bytes']:
+                line += f"  {format_bytes(entry['bytes'])}"
+            if name in self.AGGREGATE_PHASES:
+                line += "  (include open/read/write/close)"
+            lines.append(line)
+
+        files = data['files']
+        if files['size_classes']:
+            lines.append("⏱️ Tempo per file (p50 / p95 / p99) e throughput p50 per classe di dimensione:")
+            for label, entry in files['size_classes'].items():
+                t = entry['time']
+                line = (f"  {label:<9} {t['count']:>8} file  {_fmt_seconds(t['p50'])} / "
+                        f"{_fmt_seconds(t['p95'])} / {_fmt_seconds(t['p99'])}")
+                if entry['throughput']:
+                    line += f"  {format_bytes(entry['throughput']['p50'])}/s"
+                lines.append(line)
+        if files['slowest']:
+            lines.append(f"🐢 File più lenti (top {len(files['slowest'])}):")
+            for record in files['slowest']:
+                phases = sorted(record['phases'].items(), key=lambda kv: kv[1], reverse=True)
+                detail = ", ".join(f"{name} {_fmt_seconds(sec)}" for name, sec in phases[:4] if sec > 0)
+                lines.append(f"  {_fmt_seconds(record['seconds'])}  {format_bytes(record['size'])}  {record['path']}"
+                             + (f"  [{detail}]" if detail else ""))
+        return "\n".join(lines)
+
+
+def _fmt_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
@@ -15,10 +15,9 @@ from pathlib import Path
 from typing import Optional, Tuple
 import logging
 
-try:
-    import requests
-except ImportError:
-    requests = None
+# requests is imported on first use (_get_requests): it is slow to import and
+# would otherwise sit on the GUI startup path
+_requests = None
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +27,18 @@ GITHUB_REPO = "advanced-file-mover"
 GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}"
 
 
+def _get_requests():
+    """Return the requests module, or None if it is not installed"""
+    global _requests
+    if _requests is None:
+        try:
+            import requests
+        except ImportError:
+            requests = False
+        _requests = requests
+    return _requests or None
+
+
 def get_local_version(config_path: str) -> str:
     """Read local version from config.json"""
     try:
@@ -44,6 +55,7 @@ def get_latest_release_info() -> Optional[dict]:
     Fetch latest release info from GitHub API
     Returns: {version, tag_name, download_url} or None if failed
     """
+    requests = _get_requests()
     if not requests:
         logger.warning("requests module not available, skipping update check")
         return None
@@ -114,6 +126,7 @@ def compare_versions(local: str, remote: str) -> int:
 
 def download_installer(download_url: str, download_path: str) -> bool:
     """Download installer to temporary location"""
+    requests = _get_requests()
     if not requests:
         return False
     
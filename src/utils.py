@@ -1,10 +1,10 @@
 """
 Modulo utilità per Advanced File Mover
 """
+import hashlib
 import os
+import socket
 import sys
-import ctypes
-import subprocess
 from pathlib import Path
 from typing import Tuple, Optional
 
@@ -12,6 +12,7 @@ from typing import Tuple, Optional
 def is_admin() -> bool:
     """Verifica se il programma è eseguito come amministratore"""
     try:
+        import ctypes
         return ctypes.windll.shell.IsUserAnAdmin()
     except:
         return False
@@ -88,6 +89,148 @@ def get_file_size(path: str) -> int:
         return 0
 
 
+def get_device_key(path: str) -> str:
+    """
+    Identificativo del volume di un path (per limiti/statistiche per device)
+    
+    Returns:
+        'C:' / '\\\\SERVER\\SHARE' su Windows, 'dev:<st_dev>' su POSIX
+    """
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if drive:
+        return drive.upper()
+
+    # POSIX: st_dev del path o del primo antenato esistente (destinazioni non ancora create)
+    probe = os.path.abspath(path)
+    while True:
+        try:
+            return f"dev:{os.stat(probe).st_dev}"
+        except OSError:
+            parent = os.path.dirname(probe)
+            if parent == probe:
+                return 'dev:?'
+            probe = parent
+
+
+def get_volume_id(path: str) -> str:
+    """
+    Identificativo stabile del volume (sopravvive a cambi di lettera/riavvii)
+    
+    Returns:
+        'vol:<serial>' su Windows, 'uuid:<fs uuid>' su Linux se disponibile,
+        altrimenti get_device_key(path)
+    """
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if drive:
+        if len(drive) == 2 and drive[1] == ':':
+            try:
+                import ctypes
+                serial = ctypes.c_ulong()
+                ok = ctypes.windll.kernel32.GetVolumeInformationW(
+                    ctypes.c_wchar_p(drive + '\\'), None, 0, ctypes.byref(serial), None, None, None, 0
+                )
+                if ok:
+                    return f"vol:{serial.value:08X}"
+            except Exception:
+                pass
+        return drive.upper()
+
+    # Linux: major:minor del device -> nome in /sys -> UUID del filesystem
+    probe = os.path.abspath(path)
+    while not os.path.exists(probe) and os.path.dirname(probe) != probe:
+        probe = os.path.dirname(probe)
+    try:
+        st_dev = os.stat(probe).st_dev
+        major, minor = os.major(st_dev), os.minor(st_dev)
+    except (OSError, AttributeError):
+        return get_device_key(path)
+    try:
+        name = os.path.basename(os.path.realpath(f"/sys/dev/block/{major}:{minor}"))
+        by_uuid = '/dev/disk/by-uuid'
+        for entry in os.listdir(by_uuid):
+            if os.path.basename(os.path.realpath(os.path.join(by_uuid, entry))) == name:
+                return f"uuid:{entry}"
+    except OSError:
+        pass
+    return f"dev:{major}:{minor}"
+
+
+def is_pid_alive(pid: int) -> bool:
+    """
+    Verifica se un processo locale con quel pid è in esecuzione
+    
+    Un pid riusato da un altro processo risulta vivo: chi lo usa per decidere se
+    eliminare qualcosa sbaglia solo per prudenza.
+    """
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        try:
+            import ctypes
+            # use_last_error: l'errore è salvato subito dopo la chiamata (GetLastError lo perderebbe)
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                # Accesso negato = il processo esiste (di un altro utente)
+                return ctypes.get_last_error() == 5
+            try:
+                code = ctypes.c_ulong()
+                if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                    return True
+                return code.value == 259  # STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+        except Exception:
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return True
+    return True
+
+
+_host_id: Optional[str] = None
+
+
+def get_host_id() -> str:
+    """
+    Identificativo breve (8 cifre hex) di questa macchina
+    
+    Finisce nei nomi dei file temporanei: su una destinazione condivisa (NAS/SMB) distingue
+    i temp scritti da questo host, il cui pid si può verificare, da quelli di altre postazioni.
+    Deriva da machine-id (Linux) o MachineGuid (Windows), altrimenti dal nome host.
+    """
+    global _host_id
+    if _host_id is None:
+        seed = ''
+        if os.name == 'nt':
+            try:
+                import winreg
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Cryptography") as key:
+                    seed = str(winreg.QueryValueEx(key, 'MachineGuid')[0])
+            except Exception:
+                seed = ''
+        else:
+            for candidate in ('/etc/machine-id', '/var/lib/dbus/machine-id'):
+                try:
+                    with open(candidate, 'r') as f:
+                        seed = f.read().strip()
+                except OSError:
+                    continue
+                if seed:
+                    break
+        if not seed:
+            seed = socket.gethostname()
+        _host_id = hashlib.sha1(seed.encode('utf-8', 'replace')).hexdigest()[:8]
+    return _host_id
+
+
 def create_directory_if_not_exists(path: str) -> bool:
     """Crea directory se non esiste"""
     try:
@@ -101,6 +244,7 @@ def create_directory_if_not_exists(path: str) -> bool:
 def get_command_output(command: str) -> str:
     """Esegue comando e ritorna output"""
     try:
+        import subprocess
         result = subprocess.run(
             command,
             shell=True,
@@ -3,14 +3,30 @@ Advanced File Mover - GUI CustomTkinter Modern
 Interfaccia moderna con CustomTkinter (tema automatico, tema switching perfetto)
 """
 
+import time
+_STARTUP_T0 = time.perf_counter()  # Riferimento per --startup-benchmark
+
 import sys
 import os
 import json
 import threading
+import itertools
 import platform
-import concurrent.futures
-import subprocess
+from collections import deque
 from pathlib import Path
+
+# Avvio successivo dal menu contestuale con un'istanza già aperta: consegna la selezione
+# all'istanza primaria (IPC locale) e termina prima di importare Tk/customtkinter
+INSTANCE_FORWARD_WAIT_S = 5.0
+if __name__ == '__main__' and ('--single-instance' in sys.argv or '--from-context-menu' in sys.argv):
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    try:
+        from src.instance_ipc import send_to_primary as _send_to_primary
+        if _send_to_primary(sys.argv):
+            raise SystemExit(0)
+    except ImportError:
+        pass
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 
@@ -20,12 +36,19 @@ import customtkinter as ctk
 # Aggiungi il parent directory al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.file_operations import FileOperationEngine
+from src.file_operations import FileOperationEngine, ProgressSnapshot
 from src.ramdrive_handler import RamDriveManager
 from src.utils import format_bytes, format_time
 from src.storage_detector import StorageDetector
-from src.update_checker import check_for_update_async
-from registry.context_menu import ContextMenuRegistrar
+from src.storage_probe import get_storage_probe
+from src.bandwidth import BandwidthManager, MB
+from src.metrics_export import MetricsExporter
+from src.trace_recorder import TraceRecorder
+from src.job_scheduler import JobScheduler, JobState
+from src.transfer_plan import build_transfer_plan, format_entry_counts, parse_symlink_policy
+from src.eta_estimator import EtaEstimator, get_eta_history
+from src.metadata import parse_preserve
+# update_checker (requests) e registry.context_menu sono importati al primo uso: fuori dal percorso di avvio
 
 # Imposta l'aspetto di CustomTkinter
 ctk.set_appearance_mode("system")  # "dark", "light" o "system"
@@ -151,7 +174,18 @@ class ConfigManager:
             'buffer_size': 100,
             'threads': 4,
             'ramdrive': False,
-            'overwrite': False
+            'overwrite': False,
+            'bandwidth_limit_mb': 0,
+            'auto_tune': True,
+            'preserve_metadata': 'times,mode',
+            'symlink_policy': 'preserve',
+            'special_files': 'skip',
+            'storage_probe': True,
+            'metrics_jsonl_path': '',
+            'metrics_prom_path': '',
+            'metrics_interval': 10,
+            'trace_path': '',
+            'trace_max_events': TraceRecorder.DEFAULT_MAX_EVENTS
         }
     
     def get(self, key, default=None):
@@ -162,7 +196,120 @@ class ConfigManager:
         self.save_config()
 
 
+class _GuiOperation:
+    """Operazione Copia/Sposta avviata dalla GUI: un job del JobScheduler per ogni sorgente del piano.
+
+    Il progresso aggregato nasce dagli snapshot che lo scheduler passa a on_job_progress
+    (un riferimento per job, sostituito a ogni aggiornamento): il loop UI lo legge senza lock.
+    """
+
+    PLANNING = 'planning'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    ERROR = 'error'
+    CANCELLED = 'cancelled'
+    ACTIVE = (PLANNING, RUNNING)
+
+    _ids = itertools.count(1)
+
+    def __init__(self, operation_type, sources, destination):
+        self.id = next(self._ids)
+        self.operation_type = operation_type
+        self.sources = list(sources)
+        self.destination = destination
+        self.state = self.PLANNING
+        self.priority = 0
+        self.cancel_requested = False  # Annulla dell'utente
+        self.halted = False  # Un job è fallito: i job ancora in coda non partono
+        self.error = None
+        self.jobs = []  # TransferJob, in ordine di piano
+        self.engine_settings = {}  # Attributi applicati all'engine di ogni job (configure_engine)
+        self.eta_model = None
+        self.eta_started = time.monotonic()
+        self.progress_started = None  # time.time() del primo avanzamento (velocità media/ETA)
+        self.message = None  # (percentuale, testo) per la riga di progresso quando è selezionata
+        self._known = {}  # job.id -> (byte, file) dal piano
+        self._snapshots = {}  # job.id -> ultimo ProgressSnapshot
+
+    @property
+    def active(self) -> bool:
+        return self.state in self.ACTIVE
+
+    def add_job(self, job, scan):
+        self._known[job.id] = (int(scan.total_size), int(scan.file_count))
+        self.jobs.append(job)
+
+    def on_progress(self, job, data):
+        """Snapshot di un job (thread del job)"""
+        self._snapshots[job.id] = ProgressSnapshot(
+            data.get('current_file', ''),
+            int(data.get('total_size', 0) or 0),
+            int(data.get('processed_size', 0) or 0),
+            float(data.get('speed', 0) or 0),
+            int(data.get('file_index', 0) or 0),
+            int(data.get('file_count', 0) or 0),
+        )
+        if self.progress_started is None:
+            self.progress_started = time.time()
+
+    @property
+    def progress(self) -> ProgressSnapshot:
+        """Snapshot aggregato di tutti i job (job in coda: totali del piano)"""
+        total = processed = file_index = count = 0
+        speed = 0.0
+        names = []
+        for job in list(self.jobs):
+            known_bytes, known_files = self._known.get(job.id, (0, 0))
+            snapshot = self._snapshots.get(job.id)
+            job_total = max(int(snapshot.total_size), known_bytes) if snapshot else known_bytes
+            job_count = max(int(snapshot.file_count), known_files) if snapshot else known_files
+            total += job_total
+            count += job_count
+            if job.state == JobState.DONE:
+                processed += job_total
+                file_index += job_count
+            elif snapshot is not None:
+                processed += int(snapshot.processed_size)
+                file_index += int(snapshot.file_index)
+                if job.state == JobState.RUNNING:
+                    speed += float(snapshot.speed)
+                    if snapshot.current_file:
+                        names.append(snapshot.current_file)
+        current = f"{names[0]} (+{len(names) - 1})" if len(names) > 1 else (names[0] if names else "")
+        return ProgressSnapshot(current, total, processed, speed, file_index, count)
+
+    def outcome(self) -> str:
+        """Esito a job tutti terminati"""
+        states = [job.state for job in self.jobs]
+        if self.error or JobState.FAILED in states:
+            return self.ERROR
+        if self.cancel_requested or JobState.CANCELLED in states:
+            return self.CANCELLED
+        return self.SUCCESS
+
+    def first_error(self):
+        for job in self.jobs:
+            if job.state == JobState.FAILED and job.last_error:
+                return job.last_error
+        return self.error
+
+    def display_state(self) -> str:
+        """Stato per il selettore: planning/queued/running o l'esito"""
+        if self.state == self.RUNNING and not any(job.state == JobState.RUNNING for job in self.jobs):
+            return 'queued'
+        return self.state
+
+
 class AdvancedFileMoverCustomTkinter:
+    # Sottosistemi avviati DOPO il primo disegno della finestra
+    STARTUP_DEFER_MS = 400          # Early detection storage/RamDrive
+    UPDATE_CHECK_DELAY_MS = 5000    # Controllo aggiornamenti (rete)
+    FORWARD_COALESCE_MS = 300       # Raggruppa le selezioni inoltrate da altri avvii (IPC)
+    UI_REFRESH_MS = 100             # Loop UI del progresso durante le operazioni (10 aggiornamenti/s)
+    ENGINE_LOG_MAX = 200            # Messaggi info dell'engine conservati per il tab Informazioni
+    OPERATIONS_HISTORY = 10         # Operazioni concluse che restano nel selettore (esito leggibile)
+    ETA_RANGE_MAX_FACTOR = 4        # Massimo dell'intervallo ETA oltre N volte la stima: mostrato come "?"
+
     def __init__(
         self,
         root,
@@ -208,9 +355,33 @@ class AdvancedFileMoverCustomTkinter:
         # Refresh accurato storage (solo drive coinvolti) - debounced
         self._accurate_refresh_after_id = None
         self._pending_accurate_refresh_letters = set()
-        self.operation_thread = None
-        self.cancel_requested = False
-        self.operation_in_progress = False  # Flag per controllare se operazione è in corso
+        self.operation_in_progress = False  # True finché almeno un'operazione è attiva
+        # Operazioni Copia/Sposta: job del JobScheduler condiviso (creato al primo uso), che le fa
+        # girare in parallelo entro i limiti per device. La sezione progresso mostra (e Annulla
+        # ferma) l'operazione selezionata
+        self._job_scheduler = None
+        self._operations = {}  # id -> _GuiOperation (attive + ultime OPERATIONS_HISTORY concluse)
+        self._operations_lock = threading.Lock()
+        self._selected_operation_id = None
+        self._operation_labels = {}  # voce del selettore -> id operazione
+        self._ramdrive_job = None  # Job che sta usando l'area di staging RamDrive (uno alla volta)
+        # Selezioni inoltrate da avvii successivi (single-instance): un lotto per operazione
+        self._instance_server = None
+        self._forwarded_batches = []
+        self._forwarded_after_id = None
+        self._forwarded_dialog_open = False
+        # Loop UI del progresso: legge a frequenza fissa lo snapshot pubblicato dall'engine.
+        # I testi del worker sono tuple (seq, ...) sostituite per riferimento: nessuna coda di after(0)
+        self._ui_refresh_after_id = None
+        self._ui_seq = itertools.count(1)
+        self._ui_status_msg = None      # (seq, testo) per status_label
+        self._ui_progress_msg = None    # (seq, percentuale, testo) per la riga di progresso
+        self._ui_status_applied = 0
+        self._ui_progress_applied = 0
+        self._ui_snapshot_key = None
+        # Messaggi informativi dell'engine (punto di lavoro dell'autotuner, fasi, file lenti,
+        # piano, metadati): l'ultimo sulla status bar, gli ultimi ENGINE_LOG_MAX nel tab Informazioni
+        self._engine_log = deque(maxlen=self.ENGINE_LOG_MAX)
 
         self._menu_status_restore_after_id = None
         self._auto_close_after_id = None
@@ -232,6 +403,12 @@ class AdvancedFileMoverCustomTkinter:
         # Verranno aggiornati automaticamente in base ai drive selezionati
         self.buffer_size = tk.StringVar(value='100')  # Default: 100MB (hardcoded)
         self.threads = tk.StringVar(value='4')  # Default: 4 thread (hardcoded)
+
+        # Limite banda (MB/s, 0 = illimitato): modificabile live anche durante la copia.
+        # Limiti per device e fasce orarie arrivano da config.json
+        self.bandwidth_manager = BandwidthManager.from_config(self.config_manager.config)
+        self.bandwidth_limit = tk.StringVar(value=str(self.config_manager.get('bandwidth_limit_mb', 0) or 0))
+        self.bandwidth_limit.trace('w', lambda *args: self._on_bandwidth_limit_changed())
         
         # Tema - Carica e applica SUBITO prima di creare i widget
         self.current_theme = self.config_manager.get('theme', 'dark')
@@ -241,37 +418,81 @@ class AdvancedFileMoverCustomTkinter:
         self.storage_detector = StorageDetector()
         self.ramdrive_manager = RamDriveManager()  # Aggiungi RamDrive detection
         
+        # Metadati conservati (times,mode,xattrs | all | none); valore non valido = default
+        try:
+            preserve = parse_preserve(self.config_manager.get('preserve_metadata'))
+        except ValueError:
+            preserve = None
+        try:
+            symlinks = parse_symlink_policy(self.config_manager.get('symlink_policy'))
+        except ValueError:
+            symlinks = None
         self.file_engine = FileOperationEngine(
             buffer_size=int(self.buffer_size.get()) * 1024 * 1024,  # Converti MB a bytes
-            num_threads=int(self.threads.get())
+            num_threads=int(self.threads.get()),
+            auto_tune=bool(self.config_manager.get('auto_tune', True)),
+            preserve=preserve,
+            symlinks=symlinks or 'preserve',
+            skip_special=self.config_manager.get('special_files', 'skip') != 'recreate',
         )
 
-        # Callback progress: aggiorna UI direttamente dal motore (thread-safe via root.after)
+        # Callback error: salva ultimo errore per mostrarlo in UI
         try:
-            self.file_engine.set_progress_callback(self._on_engine_progress)
+            self.file_engine.set_error_callback(self._on_engine_error)
         except Exception:
             pass
 
-        # Callback error: salva ultimo errore per mostrarlo in UI
+        # Export metriche per il monitoraggio (JSON Lines / Prometheus textfile), se configurato
         try:
-            self.file_engine.set_error_callback(self._on_engine_error)
+            metrics = MetricsExporter(
+                jsonl_path=self.config_manager.get('metrics_jsonl_path') or None,
+                prom_path=self.config_manager.get('metrics_prom_path') or None,
+                interval=float(self.config_manager.get('metrics_interval', MetricsExporter.DEFAULT_INTERVAL) or MetricsExporter.DEFAULT_INTERVAL),
+            )
+            if metrics.enabled:
+                self.file_engine.metrics = metrics
+        except Exception:
+            pass
+
+        # Timeline dei trasferimenti (Perfetto), se configurata
+        try:
+            trace_path = self.config_manager.get('trace_path')
+            if trace_path:
+                self.file_engine.trace = TraceRecorder(
+                    output_path=trace_path,
+                    max_events=int(self.config_manager.get('trace_max_events', TraceRecorder.DEFAULT_MAX_EVENTS)
+                                   or TraceRecorder.DEFAULT_MAX_EVENTS),
+                )
+        except Exception:
+            pass
+
+        # Callback info: punto di lavoro scelto dall'auto-tuning, RamDrive, ecc.
+        try:
+            self.file_engine.set_info_callback(self._on_engine_info)
         except Exception:
             pass
         
-        # Context menu
-        self.context_manager = ContextMenuRegistrar()
+        # Context menu (ContextMenuRegistrar creato al primo uso)
+        self._context_manager = None
 
         # UI - Crea l'interfaccia PRIMA della detection (non bloccare UI)
         self.create_widgets()
         
-        # Start async update check after UI is created
-        self._start_update_check()
+        # Controllo aggiornamenti differito: niente rete/requests durante l'avvio
+        self.root.after(self.UPDATE_CHECK_DELAY_MS, self._start_update_check)
         
         # Early detection thread: scansiona tutti i drive in background per accuratezza massima
         def early_storage_detection():
             try:
                 self.ramdrive_manager.detect_ramdrive()
                 self.ramdrive_manager.scan_all_drives()  # Popola cache veloce con QueryDosDevice
+
+                # Fino a qui la UI ha usato solo valori in cache: riapplica con la detection completa
+                try:
+                    self.root.after(0, self._update_ramdrive_option_state)
+                    self.root.after(0, lambda: self._schedule_info_update(delay_ms=0))
+                except Exception:
+                    pass
                 
                 # Carica cache persistente per evitare detection ripetuta
                 cached_types = self.ramdrive_manager._classification_cache.copy()
@@ -319,6 +540,7 @@ class AdvancedFileMoverCustomTkinter:
                     return None
                 
                 # Esegui detection parallelo ma limitato (max 2 in parallelo)
+                import concurrent.futures
                 with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
                     futures = {executor.submit(detect_one_drive, letter): letter for letter in drives_to_detect}
                     
@@ -342,8 +564,11 @@ class AdvancedFileMoverCustomTkinter:
             except Exception as e:
                 print(f"Early detection error: {e}")
         
-        detection_thread = threading.Thread(target=early_storage_detection, daemon=True)
-        detection_thread.start()
+        # Avviata dopo il primo disegno (detect_ramdrive può lanciare processi WMI)
+        self.root.after(
+            self.STARTUP_DEFER_MS,
+            lambda: threading.Thread(target=early_storage_detection, daemon=True).start(),
+        )
 
         # Inizializza sorgenti (manuale vs menu contestuale)
         sources_to_add = []
@@ -473,6 +698,13 @@ class AdvancedFileMoverCustomTkinter:
             except Exception:
                 pass
 
+            # Voci del selettore operazioni (stato tradotto)
+            try:
+                if hasattr(self, 'operation_selector'):
+                    self._refresh_operation_selector()
+            except Exception:
+                pass
+
             # Progress placeholder (se presente)
             try:
                 if hasattr(self, 'progress_label') and self.progress_label is not None:
@@ -718,8 +950,11 @@ class AdvancedFileMoverCustomTkinter:
     def _update_ramdrive_option_state(self):
         """Disabilita 'Usa RamDrive' se la sorgente è sul RamDrive stesso."""
         try:
+            # Prima della early detection (avvio) nessun rilevamento bloccante: il thread la richiama al termine
+            if not self.ramdrive_manager._detection_attempted:
+                return
             try:
-                has_ramdrive = bool(self.ramdrive_manager.detect_ramdrive())
+                has_ramdrive = bool(self.ramdrive_manager.ramdrive_letter) and bool(self.ramdrive_manager.detect_ramdrive())
             except Exception:
                 has_ramdrive = False
 
@@ -734,7 +969,7 @@ class AdvancedFileMoverCustomTkinter:
             source_on_ram = False
             for src in list(self.source_paths or []):
                 try:
-                    if self.ramdrive_manager.get_storage_type(src) == 'ram':
+                    if self.ramdrive_manager.get_cached_storage_type(src) == 'ram':
                         source_on_ram = True
                         break
                 except Exception:
@@ -950,23 +1185,129 @@ class AdvancedFileMoverCustomTkinter:
         except Exception:
             pass
 
+    def _on_forwarded_launch(self, request):
+        """Selezione inoltrata via IPC da un altro avvio (menu contestuale / --single-instance)"""
+        try:
+            argv = [str(a) for a in (request.get('argv') or [])]
+            cwd = str(request.get('cwd') or '')
+            sources, operation_type, _ = _parse_launch_args(argv)
+        except Exception:
+            return
+
+        paths = []
+        for src in sources:
+            if cwd and not os.path.isabs(src):
+                src = os.path.join(cwd, src)
+            # Come all'avvio: selezioni su oggetti shell virtuali vengono ignorate
+            if _is_shell_namespace_path(src):
+                return
+            paths.append(src)
+
+        self._bring_to_front()
+        try:
+            if self._auto_close_after_id is not None:
+                self.root.after_cancel(self._auto_close_after_id)
+                self._auto_close_after_id = None
+        except Exception:
+            pass
+
+        if not paths:
+            return
+        if operation_type not in ('copy', 'move'):
+            self._add_source_paths(paths)
+            return
+
+        # Avvio dal menu ancora in attesa della destinazione per la stessa operazione: stessa selezione
+        if (self.launched_from_context_menu and operation_type == self.context_operation_type
+                and not self.dest_path.get() and not self.operation_in_progress):
+            self._add_source_paths(paths)
+            return
+
+        for batch in self._forwarded_batches:
+            if batch['operation'] == operation_type:
+                batch['sources'].extend(p for p in paths if p not in batch['sources'])
+                break
+        else:
+            self._forwarded_batches.append({'operation': operation_type, 'sources': paths})
+
+        # Con il dialogo destinazione aperto il lotto resta aperto: ripartirà alla chiusura
+        if self._forwarded_dialog_open:
+            return
+        try:
+            if self._forwarded_after_id is not None:
+                self.root.after_cancel(self._forwarded_after_id)
+        except Exception:
+            pass
+        self._forwarded_after_id = self.root.after(self.FORWARD_COALESCE_MS, self._process_forwarded_batches)
+
+    def _process_forwarded_batches(self):
+        """Una destinazione per lotto inoltrato; poi un'operazione nello scheduler come per i bottoni"""
+        self._forwarded_after_id = None
+        while self._forwarded_batches:
+            batch = self._forwarded_batches[0]
+            self._forwarded_dialog_open = True
+            try:
+                folder = filedialog.askdirectory(
+                    title=self._t('dlg_forwarded_destination_title', 'Destinazione per {n} elementi').format(
+                        n=len(batch['sources'])
+                    )
+                )
+            finally:
+                self._forwarded_dialog_open = False
+            self._forwarded_batches.pop(0)
+            if not folder:
+                continue
+
+            # A riposo la selezione inoltrata diventa quella visibile; altrimenti è solo un'operazione in più
+            if not self.operation_in_progress:
+                self._clear_all_sources()
+                self._add_source_paths(batch['sources'])
+                self.dest_path.set(folder)
+                try:
+                    self._auto_profile_parameters()
+                except Exception:
+                    pass
+            self._launch_operation(batch['operation'], batch['sources'], folder)
+
+    def _bring_to_front(self):
+        try:
+            self.root.deiconify()
+            self.root.lift()
+            self.root.attributes('-topmost', True)
+            self.root.after(200, lambda: self.root.attributes('-topmost', bool(self.always_on_top_var.get())))
+            self.root.focus_force()
+        except Exception:
+            pass
+
     def _on_engine_error(self, message: str):
         try:
             self._last_engine_error = str(message)
         except Exception:
             self._last_engine_error = None
 
-        def _apply():
+        self._post_status(message)
+    
+    def _on_engine_info(self, message: str):
+        """Callback info dell'engine (thread worker): storico + status bar sul thread UI"""
+        text = str(message)
+        self._engine_log.append(time.strftime('%H:%M:%S ') + text)
+        try:
+            self.root.after(0, self._show_engine_info, text)
+        except Exception:
+            pass
+
+    def _show_engine_info(self, text: str):
+        # Report su più righe (fasi, file lenti): la prima in status bar, il resto nel tab Informazioni
+        first_line = text.splitlines()[0] if text else text
+        self._post_status(first_line)
+        if not self.operation_in_progress:
+            # Loop di refresh fermo (messaggi di fine operazione): applicato subito
             try:
-                self.status_label.configure(text=str(message))
+                self._ui_status_applied = self._ui_status_msg[0]
+                self.status_label.configure(text=first_line)
             except Exception:
                 pass
 
-        try:
-            self.root.after(0, _apply)
-        except Exception:
-            pass
-    
     def create_widgets(self):
         """Crea i widget della GUI con CustomTkinter"""
         # Layout root: notebook sopra (espandibile) + footer sotto (altezza fissa)
@@ -1146,6 +1487,12 @@ class AdvancedFileMoverCustomTkinter:
         thread_entry = ctk.CTkEntry(params_frame, textvariable=self.threads, width=80, state='disabled')
         thread_entry.pack(side='left', padx=5)
         
+        self.bandwidth_label = ctk.CTkLabel(params_frame, text=self._t('label_bandwidth_limit', "Limite MB/s:"))
+        self._i18n_register(self.bandwidth_label, 'label_bandwidth_limit', "Limite MB/s:")
+        self.bandwidth_label.pack(side='left', padx=(20, 5))
+        bandwidth_entry = ctk.CTkEntry(params_frame, textvariable=self.bandwidth_limit, width=70)
+        bandwidth_entry.pack(side='left', padx=5)
+        
         self.auto_profile_hint = ctk.CTkLabel(params_frame, text=self._t('hint_auto_profile', "(Auto-profilazione basata su storage)"), text_color="gray")
         self._i18n_register(self.auto_profile_hint, 'hint_auto_profile', "(Auto-profilazione basata su storage)")
         self.auto_profile_hint.pack(side='left', padx=20)
@@ -1176,6 +1523,20 @@ class AdvancedFileMoverCustomTkinter:
         self.cancel_btn = ctk.CTkButton(buttons_frame, text=self._t('btn_cancel', "❌ Annulla"), command=self.cancel_operation, state='disabled')
         self._i18n_register(self.cancel_btn, 'btn_cancel', "❌ Annulla")
         self.cancel_btn.pack(side='left', padx=5)
+
+        # Operazione mostrata nella sezione progresso (e fermata da Annulla): una voce per operazione
+        self.operation_selector = ctk.CTkOptionMenu(
+            buttons_frame, values=[''], width=280, command=self._on_operation_selected, state='disabled'
+        )
+        self.operation_selector.set('')
+        self.operation_selector.pack(side='left', padx=5)
+
+        self.prioritize_btn = ctk.CTkButton(
+            buttons_frame, text=self._t('btn_prioritize', "⏫ Priorità"), width=90,
+            command=self._prioritize_operation, state='disabled'
+        )
+        self._i18n_register(self.prioritize_btn, 'btn_prioritize', "⏫ Priorità")
+        self.prioritize_btn.pack(side='left', padx=5)
         
         # Sezione Progresso
         progress_frame = ctk.CTkFrame(self.main_tab)
@@ -1326,7 +1687,8 @@ class AdvancedFileMoverCustomTkinter:
             self.info_text.insert('end', self._t('info_ramdrive_section', "💾 RAMDRIVE") + "\n")
             self.info_text.insert('end', "═" * 50 + "\n")
             
-            ramdrive_status = self.ramdrive_manager.detect_ramdrive()
+            # Solo stato già rilevato (la early detection aggiorna il tab al termine)
+            ramdrive_status = bool(self.ramdrive_manager.ramdrive_letter) and self.ramdrive_manager.detect_ramdrive()
             if ramdrive_status:
                 ram_letter = self.ramdrive_manager.ramdrive_letter
                 self.info_text.insert('end', self._t('info_status_detected', "Stato: ✅ RILEVATO") + "\n")
@@ -1350,12 +1712,12 @@ class AdvancedFileMoverCustomTkinter:
             self.info_text.insert('end', self._t('info_storage_section', "🗂️ STORAGE RILEVATO") + "\n")
             self.info_text.insert('end', "═" * 50 + "\n")
             try:
-                # Usa get_storage_type() che ritorna dalla cache raffinata (PowerShell lazy)
-                # NON usare scan_all_drives() che ritorna la cache veloce (QueryDosDevice)
+                # Cache raffinata se presente, altrimenti classificazione veloce (QueryDosDevice):
+                # niente PowerShell sul thread UI, il refresh in background riaggiorna il tab
                 import os
                 for letter in sorted('CDEFGHIJKLMNOPQRSTUVWXYZ'):
                     if os.path.exists(f"{letter}:\\"):
-                        storage_type = self.ramdrive_manager.get_storage_type(f"{letter}:\\")
+                        storage_type = self.ramdrive_manager.get_cached_storage_type(f"{letter}:\\")
                         self.info_text.insert('end', f"{letter}: {storage_type.upper()}\n")
             except Exception as e:
                 self.info_text.insert('end', f"{self._t('info_detect_error', 'Errore rilevamento')}: {str(e)}\n")
@@ -1381,12 +1743,12 @@ class AdvancedFileMoverCustomTkinter:
                     for i, src in enumerate(list(self.source_paths), start=1):
                         storage_type_src = None
                         try:
-                            storage_type_src = self.ramdrive_manager.get_storage_type(src)
+                            storage_type_src = self.ramdrive_manager.get_cached_storage_type(src)
                         except Exception:
                             try:
                                 drive = os.path.splitdrive(src)[0]
                                 if drive:
-                                    storage_type_src = self.ramdrive_manager.get_storage_type(drive + "\\")
+                                    storage_type_src = self.ramdrive_manager.get_cached_storage_type(drive + "\\")
                             except Exception:
                                 storage_type_src = None
 
@@ -1405,7 +1767,7 @@ class AdvancedFileMoverCustomTkinter:
                 self.info_text.insert('end', self._t('info_params_dest', "⚙️ PARAMETRI AUTO-TUNING (DESTINAZIONE)") + "\n")
                 self.info_text.insert('end', "═" * 50 + "\n")
                 try:
-                    storage_type_str = self.ramdrive_manager.get_storage_type(self.dest_path.get())
+                    storage_type_str = self.ramdrive_manager.get_cached_storage_type(self.dest_path.get())
                     params = optimal_params.get(storage_type_str, {'buffer_mb': 100, 'threads': 4})
                     
                     dest_label = self._t('main_destination', 'Destinazione:')
@@ -1430,6 +1792,14 @@ class AdvancedFileMoverCustomTkinter:
             self.info_text.insert('end', f"{self._t('opt_overwrite', 'Sovrascrivi file esistenti')}: {'✅ ' + self._t('yes', 'SI') if self.overwrite_enabled.get() else '❌ ' + self._t('no', 'NO')}\n")
             self.info_text.insert('end', f"{self._t('opt_delete_source', 'Elimina origine (Sposta)')}: {'✅ ' + self._t('yes', 'SI') if self.delete_source_enabled.get() else '❌ ' + self._t('no', 'NO')}\n\n")
             
+            # === LOG MOTORE ===
+            if self._engine_log:
+                self.info_text.insert('end', self._t('info_engine_log', "📜 LOG MOTORE") + "\n")
+                self.info_text.insert('end', "═" * 50 + "\n")
+                for line in list(self._engine_log):
+                    self.info_text.insert('end', line + "\n")
+                self.info_text.insert('end', "\n")
+
             # === VERSION ===
             self.info_text.insert('end', self._t('info_version', "📝 VERSIONE") + "\n")
             self.info_text.insert('end', "═" * 50 + "\n")
@@ -1536,8 +1906,8 @@ class AdvancedFileMoverCustomTkinter:
         # Spacer in fondo per uniformità con altre tab
         ctk.CTkFrame(frame, height=20, fg_color="transparent").pack(fill='x')
         
-        # Carica stato iniziale
-        self.check_menu_status()
+        # Carica stato iniziale dopo il primo disegno (registro + import del registrar)
+        self.root.after(self.STARTUP_DEFER_MS, self.check_menu_status)
     
     def create_view_tab(self):
         """Tab visualizzazione"""
@@ -1662,20 +2032,7 @@ class AdvancedFileMoverCustomTkinter:
             if not self.dest_path.get():
                 return  # Skip se destinazione non impostata
             
-            # Rileva storage type della destinazione usando RamDriveManager
-            storage_type_str = self.ramdrive_manager.get_storage_type(self.dest_path.get())
-            
-            # Mappa storage type string -> parametri ottimali
-            optimal_params = {
-                'ram': {'buffer_mb': 8, 'threads': 16},
-                'nvme': {'buffer_mb': 256, 'threads': 12},
-                'ssd': {'buffer_mb': 128, 'threads': 8},
-                'usb': {'buffer_mb': 64, 'threads': 4},
-                'nas': {'buffer_mb': 32, 'threads': 2},
-                'hdd': {'buffer_mb': 80, 'threads': 2}
-            }
-            
-            params = optimal_params.get(storage_type_str, {'buffer_mb': 100, 'threads': 4})
+            params = self._storage_params_for(self.dest_path.get())
             
             # Aggiorna i parametri visualizzati
             self.buffer_size.set(str(params['buffer_mb']))
@@ -1792,20 +2149,7 @@ class AdvancedFileMoverCustomTkinter:
             # Ottieni il drive di destinazione
             dest_drive = os.path.splitdrive(self.dest_path.get())[0]
             
-            # Determina il tipo di storage della destinazione
-            storage_type = self.ramdrive_manager.get_storage_type(self.dest_path.get())
-            
-            # Parametri ottimali per diversi storage type
-            optimal_params = {
-                'ram': {'buffer_mb': 8, 'threads': 16},
-                'nvme': {'buffer_mb': 256, 'threads': 12},
-                'ssd': {'buffer_mb': 128, 'threads': 8},
-                'usb': {'buffer_mb': 64, 'threads': 4},
-                'nas': {'buffer_mb': 32, 'threads': 2},
-                'hdd': {'buffer_mb': 80, 'threads': 2}
-            }
-            
-            params = optimal_params.get(storage_type, {'buffer_mb': 100, 'threads': 4})
+            params = self._storage_params_for(self.dest_path.get())
             
             # Aggiorna i valori (NON salva nel config)
             self.buffer_size.set(str(params['buffer_mb']))
@@ -1816,6 +2160,62 @@ class AdvancedFileMoverCustomTkinter:
             self.buffer_size.set('100')
             self.threads.set('4')
     
+    def _storage_params_for(self, path):
+        """Buffer/thread per path: misura reale del volume se disponibile, altrimenti tabella"""
+        measured = self.storage_detector.get_measured_profile(path)
+        if measured:
+            return measured
+
+        # Volume mai misurato: valori di tabella subito (classificazione in cache, mai PowerShell
+        # sul thread UI: il refresh accurato in background riapplica i parametri), sonda (~1s) in background
+        self._schedule_storage_probe(path)
+        return StorageDetector.profile_for(self.ramdrive_manager.get_cached_storage_type(path))
+
+    def _schedule_storage_probe(self, path):
+        if self.operation_in_progress or not self.config_manager.get('storage_probe', True):
+            return
+
+        def _done(result, path=path):
+            if not result:
+                return
+            try:
+                self.root.after(0, lambda: self._on_storage_probe_done(path))
+            except Exception:
+                pass
+
+        try:
+            get_storage_probe().probe_async(path, _done)
+        except Exception:
+            pass
+
+    def _on_storage_probe_done(self, path):
+        """Riapplica i parametri se la destinazione misurata è ancora quella selezionata"""
+        if self.operation_in_progress:
+            return
+        try:
+            if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(self.dest_path.get())):
+                self._auto_tune_parameters()
+        except Exception:
+            pass
+
+    def _on_bandwidth_limit_changed(self):
+        """Applica subito il nuovo limite di banda (anche al job in corso)"""
+        try:
+            limit_mb = float(str(self.bandwidth_limit.get() or '0').replace(',', '.'))
+        except ValueError:
+            return
+        if limit_mb < 0:
+            limit_mb = 0
+        self.bandwidth_manager.set_job_limit(limit_mb * MB)
+
+        # Job già partiti senza throttle: agganciane uno ora (il loop lo rilegge a ogni chunk)
+        try:
+            for job in self._running_jobs():
+                if job.engine.throttle is None:
+                    job.engine.throttle = self.bandwidth_manager.throttle_for(job.source, job.destination)
+        except Exception:
+            pass
+
     def _start_operation(self, operation_type):
         """Avvia copia/sposta"""
         if not self.source_paths:
@@ -1832,9 +2232,27 @@ class AdvancedFileMoverCustomTkinter:
         if not self.dest_path.get():
             messagebox.showwarning(self._t('warn_title', 'Avviso'), self._t('warn_select_destination', 'Seleziona una destinazione'))
             return
-        
-        self.cancel_requested = False
+
+        self._launch_operation(operation_type, list(self.source_paths), self.dest_path.get())
+
+    def _launch_operation(self, operation_type, sources, destination):
+        """Nuova operazione: piano in background, poi un job per sorgente nel JobScheduler condiviso.
+
+        Le operazioni non si aspettano a vicenda: lo scheduler le fa girare in parallelo entro
+        i limiti di stream per device (un HDD/USB alla volta, più stream su SSD/NVMe).
+        """
+        try:
+            if self._auto_close_after_id is not None:
+                self.root.after_cancel(self._auto_close_after_id)
+                self._auto_close_after_id = None
+        except Exception:
+            pass
+
+        op = _GuiOperation(operation_type, sources, destination)
+        with self._operations_lock:
+            self._operations[op.id] = op
         self.operation_in_progress = True
+        self._get_job_scheduler()
 
         # Ensure accurato immediato (in background) SOLO per i drive correnti
         # - Non blocca l'operazione
@@ -1844,33 +2262,30 @@ class AdvancedFileMoverCustomTkinter:
         except Exception:
             pass
 
-        try:
-            if hasattr(self, 'file_counter_label') and self.file_counter_label is not None:
-                self.file_counter_label.configure(text="")
-        except Exception:
-            pass
-
-        # Reset stato batch (selezione multipli file)
-        try:
-            self._batch_file_count = 0
-            self._batch_file_index = 0
-            self._batch_total_size = 0
-            self._batch_completed_bytes = 0
-        except Exception:
-            pass
+        # La nuova operazione diventa quella mostrata nella sezione progresso
+        self._select_operation(op.id)
 
         # Mostra UI progresso quando parte l'operazione
+        # (Copia/Sposta restano attivi: ogni clic è un'altra operazione nello scheduler)
         self.root.after(0, self._show_progress_ui)
-        self.copy_btn.configure(state='disabled')
-        self.move_btn.configure(state='disabled')
-        self.cancel_btn.configure(state='normal')
-        
-        self.operation_thread = threading.Thread(
-            target=self._operation_worker,
-            args=(operation_type,),
-            daemon=True
-        )
-        self.operation_thread.start()
+        self._start_ui_refresh()
+
+        threading.Thread(target=self._plan_operation, args=(op,), daemon=True).start()
+
+    def _get_job_scheduler(self):
+        """JobScheduler condiviso da tutte le operazioni della GUI (creato al primo uso)"""
+        if self._job_scheduler is None:
+            scheduler = JobScheduler(
+                ramdrive_manager=self.ramdrive_manager,
+                engine_factory=self._create_job_engine,
+                bandwidth_manager=self.bandwidth_manager,
+                metrics_exporter=self.file_engine.metrics,
+            )
+            scheduler.on_job_update = self._on_job_update
+            scheduler.on_job_progress = self._on_job_progress
+            scheduler.configure_engine = self._configure_job_engine
+            self._job_scheduler = scheduler
+        return self._job_scheduler
 
     def _ensure_accurate_storage_for_current_drives_async(self, operation_type: str):
         try:
@@ -1932,11 +2347,14 @@ class AdvancedFileMoverCustomTkinter:
                         except Exception:
                             pass
 
-                        # Se un'operazione è in corso, prova ad aggiornare anche l'engine (best-effort)
+                        # Operazioni in corso: aggiorna anche gli engine dei job attivi (best-effort)
                         try:
                             if self.operation_in_progress and hasattr(self, 'file_engine') and self.file_engine is not None:
                                 self.file_engine.buffer_size = int(self.buffer_size.get()) * 1024 * 1024
                                 self.file_engine.num_threads = int(self.threads.get())
+                                for job in self._running_jobs():
+                                    job.engine.buffer_size = self.file_engine.buffer_size
+                                    job.engine.num_threads = self.file_engine.num_threads
                         except Exception:
                             pass
 
@@ -1951,86 +2369,113 @@ class AdvancedFileMoverCustomTkinter:
         except Exception:
             pass
 
-    def _on_engine_progress(self, progress_data):
-        """Riceve progress dal FileOperationEngine e aggiorna la UI."""
+    def _post_status(self, text):
+        """Testo per status_label da qualsiasi thread (lo applica il loop UI; vince l'ultimo)"""
+        self._ui_status_msg = (next(self._ui_seq), str(text))
+
+    def _post_progress(self, percentage, text):
+        """Testo della riga di progresso da qualsiasi thread (resta finché l'engine non avanza)"""
+        self._ui_progress_msg = (next(self._ui_seq), percentage, text)
+
+    def _progress_snapshot(self):
+        """Vista aggregata dei job dell'operazione selezionata"""
         try:
-            pct = progress_data.get('percentage', 0)
-            current = progress_data.get('current_file', '')
-            file_index = progress_data.get('file_index', 0)
-            file_count = progress_data.get('file_count', 0)
+            op = self._selected_operation()
+            return op.progress if op is not None else ProgressSnapshot()
         except Exception:
-            pct = 0
-            current = ''
-            file_index = 0
-            file_count = 0
+            return ProgressSnapshot()
 
-        def _apply():
-            # pct dal motore è float (0-100)
-            try:
-                self._update_progress(pct, current)
-            except Exception:
-                pass
+    def _start_ui_refresh(self):
+        if self._ui_refresh_after_id is None:
+            self._ui_refresh_after_id = self.root.after(self.UI_REFRESH_MS, self._ui_refresh_tick)
 
-            # Aggiorna contatore file su label dedicata (più stabile)
-            # - Se l'utente ha selezionato SOLO file, usa un contatore "batch" (1/n) anche per n=1
-            # - Se c'è una cartella tra le sorgenti, usa il contatore del motore (file dentro la cartella)
-            try:
-                batch_n = int(getattr(self, '_batch_file_count', 0) or 0)
-                batch_i = int(getattr(self, '_batch_file_index', 0) or 0)
-                if batch_n > 1:
-                    if batch_i <= 0:
-                        batch_i = 1
-                    self.file_counter_label.configure(text=f"{batch_i}/{batch_n}")
-                    return
-                elif batch_n == 1:
-                    self.file_counter_label.configure(text="")
-                    return
+    def _ui_refresh_tick(self):
+        """Un aggiornamento della UI di progresso: costo fisso, indipendente dalla velocità del trasferimento"""
+        self._ui_refresh_after_id = None
+        # Letto PRIMA di applicare: i testi finali pubblicati dal worker prima di
+        # azzerare operation_in_progress vengono applicati in questo stesso tick
+        running = self.operation_in_progress
+        try:
+            self._apply_progress_state()
+        except Exception:
+            pass
+        if running:
+            self._start_ui_refresh()
+
+    def _apply_progress_state(self):
+        status = self._ui_status_msg
+        if status is not None and status[0] > self._ui_status_applied:
+            self._ui_status_applied = status[0]
+            self.status_label.configure(text=status[1])
+
+        snapshot = self._progress_snapshot()
+        key = (snapshot.processed_size, snapshot.total_size, snapshot.file_index,
+               snapshot.file_count, snapshot.current_file)
+        message = self._ui_progress_msg
+        if message is not None and message[0] > self._ui_progress_applied:
+            self._ui_progress_applied = message[0]
+            self._ui_snapshot_key = key
+            self._update_progress(message[1], message[2], snapshot)
+            return
+        if key == self._ui_snapshot_key:
+            return  # nessun avanzamento: niente lavoro su Tk
+        self._ui_snapshot_key = key
+        if not (snapshot.processed_size or snapshot.file_index or snapshot.current_file):
+            return  # engine appena azzerato: resta il testo pubblicato dal worker
+        self._update_progress(snapshot.percentage, snapshot.current_file, snapshot)
+        self._update_file_counter(snapshot)
+
+    def _update_file_counter(self, snapshot):
+        """Contatore file (i/n) dell'operazione selezionata sulla label dedicata"""
+        try:
+            n = int(snapshot.file_count)
+            if n > 1:
+                self.file_counter_label.configure(text=f"{min(n, max(0, int(snapshot.file_index)))}/{n}")
+            else:
+                self.file_counter_label.configure(text="")
+        except Exception:
+            pass
+    
+    def _progress_file_counts(self, snapshot):
+        """(file avviati, file totali) dell'intera operazione per la stima ETA"""
+        count = int(snapshot.file_count or 0)
+        return min(int(snapshot.file_index or 0), count), count
 
-                n = int(file_count)
-                i = int(file_index)
-                if n > 1:
-                    if i > 0:
-                        self.file_counter_label.configure(text=f"{i}/{n}")
-                    else:
-                        self.file_counter_label.configure(text=f"0/{n}")
-                else:
-                    self.file_counter_label.configure(text="")
-            except Exception:
-                pass
+    def _create_eta_model(self, sources, destination):
+        """Stimatore ETA che parte dai job precedenti sulla stessa coppia di volumi (se presenti)"""
+        prior = None
+        try:
+            if sources:
+                prior = get_eta_history().prior(sources[0], destination)
+        except Exception:
+            prior = None
+        return EtaEstimator(prior=prior)
 
+    def _record_eta_history(self, op):
+        """Coefficienti dell'operazione riuscita nello storico della coppia di volumi"""
+        model = op.eta_model
+        if model is None or not op.sources:
+            return
         try:
-            self.root.after(0, _apply)
+            get_eta_history().record(op.sources[0], op.destination, model, time.monotonic() - op.eta_started)
         except Exception:
             pass
-    
-    def _progress_monitor(self):
-        """Monitora progress durante l'operazione (ogni 100ms)"""
-        import time
-        
-        while self.operation_in_progress:
-            try:
-                # Ottieni dati progress dal file_engine
-                if hasattr(self.file_engine, 'processed_size') and hasattr(self.file_engine, 'total_size'):
-                    total = self.file_engine.total_size
-                    processed = self.file_engine.processed_size
-                    
-                    if total > 0:
-                        percentage = int((processed / total) * 100)
-                        self.root.after(0, lambda p=percentage: self._update_progress(p, ""))
-                
-                time.sleep(0.1)  # Aggiorna ogni 100ms
-            except:
-                time.sleep(0.1)
-    
-    def _operation_worker(self, operation_type):
-        """Worker thread per operazione copia/sposta"""
-        result_state = 'error'
-        try:
-            # Reset progress bar e timer
-            self._progress_start_time = None  # Reset timer per ETA
-            self.root.after(0, lambda: self._update_progress(0, self._t('status_operation_in_progress', 'Operazione in corso...')))
-            self.root.after(0, lambda: self.status_label.configure(text=self._t('status_operation_running', 'Operazione {op} in corso...').format(op=self._op_name_upper(operation_type))))
-            
+
+    # --- Operazioni nel JobScheduler -------------------------------------------------
+
+    def _post_operation_progress(self, op, percentage, text):
+        """Testo della riga di progresso di un'operazione (mostrato se è quella selezionata)"""
+        op.message = (percentage, text)
+        if op.id == self._selected_operation_id:
+            self._post_progress(percentage, text)
+
+    def _plan_operation(self, op):
+        """Thread dell'operazione: RamDrive, piano del job e un job per sorgente nello scheduler"""
+        scheduler = self._get_job_scheduler()
+        try:
+            self._post_operation_progress(op, 0, self._t('status_operation_in_progress', 'Operazione in corso...'))
+            self._post_status(self._t('status_operation_running', 'Operazione {op} in corso...').format(op=self._op_name_upper(op.operation_type)))
+
             # Controlla se usare RamDrive
             try:
                 # Refresh detection per gestire cambi a runtime (lettera/dimensione)
@@ -2038,179 +2483,314 @@ class AdvancedFileMoverCustomTkinter:
             except Exception:
                 pass
 
-            use_ramdrive = self.ramdrive_enabled.get() and self.ramdrive_manager.detect_ramdrive()
-            try:
-                self.file_engine.use_ramdrive = bool(use_ramdrive)
-                self.file_engine.ramdrive_letter = self.ramdrive_manager.ramdrive_letter if use_ramdrive else None
-            except Exception:
-                pass
+            use_ramdrive = bool(self.ramdrive_enabled.get() and self.ramdrive_manager.detect_ramdrive())
+            ramdrive_letter = getattr(self.ramdrive_manager, 'ramdrive_letter', None) if use_ramdrive else None
 
             # Feedback (non invasivo) su stato RamDrive
-            try:
-                if use_ramdrive and getattr(self.ramdrive_manager, 'ramdrive_letter', None):
-                    self.root.after(
-                        0,
-                        lambda l=self.ramdrive_manager.ramdrive_letter: self.status_label.configure(
-                            text=self._t('status_operation_running_ramdrive', 'Operazione {op} in corso... (RamDrive: {letter}:)').format(op=self._op_name_upper(operation_type), letter=l)
-                        ),
-                    )
-            except Exception:
-                pass
-            
-            # Aggiorna engine con parametri correnti
-            self.file_engine.buffer_size = int(self.buffer_size.get()) * 1024 * 1024
-            self.file_engine.num_threads = int(self.threads.get())
-            self.file_engine.reset_progress()
-            
-            destination = self.dest_path.get()
+            if ramdrive_letter:
+                self._post_status(
+                    self._t('status_operation_running_ramdrive', 'Operazione {op} in corso... (RamDrive: {letter}:)').format(
+                        op=self._op_name_upper(op.operation_type), letter=ramdrive_letter)
+                )
 
-            # Se l'utente ha selezionato SOLO file, mostra sempre (1/n) a livello batch
-            try:
-                only_files = True
-                for s in self.source_paths:
-                    if os.path.isdir(s):
-                        only_files = False
+            # Parametri correnti per gli engine dei job di questa operazione
+            op.engine_settings = {
+                'buffer_size': int(self.buffer_size.get()) * 1024 * 1024,
+                'num_threads': int(self.threads.get()),
+                'use_ramdrive': use_ramdrive,
+                'ramdrive_letter': ramdrive_letter,
+            }
+
+            # Piano del job: una sola scansione (concorrente per device) di tutte le sorgenti,
+            # selezioni sovrapposte scartate, totali unici per percentuale/ETA/contatore file (i/n)
+            plan = self._build_transfer_plan(op)
+            if plan is None:
+                op.cancel_requested = True
+            else:
+                op.sources = plan.sources
+                op.eta_model = self._create_eta_model(op.sources, op.destination)
+                op.eta_started = time.monotonic()
+                for item in plan.items:
+                    if op.cancel_requested or op.halted:
                         break
-                if only_files:
-                    self._batch_file_count = int(len(self.source_paths))
-                    self._batch_file_index = 0
-                    # Calcola il totale byte per percentuale/ETA cumulativi
-                    total_bytes = 0
-                    for s in self.source_paths:
-                        try:
-                            total_bytes += int(os.path.getsize(s))
-                        except Exception:
-                            pass
-                    self._batch_total_size = int(total_bytes)
-                    self._batch_completed_bytes = 0
-                else:
-                    self._batch_file_count = 0
-                    self._batch_file_index = 0
-                    self._batch_total_size = 0
-                    self._batch_completed_bytes = 0
-            except Exception:
-                self._batch_file_count = 0
-                self._batch_file_index = 0
-                self._batch_total_size = 0
-                self._batch_completed_bytes = 0
-            
-            # Calcola numero totale di sorgenti per barra progresso
-            total_sources = len(self.source_paths)
-            
-            # Esegui operazione per ogni sorgente
-            for idx, source in enumerate(self.source_paths, start=1):
-                if self.cancel_requested:
-                    self.root.after(0, lambda: self._update_progress(0, self._t('status_cancelled', "❌ Operazione annullata")))
-                    self.root.after(0, lambda: self.status_label.configure(text=self._t('status_cancelled', "❌ Operazione annullata")))
-                    result_state = 'cancelled'
-                    break
-
-                # Aggiorna contatore batch (solo se selezione contiene solo file)
-                try:
-                    n = int(getattr(self, '_batch_file_count', 0) or 0)
-                    if n > 1:
-                        self._batch_file_index = int(idx)
-                        i = int(self._batch_file_index)
-                        self.root.after(0, lambda i=i, n=n: self.file_counter_label.configure(text=f"{i}/{n}"))
-                    elif n == 1:
-                        self.root.after(0, lambda: self.file_counter_label.configure(text=""))
-                except Exception:
-                    pass
-                
-                # Informa che stiamo elaborando questo file
-                self.root.after(0, lambda s=source: self.status_label.configure(text=self._t('status_processing_file', 'Elaborando: {name}...').format(name=Path(s).name)))
-                
-                # Se la sorgente è una cartella, copia/sposta la cartella intera dentro la destinazione
-                # (es: dest\NomeCartella) invece di riversarne i file direttamente nella root
-                item_destination = destination
-                try:
-                    if os.path.isdir(source):
-                        item_destination = os.path.join(destination, Path(source).name)
-                except Exception:
-                    item_destination = destination
+                    job = scheduler.submit(
+                        op.operation_type, item.source, item.destination,
+                        priority=op.priority, options={'gui_operation': op.id}, scan=item,
+                    )
+                    with self._operations_lock:
+                        op.add_job(job, item)
+                    if op.cancel_requested or op.halted:
+                        scheduler.cancel(job.id)
+        except Exception as e:
+            op.error = str(e)
+            op.halted = True
+            for job in list(op.jobs):
+                scheduler.cancel(job.id)
 
-                if operation_type == 'copy':
-                    try:
-                        self._last_engine_error = None
-                    except Exception:
-                        pass
-                    success = self.file_engine.copy(source, item_destination)
-                elif operation_type == 'move':
-                    try:
-                        self._last_engine_error = None
-                    except Exception:
-                        pass
-                    success = self.file_engine.move(source, item_destination)
+        with self._operations_lock:
+            if op.state == op.PLANNING:
+                op.state = op.RUNNING
+        self.root.after(0, self._refresh_operation_selector)
+        self._check_operation_done(op)
+
+    def _operation_of(self, job):
+        try:
+            return self._operations.get(job.options.get('gui_operation'))
+        except Exception:
+            return None
+
+    def _configure_job_engine(self, job, engine):
+        """configure_engine dello scheduler: parametri dell'operazione sull'engine del job"""
+        op = self._operation_of(job)
+        if op is None:
+            return
+        settings = dict(op.engine_settings)
+        if settings.get('use_ramdrive'):
+            # Staging RamDrive a un solo job alla volta: lo spazio libero è verificato per job,
+            # due job in parallelo lo esaurirebbero. Gli altri copiano direttamente
+            with self._operations_lock:
+                holder = self._ramdrive_job
+                if holder is None or holder.state in JobState.FINISHED:
+                    self._ramdrive_job = job
                 else:
-                    raise ValueError(self._t('error_unknown_operation', 'Operazione sconosciuta: {operation}').format(operation=operation_type))
+                    settings['use_ramdrive'] = False
+        for name, value in settings.items():
+            setattr(engine, name, value)
+
+    def _on_job_progress(self, job, data):
+        """on_job_progress dello scheduler (thread del job): aggiorna la vista aggregata"""
+        op = self._operation_of(job)
+        if op is not None:
+            op.on_progress(job, data)
+
+    def _on_job_update(self, job):
+        """on_job_update dello scheduler: cambi di stato dei job (avvio, fine)"""
+        op = self._operation_of(job)
+        if op is None:
+            return
+        if job.state == JobState.FAILED and not op.halted:
+            # Come l'esecuzione in sequenza: dopo un errore le sorgenti non ancora avviate restano ferme
+            op.halted = True
+            scheduler = self._get_job_scheduler()
+            for other in list(op.jobs):
+                if other.state == JobState.QUEUED:
+                    scheduler.cancel(other.id)
+        try:
+            self.root.after(0, self._refresh_operation_selector)
+        except Exception:
+            pass
+        if job.state in JobState.FINISHED:
+            self._check_operation_done(op)
 
-                # Aggiorna bytes completati per batch (solo file)
-                try:
-                    if success and int(getattr(self, '_batch_total_size', 0) or 0) > 0 and os.path.isfile(source):
-                        self._batch_completed_bytes += int(os.path.getsize(source))
-                except Exception:
-                    pass
-                
-                if not success:
-                    try:
-                        err = getattr(self, '_last_engine_error', None)
-                    except Exception:
-                        err = None
-                    msg = self._t('status_error_during_operation', '❌ Errore durante {op}').format(op=self._op_name(operation_type))
-                    if err:
-                        msg = f"{msg}: {err}"
-                    self.root.after(0, lambda m=msg: self._update_progress(0, m))
-                    self.root.after(0, lambda m=msg: self.status_label.configure(text=m))
-                    result_state = 'error'
-                    break
-            else:
-                # Tutti i file processati con successo
-                self.root.after(0, lambda: self._update_progress(100, self._t('status_operation_completed', '✅ {op} completato!').format(op=self._op_name_upper(operation_type))))
-                self.root.after(0, lambda: self.status_label.configure(text=self._t('status_operation_completed', '✅ {op} completato!').format(op=self._op_name_upper(operation_type))))
-                result_state = 'success'
-                
-        except Exception as e:
-            self.root.after(0, lambda: self._update_progress(0, self._t('status_error_generic', '❌ Errore: {error}').format(error=str(e))))
-            self.root.after(0, lambda: self.status_label.configure(text=self._t('status_error_generic', '❌ Errore: {error}').format(error=str(e))))
-            result_state = 'error'
-        finally:
-            self.operation_in_progress = False  # Ferma il monitor thread
+    def _check_operation_done(self, op):
+        """Chiude l'operazione quando il piano è sottomesso e tutti i suoi job sono terminati"""
+        with self._operations_lock:
+            if op.state != op.RUNNING or any(job.state not in JobState.FINISHED for job in op.jobs):
+                return
+            op.state = op.outcome()
+
+        if op.state == op.SUCCESS:
+            msg = self._t('status_operation_completed', '✅ {op} completato!').format(op=self._op_name_upper(op.operation_type))
+            self._post_operation_progress(op, 100, msg)
+            self._record_eta_history(op)
+        elif op.state == op.CANCELLED:
+            msg = self._t('status_cancelled', "❌ Operazione annullata")
+            self._post_operation_progress(op, 0, msg)
+        else:
+            msg = self._t('status_error_during_operation', '❌ Errore durante {op}').format(op=self._op_name(op.operation_type))
+            err = op.first_error()
+            if err:
+                msg = f"{msg}: {err}"
+            self._post_operation_progress(op, 0, msg)
+        self._post_status(msg)
+        try:
+            self.root.after(0, self._on_operation_finished, op)
+        except Exception:
+            pass
+
+    def _on_operation_finished(self, op):
+        """Fine di un'operazione (thread UI): selettore, storico e, se era l'ultima, fine sessione"""
+        scheduler = self._get_job_scheduler()
+        with self._operations_lock:
+            finished = [o for o in self._operations.values() if not o.active]
+            for old in finished[:max(0, len(finished) - self.OPERATIONS_HISTORY)]:
+                if old.id != self._selected_operation_id:
+                    del self._operations[old.id]
+            self.operation_in_progress = any(o.active for o in self._operations.values())
+        scheduler.forget_finished()
+        self._refresh_operation_selector()
+        if self.operation_in_progress:
+            return
+
+        # Il loop UI applica gli ultimi testi e si ferma
+        # Se l'app è stata lanciata dal menu contestuale:
+        # - in caso di SUCCESSO chiudi automaticamente dopo pochi secondi (report leggibile)
+        # - in caso di ERRORE/ANNULLATA non chiudere (così puoi studiare il motivo)
+        if self.launched_from_context_menu and op.operation_type in ('copy', 'move'):
             try:
-                self._batch_file_count = 0
-                self._batch_file_index = 0
+                if self._auto_close_after_id is not None:
+                    self.root.after_cancel(self._auto_close_after_id)
             except Exception:
                 pass
-            self.root.after(0, lambda: self.copy_btn.configure(state='normal'))
-            self.root.after(0, lambda: self.move_btn.configure(state='normal'))
-            self.root.after(0, lambda: self.cancel_btn.configure(state='disabled'))
-
-            # Se l'app è stata lanciata dal menu contestuale:
-            # - in caso di SUCCESSO chiudi automaticamente dopo pochi secondi (report leggibile)
-            # - in caso di ERRORE/ANNULLATA non chiudere (così puoi studiare il motivo)
-            if self.launched_from_context_menu and operation_type in ('copy', 'move'):
+
+            if op.state == op.SUCCESS:
+                delay_ms = 3500
                 try:
-                    if self._auto_close_after_id is not None:
-                        self.root.after_cancel(self._auto_close_after_id)
+                    self._auto_close_after_id = self.root.after(delay_ms, self._on_closing)
                 except Exception:
-                    pass
-
-                if result_state == 'success':
-                    delay_ms = 3500
-                    try:
-                        self._auto_close_after_id = self.root.after(delay_ms, self._on_closing)
-                    except Exception:
-                        self._auto_close_after_id = None
-                else:
-                    # Non auto-chiudere e non nascondere la UI di progress: lascia tutto visibile.
                     self._auto_close_after_id = None
             else:
-                # Uso diretto: non auto-chiudere. Nascondi la UI dopo un breve tempo.
-                self.root.after(3000, self._hide_progress_ui)
-    
-    def _update_progress(self, percentage, text):
-        """Aggiorna la label progress in modo thread-safe con velocità e ETA"""
+                # Non auto-chiudere e non nascondere la UI di progress: lascia tutto visibile.
+                self._auto_close_after_id = None
+        else:
+            # Uso diretto: non auto-chiudere. Nascondi la UI dopo un breve tempo.
+            self.root.after(3000, self._hide_progress_ui)
+
+    def _running_jobs(self):
+        """Job in esecuzione di tutte le operazioni (engine già creato)"""
+        with self._operations_lock:
+            jobs = [job for op in self._operations.values() if op.active for job in op.jobs]
+        return [job for job in jobs if job.state == JobState.RUNNING and job.engine is not None]
+
+    # --- Selettore operazioni ----------------------------------------------------------
+
+    def _selected_operation(self):
+        return self._operations.get(self._selected_operation_id)
+
+    def _operation_label(self, op):
+        names = [Path(s).name or s for s in op.sources]
+        first = names[0] if names else ''
+        more = f" (+{len(names) - 1})" if len(names) > 1 else ''
+        state = self._t(f'op_state_{op.display_state()}', op.display_state())
+        return f"#{op.id} {self._op_name_upper(op.operation_type)}: {first}{more} → {Path(op.destination).name or op.destination} [{state}]"
+
+    def _refresh_operation_selector(self):
+        """Voci del selettore, bottoni Annulla/Priorità dell'operazione selezionata (thread UI)"""
+        with self._operations_lock:
+            ops = list(self._operations.values())
+        labels = {self._operation_label(op): op.id for op in ops}
+        self._operation_labels = labels
+        selected = self._selected_operation()
+        try:
+            values = list(labels) or ['']
+            self.operation_selector.configure(values=values, state='normal' if labels else 'disabled')
+            current = next((label for label, op_id in labels.items() if op_id == self._selected_operation_id), '')
+            self.operation_selector.set(current)
+        except Exception:
+            pass
+        try:
+            active = selected is not None and selected.active
+            self.cancel_btn.configure(state='normal' if active else 'disabled')
+            self.prioritize_btn.configure(state='normal' if active and len([o for o in ops if o.active]) > 1 else 'disabled')
+        except Exception:
+            pass
+
+    def _select_operation(self, op_id):
+        """La sezione progresso passa all'operazione op_id (ultimo testo + snapshot alla prossima lettura)"""
+        self._selected_operation_id = op_id
+        self._ui_snapshot_key = None
+        op = self._selected_operation()
+        try:
+            if hasattr(self, 'file_counter_label') and self.file_counter_label is not None:
+                self.file_counter_label.configure(text="")
+        except Exception:
+            pass
+        if op is not None and op.message is not None:
+            self._post_progress(*op.message)
+        self._refresh_operation_selector()
+        self._start_ui_refresh()
+
+    def _on_operation_selected(self, label):
+        op_id = self._operation_labels.get(label)
+        if op_id is not None and op_id != self._selected_operation_id:
+            self._select_operation(op_id)
+
+    def _prioritize_operation(self):
+        """Porta in testa alla coda dello scheduler i job non ancora avviati dell'operazione selezionata"""
+        op = self._selected_operation()
+        if op is None or not op.active:
+            return
+        with self._operations_lock:
+            op.priority = max(o.priority for o in self._operations.values()) + 1
+            jobs = list(op.jobs)
+        scheduler = self._get_job_scheduler()
+        for job in jobs:
+            if job.state == JobState.QUEUED:
+                scheduler.set_priority(job.id, op.priority)
+
+    def _build_transfer_plan(self, op):
+        """Piano dell'operazione (scansione unica di tutte le sorgenti); None se annullata durante la scansione"""
+        last_report = [0.0]
+
+        def _on_progress(files, total):
+            now = time.monotonic()
+            if now - last_report[0] < 0.2:
+                return
+            last_report[0] = now
+            text = self._t('status_scanning_sources', 'Scansione...({files} file, {size})').format(
+                files=files, size=format_bytes(total))
+            self._post_operation_progress(op, 0, text)
+
+        plan = build_transfer_plan(
+            op.sources,
+            lambda source: self._item_destination(source, op.destination),
+            should_cancel=lambda: op.cancel_requested,
+            on_progress=_on_progress,
+            symlinks=self.file_engine.symlinks,
+            skip_special=self.file_engine.skip_special,
+        )
+        if op.cancel_requested:
+            return None
+
+        for skipped, container in plan.skipped:
+            where = "duplicata" if skipped == container else f"già inclusa in {container}"
+            self._on_engine_info(f"⏭️ Selezione {where}, ignorata: {skipped}")
+        for item in plan.items:
+            # Sorgenti inesistenti: l'errore arriva dall'engine al momento della copia
+            if item.complete:
+                for error in item.errors:
+                    self._on_engine_error(error)
+        counts = format_entry_counts(plan.counts())
+        self._on_engine_info(
+            f"📋 Piano: {plan.file_count} file, {format_bytes(plan.total_size)} da {len(plan.items)} sorgenti"
+            f"{f' ({counts})' if counts else ''} (scansione {plan.elapsed:.2f}s)"
+        )
+        return plan
+
+    @staticmethod
+    def _item_destination(source, destination):
+        # Se la sorgente è una cartella, copia/sposta la cartella intera dentro la destinazione
+        # (es: dest\NomeCartella) invece di riversarne i file direttamente nella root
+        try:
+            if os.path.isdir(source):
+                return os.path.join(destination, Path(source).name)
+        except Exception:
+            pass
+        return destination
+
+    def _create_job_engine(self):
+        """Engine di un job dello scheduler (stessi parametri/callback dell'engine principale)"""
+        engine = FileOperationEngine(
+            buffer_size=self.file_engine.buffer_size,
+            num_threads=self.file_engine.num_threads,
+            auto_tune=self.file_engine.auto_tune,
+            preserve=self.file_engine.preserve,
+            symlinks=self.file_engine.symlinks,
+            skip_special=self.file_engine.skip_special,
+        )
+        engine.set_error_callback(self._on_engine_error)
+        engine.set_info_callback(self._on_engine_info)
+        engine.metrics = self.file_engine.metrics
+        engine.trace = self.file_engine.trace
+        return engine
+
+    def _update_progress(self, percentage, text, snapshot=None):
+        """Aggiorna la label progress con velocità e ETA (thread UI; snapshot = ProgressSnapshot dell'engine)"""
         import time
 
+        if snapshot is None:
+            snapshot = self._progress_snapshot()
+
         # Normalizza percentuale (mostra sempre intero)
         try:
             percentage = int(round(float(percentage)))
@@ -2222,74 +2802,21 @@ class AdvancedFileMoverCustomTkinter:
         elif percentage > 100:
             percentage = 100
 
-        # Se siamo in modalità batch (solo file selezionati), calcola percentuale cumulativa su byte totali
-        try:
-            batch_total = int(getattr(self, '_batch_total_size', 0) or 0)
-            if batch_total > 0:
-                batch_completed = int(getattr(self, '_batch_completed_bytes', 0) or 0)
-                engine_processed = 0
-                try:
-                    engine_processed = int(getattr(self.file_engine, 'processed_size', 0) or 0)
-                except Exception:
-                    engine_processed = 0
-                batch_processed = batch_completed + engine_processed
-                if batch_processed < 0:
-                    batch_processed = 0
-                if batch_processed > batch_total:
-                    batch_processed = batch_total
-                percentage = int(round((batch_processed / batch_total) * 100)) if batch_total > 0 else 0
-                if percentage < 0:
-                    percentage = 0
-                elif percentage > 100:
-                    percentage = 100
-        except Exception:
-            pass
-
         try:
             if hasattr(self, 'progress_bar') and self.progress_bar is not None:
                 self.progress_bar.set(percentage / 100.0)
         except Exception:
             pass
 
-        # Calcola velocità e ETA
-        if not hasattr(self, '_progress_start_time') or self._progress_start_time is None:
-            self._progress_start_time = time.time()
-        
+        # Calcola velocità e ETA (dal primo avanzamento dei job dell'operazione selezionata)
+        op = self._selected_operation()
         current_time = time.time()
-        elapsed = current_time - self._progress_start_time
+        started = op.progress_started if op is not None else None
+        elapsed = current_time - started if started is not None else 0
         speed_mb = 0
         eta_str = "--:--"
         file_name = "..."
-        
-        try:
-            # Ottieni informazioni dal file_engine
-            if hasattr(self.file_engine, 'current_file') and self.file_engine.current_file:
-                file_name = self.file_engine.current_file
 
-            # Per batch: velocità/ETA su totale batch; altrimenti su file/cartella corrente
-            batch_total = int(getattr(self, '_batch_total_size', 0) or 0)
-            if elapsed > 0:
-                if batch_total > 0:
-                    batch_completed = int(getattr(self, '_batch_completed_bytes', 0) or 0)
-                    processed = batch_completed + int(getattr(self.file_engine, 'processed_size', 0) or 0)
-                    total = batch_total
-                else:
-                    processed = int(getattr(self.file_engine, 'processed_size', 0) or 0)
-                    total = int(getattr(self.file_engine, 'total_size', 0) or 0)
-
-                # Calcola velocità in MB/s
-                speed_mb = (processed / (1024 * 1024)) / elapsed if elapsed > 0 else 0
-
-                # Calcola ETA
-                if speed_mb > 0 and total > processed:
-                    remaining_mb = (total - processed) / (1024 * 1024)
-                    eta_seconds = remaining_mb / speed_mb
-                    minutes, seconds = divmod(int(eta_seconds), 60)
-                    eta_str = f"{minutes:02d}:{seconds:02d}"
-        except Exception:
-            pass
-
-        # A fine operazione: mostra tempo totale impiegato (T) invece di ETA residuo
         def _format_elapsed(seconds_total: float) -> str:
             try:
                 seconds_total = int(seconds_total)
@@ -2302,7 +2829,38 @@ class AdvancedFileMoverCustomTkinter:
             if h > 0:
                 return f"{h:02d}:{m:02d}:{s:02d}"
             return f"{m:02d}:{s:02d}"
+        
+        try:
+            # Informazioni dallo snapshot (vista aggregata dei job dell'operazione, totali dal piano)
+            if snapshot.current_file:
+                file_name = snapshot.current_file
 
+            if elapsed > 0:
+                processed = int(snapshot.processed_size or 0)
+                total = int(snapshot.total_size or 0)
+
+                # Calcola velocità in MB/s
+                speed_mb = (processed / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+
+                # Calcola ETA: modello a·MB + b·file (i file piccoli costano più dei loro byte)
+                # con intervallo; media MB/s solo finché il modello non ha dati
+                estimate = None
+                model = op.eta_model if op is not None else None
+                if model is not None and total > 0:
+                    files_done, files_total = self._progress_file_counts(snapshot)
+                    model.update(processed, files_done)
+                    estimate = model.estimate(total - processed, max(0, files_total - files_done))
+                if estimate is not None and total > processed:
+                    eta_seconds, low, high = estimate
+                    high_str = _format_elapsed(high) if high <= eta_seconds * self.ETA_RANGE_MAX_FACTOR else "?"
+                    eta_str = f"{_format_elapsed(eta_seconds)} ({_format_elapsed(low)}-{high_str})"
+                elif speed_mb > 0 and total > processed:
+                    remaining_mb = (total - processed) / (1024 * 1024)
+                    eta_str = _format_elapsed(remaining_mb / speed_mb)
+        except Exception:
+            pass
+
+        # A fine operazione: mostra tempo totale impiegato (T) invece di ETA residuo
         if percentage >= 100:
             eta_str = _format_elapsed(elapsed)
             eta_label = self._t('progress_elapsed_label', 'T')
@@ -2322,10 +2880,27 @@ class AdvancedFileMoverCustomTkinter:
             pass
     
     def cancel_operation(self):
-        """Annulla operazione in corso"""
-        self.cancel_requested = True
-        self.file_engine.cancel()
+        """Annulla solo l'operazione selezionata: le altre nello scheduler proseguono"""
+        op = self._selected_operation()
+        if op is None or not op.active:
+            return
+        op.cancel_requested = True
+        scheduler = self._get_job_scheduler()
+        for job in list(op.jobs):
+            scheduler.cancel(job.id)
+        try:
+            self.cancel_btn.configure(state='disabled')
+        except Exception:
+            pass
     
+    @property
+    def context_manager(self):
+        """ContextMenuRegistrar creato al primo uso (tab Menu Contestuale)"""
+        if self._context_manager is None:
+            from registry.context_menu import ContextMenuRegistrar
+            self._context_manager = ContextMenuRegistrar()
+        return self._context_manager
+
     def _register_menu(self):
         """Registra menu contestuale"""
         try:
@@ -2485,6 +3060,14 @@ class AdvancedFileMoverCustomTkinter:
     
     def _on_closing(self):
         """Salva stato e chiude l'app"""
+        # Da qui in poi gli altri avvii non devono più inoltrare a questa istanza
+        try:
+            if self._instance_server is not None:
+                self._instance_server.close()
+                self._instance_server = None
+        except Exception:
+            pass
+
         # Salva dimensione finestra corrente (resize manuale abilitato)
         try:
             self.root.update_idletasks()
@@ -2519,12 +3102,21 @@ class AdvancedFileMoverCustomTkinter:
         self.config_manager.set('ramdrive', self.ramdrive_enabled.get())
         self.config_manager.set('overwrite', self.overwrite_enabled.get())
         self.config_manager.set('delete_source', self.delete_source_enabled.get())
+        try:
+            self.config_manager.set('bandwidth_limit_mb', float(str(self.bandwidth_limit.get() or '0').replace(',', '.')))
+        except ValueError:
+            pass
         
         self.root.destroy()
 
     def _start_update_check(self):
         """Start async update check in background"""
+        if self.operation_in_progress:
+            # Niente rete né dialoghi durante una copia: riprova più tardi
+            self.root.after(self.UPDATE_CHECK_DELAY_MS, self._start_update_check)
+            return
         try:
+            from src.update_checker import check_for_update_async
             config_path = str(self.config_manager.config_path)
             check_for_update_async(
                 config_path,
@@ -2699,11 +3291,8 @@ def main() -> int:
     except Exception:
         return 1
 
-    # Controllo single-instance: se richiesto e c'è già un'istanza attiva, termina silenziosamente
-    if '--single-instance' in argv:
-        if not _check_single_instance():
-            # C'è già un'istanza in esecuzione, termina senza errori
-            return 0
+    # Misura di avvio (benchmarks/startup_bench.py): primo disegno della finestra, poi uscita
+    startup_benchmark = '--startup-benchmark' in argv
 
     sources, operation_type, from_context_menu = _parse_launch_args(argv)
 
@@ -2729,7 +3318,7 @@ def main() -> int:
 
     # Avvio manuale: auto-elevazione opzionale (da impostazione), con guard anti-loop.
     try:
-        if (not from_context_menu) and sys.platform == 'win32':
+        if (not from_context_menu) and (not startup_benchmark) and sys.platform == 'win32':
             if ('--no-auto-elevate' not in argv) and (not _is_running_as_admin()):
                 enabled = False
                 try:
@@ -2745,6 +3334,23 @@ def main() -> int:
     except Exception:
         pass
 
+    # Single-instance: gli avvii successivi inoltrano la selezione all'istanza primaria.
+    # Il caso comune è gestito in cima al modulo (prima di importare Tk); qui restano
+    # gli avvii simultanei, in cui la primaria può essere ancora in fase di avvio.
+    ipc_server = None
+    if ('--single-instance' in argv or from_context_menu) and not startup_benchmark:
+        try:
+            from src.instance_ipc import InstanceServer, send_to_primary
+
+            ipc_server = InstanceServer()
+            if not (_check_single_instance() and ipc_server.start()):
+                ipc_server = None
+                if send_to_primary(argv, wait=INSTANCE_FORWARD_WAIT_S):
+                    return 0
+                # Nessuna istanza raggiungibile: finestra propria (la selezione non va persa)
+        except Exception:
+            ipc_server = None
+
     root = ctk.CTk()
     app = AdvancedFileMoverCustomTkinter(
         root,
@@ -2753,7 +3359,20 @@ def main() -> int:
         launched_from_context_menu=from_context_menu,
     )
     root.minsize(602, 720)  # Dimensione minima finestra
+
+    if ipc_server is not None:
+        app._instance_server = ipc_server
+        ipc_server.set_handler(lambda request: root.after(0, app._on_forwarded_launch, request))
+
+    if startup_benchmark:
+        root.update()  # Forza il primo disegno (i sottosistemi differiti non partono)
+        print(json.dumps({'first_paint_ms': (time.perf_counter() - _STARTUP_T0) * 1000.0}), flush=True)
+        root.destroy()
+        return 0
+
     root.mainloop()
+    if ipc_server is not None:
+        ipc_server.close()
     return 0
 
 
@@ -3064,6 +3683,7 @@ def _relaunch_elevated(argv) -> bool:
 
     try:
         import ctypes
+        import subprocess
 
         if getattr(sys, 'frozen', False):
             target = sys.executable